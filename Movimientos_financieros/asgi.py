@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "Movimientos_financieros.settings")
+# Con ASGI las lecturas se atienden con las vistas async (ver ASYNC_VIEWS)
+os.environ.setdefault("ASYNC_VIEWS", "True")
 
 application = get_asgi_application()
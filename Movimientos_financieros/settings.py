@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
+import json
 import os
 from dotenv import load_dotenv
 
@@ -42,6 +43,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "drf_spectacular",
     "rest_framework.authtoken",
@@ -49,6 +51,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Primero, para medir también al resto de middlewares
+    "api.metricas.MetricasMiddleware",
+    # Antes que los demás: comprime la respuesta que ellos ya terminaron
+    "api.compresion.CompresionMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -93,9 +99,51 @@ DATABASES = {
     }
 }
 
+# Pool de conexiones de psycopg 3, uno por proceso (cada worker de gunicorn
+# tiene el suyo). Con DB_POOL=False cada hilo reutiliza su conexión durante
+# DB_CONN_MAX_AGE segundos.
+DB_POOL = os.getenv("DB_POOL", "True").lower() == "true"
+# Verifica la conexión antes de usarla y descarta las caídas (con pool, en
+# cada entrega; sin pool, al empezar cada petición)
+DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+if DB_POOL:
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(os.getenv("DB_POOL_MIN", "2")),
+            "max_size": int(os.getenv("DB_POOL_MAX", "20")),
+            # Segundos esperando una conexión libre antes de fallar
+            "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+            # Se cierran las conexiones sobrantes inactivas por más de max_idle
+            "max_idle": float(os.getenv("DB_POOL_MAX_IDLE", "300")),
+        },
+    }
+else:
+    DATABASES["default"]["CONN_MAX_AGE"] = int(os.getenv("DB_CONN_MAX_AGE", "60"))
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
+# Hash de contraseñas (api/cuentas.py). PBKDF2 con costo configurable por
+# despliegue: más iteraciones, más caro adivinar contraseñas y más CPU por
+# login. Los hash guardados con otro costo se recalculan en el siguiente login.
+PASSWORD_HASHERS = [
+    "api.cuentas.PBKDF2Configurable",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+PASSWORD_ITERACIONES = int(os.getenv("PASSWORD_ITERACIONES", "1000000"))
+
+# Hilos por proceso que calculan hash de contraseñas (login y registro).
+# Acota los núcleos que puede ocupar una ráfaga de logins.
+HASH_HILOS = int(os.getenv("HASH_HILOS", "1"))
+# Logins o registros que pueden esperar turno además de los que se calculan;
+# los siguientes reciben 503 con Retry-After.
+HASH_EN_ESPERA = int(os.getenv("HASH_EN_ESPERA", "1"))
+# Prioridad (nice de Linux) de esos hilos: el CPU va primero a las demás peticiones
+HASH_NICE = int(os.getenv("HASH_NICE", "10"))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -129,6 +177,29 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# Debe ser compartida entre los workers de gunicorn (archivo, memcached, redis...):
+# la invalidación de reportes escribe aquí y cada worker lee de aquí.
+# LocMemCache solo es correcta con un único proceso.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.filebased.FileBasedCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", "/tmp/movimientos_financieros_cache"),
+    }
+}
+
+# Segundos que se guarda un reporte; la versión por usuario ya evita datos viejos
+REPORTES_CACHE_TIMEOUT = int(os.getenv("REPORTES_CACHE_TIMEOUT", "3600"))
+
+# Caché de tokens de CachedTokenAuthentication: la compartida se invalida al
+# borrar/rotar tokens o modificar usuarios; la del proceso puede tardar hasta
+# TOKEN_CACHE_TTL_LOCAL segundos en enterarse (0 la desactiva)
+TOKEN_CACHE_TTL = int(os.getenv("TOKEN_CACHE_TTL", "300"))
+TOKEN_CACHE_TTL_LOCAL = int(os.getenv("TOKEN_CACHE_TTL_LOCAL", "10"))
+TOKEN_CACHE_MAX_ENTRADAS = int(os.getenv("TOKEN_CACHE_MAX_ENTRADAS", "10000"))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -137,10 +208,66 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # Django REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'api.autenticacion.CachedTokenAuthentication',
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.ORJSONRenderer',
+        'api.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'rest_framework.parsers.JSONParser',
+        'api.parsers.MessagePackParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
 }
 
+# Tamaño máximo de página que un cliente puede pedir con ?page_size=
+MOVIMIENTOS_MAX_PAGE_SIZE = int(os.getenv("MOVIMIENTOS_MAX_PAGE_SIZE", "100"))
+
+# Máximo de filas aceptadas por POST /api/movimientos/bulk/
+MOVIMIENTOS_MAX_BULK = int(os.getenv("MOVIMIENTOS_MAX_BULK", "5000"))
+
+# Máximo de periodos que devuelve GET /api/movimientos/serie/
+MOVIMIENTOS_MAX_PERIODOS_SERIE = int(os.getenv("MOVIMIENTOS_MAX_PERIODOS_SERIE", "1000"))
+
+# Máximo de meses que cubre GET /api/movimientos/reporte_periodo/
+MOVIMIENTOS_MAX_MESES_REPORTE = int(os.getenv("MOVIMIENTOS_MAX_MESES_REPORTE", "36"))
+
+# El admin de movimientos cuenta con COUNT(*) hasta esta cantidad de filas
+# estimadas; por encima muestra la estimación de PostgreSQL
+ADMIN_CONTEO_EXACTO_HASTA = int(os.getenv("ADMIN_CONTEO_EXACTO_HASTA", "10000"))
+
+# Las respuestas JSON, MessagePack, NDJSON y CSV de al menos estos bytes se
+# comprimen con zstd o gzip si el cliente lo acepta (api/compresion.py)
+COMPRESION_MIN_BYTES = int(os.getenv("COMPRESION_MIN_BYTES", "1024"))
+
+# Vistas async (api/vistas_async.py) para listado, detalle, reportes y login.
+# asgi.py lo activa por defecto; con WSGI se usan las vistas DRF síncronas.
+ASYNC_VIEWS = os.getenv("ASYNC_VIEWS", "False").lower() == "true"
+
+# Peticiones async con conexión a la base de datos al mismo tiempo, por worker.
+# Con N workers, N * ASYNC_MAX_CONSULTAS debe quedar bajo max_connections.
+ASYNC_MAX_CONSULTAS = int(os.getenv("ASYNC_MAX_CONSULTAS", "20"))
+
+# Métricas por petición (api/metricas.py). La cabecera Server-Timing muestra
+# tiempos de la base de datos; se puede apagar en producción.
+METRICAS_SERVER_TIMING = os.getenv("METRICAS_SERVER_TIMING", "True").lower() == "true"
+# Si se define, GET /metrics exige 'Authorization: Bearer <METRICAS_TOKEN>'
+METRICAS_TOKEN = os.getenv("METRICAS_TOKEN", "")
+# Consultas máximas por vista (nombre de la URL); al superarlas se registra un
+# aviso con las sentencias. Ej: '{"movimiento-resumen": 3}'
+METRICAS_PRESUPUESTO_CONSULTAS = json.loads(os.getenv("METRICAS_PRESUPUESTO_CONSULTAS", "{}"))
+# Repeticiones de una misma sentencia en una petición que se reportan como
+# posible N+1 (0 lo desactiva)
+METRICAS_N_MAS_1 = int(os.getenv("METRICAS_N_MAS_1", "0"))
+
 # drf-spectacular Configuration
 SPECTACULAR_SETTINGS = {
     'TITLE': 'API de Movimientos Financieros',
@@ -17,7 +17,26 @@ Including another URLconf
 
 from django.contrib import admin
 from django.urls import path, include
-from drf_spectacular.views import SpectacularAPIView, SpectacularRedocView, SpectacularSwaggerView
+from django.views.decorators.csrf import csrf_exempt
+
+
+def vista_spectacular(nombre, **initkwargs):
+    """
+    Vista de drf_spectacular que se importa en la primera petición: la
+    generación del esquema es lo más pesado de importar y solo la usa la
+    documentación.
+    """
+    vista = None
+
+    @csrf_exempt
+    def inner(request, *args, **kwargs):
+        nonlocal vista
+        if vista is None:
+            from drf_spectacular import views
+            vista = getattr(views, nombre).as_view(**initkwargs)
+        return vista(request, *args, **kwargs)
+    return inner
+
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -25,7 +44,7 @@ urlpatterns = [
     path("api-auth/", include("rest_framework.urls")),
     
     # Swagger/OpenAPI URLs
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
-    path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
-    path('api/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
+    path('api/schema/', vista_spectacular('SpectacularAPIView'), name='schema'),
+    path('api/docs/', vista_spectacular('SpectacularSwaggerView', url_name='schema'), name='swagger-ui'),
+    path('api/redoc/', vista_spectacular('SpectacularRedocView', url_name='schema'), name='redoc'),
 ]
@@ -1,25 +1,203 @@
+from datetime import date
+from django.conf import settings
 from django.contrib import admin
-from .models import MovimientoFinanciero
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.paginator import Paginator
+from django.db import connection, transaction
+from django.db.models import Max, Min
+from django.utils.dates import MONTHS
+from django.utils.functional import cached_property
+from .models import MovimientoFinanciero, ResumenMensual
+from . import busqueda, resumenes
+
+
+class PaginadorEstimado(Paginator):
+    """
+    Paginador del admin que no ejecuta COUNT(*) sobre tablas grandes: si el
+    planificador de PostgreSQL estima más de ADMIN_CONTEO_EXACTO_HASTA filas
+    se usa esa estimación (estadísticas de ANALYZE), si no se cuenta.
+    """
+
+    @cached_property
+    def count(self):
+        sql, params = self.object_list.order_by().query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        estimado = plan[0]['Plan']['Plan Rows']
+        if estimado <= settings.ADMIN_CONTEO_EXACTO_HASTA:
+            return super().count
+        return int(estimado)
+
+
+def rango_de_años():
+    """
+    Años desde el movimiento más antiguo hasta el actual, según las
+    estadísticas de PostgreSQL de la columna fecha, sin recorrer la tabla.
+    Sin estadísticas (tabla recién creada) se usan los acumulados mensuales.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT min(valor), max(valor)
+            FROM pg_stats, unnest(
+                coalesce(histogram_bounds::text::date[], '{}')
+                || coalesce(most_common_vals::text::date[], '{}')
+            ) AS valor
+            WHERE schemaname = current_schema() AND tablename = %s AND attname = 'fecha'
+            """,
+            [MovimientoFinanciero._meta.db_table],
+        )
+        minimo, maximo = cursor.fetchone()
+    if minimo is None:
+        datos = ResumenMensual.objects.aggregate(minimo=Min('mes'), maximo=Max('mes'))
+        minimo, maximo = datos['minimo'], datos['maximo']
+    # Las estadísticas pueden no incluir aún los movimientos más recientes
+    actual = date.today().year
+    primero = minimo.year if minimo else actual
+    ultimo = max(maximo.year, actual) if maximo else actual
+    return range(ultimo, primero - 1, -1)
+
+
+class PeriodoFilter(admin.SimpleListFilter):
+    """
+    Año y mes de `fecha`, en lugar de date_hierarchy: no hace SELECT
+    DISTINCT sobre toda la tabla para armar las opciones y cada opción
+    filtra un rango de fechas que usa el índice.
+    """
+    title = 'periodo'
+    parameter_name = 'periodo'
+
+    def _rango(self):
+        valor = self.value()
+        if not valor:
+            return None
+        try:
+            if len(valor) == 4:
+                inicio = date(int(valor), 1, 1)
+                return inicio, inicio.replace(year=inicio.year + 1)
+            inicio = date(int(valor[:4]), int(valor[5:]), 1)
+        except ValueError as e:
+            raise IncorrectLookupParameters(e)
+        if inicio.month == 12:
+            return inicio, date(inicio.year + 1, 1, 1)
+        return inicio, inicio.replace(month=inicio.month + 1)
+
+    def lookups(self, request, model_admin):
+        seleccionado = (self.value() or '')[:4]
+        opciones = []
+        for año in rango_de_años():
+            opciones.append((str(año), str(año)))
+            # Los meses solo del año elegido
+            if str(año) == seleccionado:
+                opciones += [(f'{año}-{mes:02d}', f'{MONTHS[mes]} {año}') for mes in range(1, 13)]
+        return opciones
+
+    def queryset(self, request, queryset):
+        rango = self._rango()
+        if rango is None:
+            return queryset
+        return queryset.filter(fecha__gte=rango[0], fecha__lt=rango[1])
+
+
+class UsuarioFilter(admin.SimpleListFilter):
+    """
+    Filtro por usuario con el autocompletado del admin (busca usuarios a
+    medida que se escribe) en lugar de listar todos los usuarios.
+    """
+    title = 'usuario'
+    parameter_name = 'user'
+    template = 'admin/api/filtro_autocompletado.html'
+
+    def __init__(self, request, params, model, model_admin):
+        super().__init__(request, params, model, model_admin)
+        campo = model._meta.get_field('user')
+        # El campo de formulario da al widget las opciones (solo se consulta el usuario elegido)
+        self.widget = campo.formfield(
+            widget=AutocompleteSelect(campo, model_admin.admin_site)
+        ).widget
+
+    def lookups(self, request, model_admin):
+        return ()
+
+    def has_output(self):
+        return True
+
+    def selector(self):
+        return self.widget.render(
+            self.parameter_name, self.value(),
+            attrs={'id': f'filtro_{self.parameter_name}', 'data-width': '100%'},
+        )
+
+    def queryset(self, request, queryset):
+        if self.value() is None:
+            return queryset
+        if not self.value().isdigit():
+            raise IncorrectLookupParameters(f'Usuario inválido: {self.value()}')
+        return queryset.filter(user_id=self.value())
+
 
 @admin.register(MovimientoFinanciero)
 class MovimientoFinancieroAdmin(admin.ModelAdmin):
-    list_display = ['descripcion', 'monto', 'categoria', 'fecha', 'fecha_creacion']
-    list_filter = ['categoria', 'fecha', 'fecha_creacion']
+    list_display = ['descripcion', 'monto', 'categoria', 'fecha', 'user', 'fecha_creacion']
+    list_select_related = ['user']
+    list_filter = ['categoria', PeriodoFilter, UsuarioFilter]
+    # La búsqueda no usa ILIKE sobre estos campos: ver get_search_results
     search_fields = ['descripcion', 'notas']
-    date_hierarchy = 'fecha'
-    ordering = ['-fecha', '-fecha_creacion']
-    
+    autocomplete_fields = ['user']
+    # Con el índice (fecha, id) y (user, fecha, id) no hace falta ordenar en memoria
+    ordering = ['-fecha', '-id']
+    paginator = PaginadorEstimado
+    # El total sin filtros y los conteos por opción de filtro son COUNT(*)
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+
     fieldsets = (
         ('Información Básica', {
-            'fields': ('descripcion', 'monto', 'categoria', 'fecha')
+            'fields': ('user', 'descripcion', 'monto', 'categoria', 'fecha')
         }),
         ('Información Adicional', {
             'fields': ('notas',),
             'classes': ('collapse',)
         }),
     )
-    
+
     readonly_fields = ['fecha_creacion', 'fecha_actualizacion']
-    
+
+    @property
+    def media(self):
+        # select2 para el filtro de usuario de la lista
+        return super().media + AutocompleteSelect(
+            MovimientoFinanciero._meta.get_field('user'), self.admin_site
+        ).media
+
     def get_queryset(self, request):
-        return super().get_queryset(request).select_related()
+        return super().get_queryset(request).defer('busqueda')
+
+    def get_search_results(self, request, queryset, search_term):
+        # Los índices de api.busqueda en lugar de ILIKE sobre search_fields
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        return busqueda.buscar(queryset, search_term), False
+
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            if change:
+                anterior = resumenes.estado_guardado(obj)
+                super().save_model(request, obj, form, change)
+                resumenes.registrar_cambio(anterior, obj)
+            else:
+                super().save_model(request, obj, form, change)
+                resumenes.registrar_alta(obj)
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            resumenes.registrar_baja(resumenes.estado_guardado(obj))
+            super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            resumenes.registrar_baja(*queryset.select_for_update(of=('self',)))
+            super().delete_queryset(request, queryset)
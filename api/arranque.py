@@ -0,0 +1,52 @@
+"""
+Arranque del servidor con la aplicación precargada en el master de gunicorn
+(ver gunicorn.conf.py).
+"""
+from django.core.management import call_command
+from django.db import connections, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.urls import get_resolver
+
+
+def precargar():
+    """
+    Importa las URLs, y con ellas vistas, serializers y DRF, que Django
+    carga recién con la primera petición. Así los workers nacen con todo
+    importado en lugar de cargarlo cada uno.
+    """
+    get_resolver().resolve('/')
+
+
+def migraciones_pendientes():
+    """
+    Migraciones sin aplicar, según la tabla django_migrations.
+    """
+    executor = MigrationExecutor(connection)
+    return executor.migration_plan(executor.loader.graph.leaf_nodes())
+
+
+def migrar_si_hace_falta():
+    """
+    Aplica las migraciones solo si hay alguna pendiente y devuelve cuántas
+    había. Con el esquema al día cuesta una consulta, en lugar de arrancar
+    `manage.py migrate` en otro proceso.
+    """
+    try:
+        pendientes = len(migraciones_pendientes())
+        if pendientes:
+            call_command('migrate', fake_initial=True, verbosity=1)
+        return pendientes
+    finally:
+        cerrar_conexiones()
+
+
+def cerrar_conexiones():
+    """
+    Cierra las conexiones y los pools del proceso. El master debe llamarla
+    antes de crear los workers: un socket (o los hilos del pool) heredado
+    por varios procesos no se puede compartir.
+    """
+    connections.close_all()
+    for conexion in connections.all(initialized_only=True):
+        if getattr(conexion, 'pool', None) is not None:
+            conexion.close_pool()
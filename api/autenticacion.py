@@ -0,0 +1,133 @@
+import threading
+import time
+from collections import OrderedDict
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+# Las entradas guardan solo CAMPOS_USUARIO; el prefijo anterior ('token')
+# tenía el Token completo y ya no se lee
+PREFIJO = 'credenciales'
+
+
+class _LRU:
+    """
+    Caché en memoria del proceso, acotada en tamaño y con vencimiento por entrada.
+    """
+    def __init__(self, tamaño):
+        self.tamaño = tamaño
+        self.datos = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, clave):
+        with self.lock:
+            entrada = self.datos.get(clave)
+            if entrada is None:
+                return None
+            valor, vence = entrada
+            if vence < time.monotonic():
+                del self.datos[clave]
+                return None
+            self.datos.move_to_end(clave)
+            return valor
+
+    def set(self, clave, valor, ttl):
+        with self.lock:
+            self.datos[clave] = (valor, time.monotonic() + ttl)
+            self.datos.move_to_end(clave)
+            while len(self.datos) > self.tamaño:
+                self.datos.popitem(last=False)
+
+    def delete(self, clave):
+        with self.lock:
+            self.datos.pop(clave, None)
+
+    def clear(self):
+        with self.lock:
+            self.datos.clear()
+
+
+_local = _LRU(settings.TOKEN_CACHE_MAX_ENTRADAS)
+
+
+def _clave(key):
+    return f'{PREFIJO}:{key}'
+
+
+# Lo único que se cachea del usuario: nunca el hash de la contraseña ni el
+# resto de la fila, que se cargan de la base de datos solo si se usan
+CAMPOS_USUARIO = ('id', 'username', 'is_active')
+
+
+def _credenciales(key, datos):
+    """
+    (usuario, token) a partir de los CAMPOS_USUARIO cacheados. Cada llamada
+    crea instancias nuevas, así que una petición puede modificar su
+    request.user sin afectar a otras.
+    """
+    usuario = User.from_db(None, CAMPOS_USUARIO, datos)
+    token = Token.from_db(None, ('key', 'user_id'), (key, usuario.pk))
+    token.user = usuario
+    return usuario, token
+
+
+def invalidar_token(key):
+    """
+    Olvida un token en la caché compartida y en la de este proceso.
+    Los demás procesos lo olvidan al vencer TOKEN_CACHE_TTL_LOCAL.
+    """
+    cache.delete(_clave(key))
+    _local.delete(key)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication que resuelve token -> usuario sin consultar la base de
+    datos en cada petición: primero en una LRU del proceso (TTL corto),
+    luego en la caché compartida de Django y solo al final en la tabla
+    authtoken_token. Solo se cachean los CAMPOS_USUARIO.
+
+    Las señales de api.signals invalidan la entrada al borrar o rotar el
+    token y al modificar o desactivar al usuario.
+    """
+
+    def authenticate_credentials(self, key):
+        datos = _local.get(key)
+        if datos is None:
+            datos = cache.get(_clave(key))
+            if datos is None:
+                datos = Token.objects.filter(key=key).values_list(
+                    *(f'user__{campo}' for campo in CAMPOS_USUARIO)
+                ).first()
+                if datos is None:
+                    raise AuthenticationFailed('Invalid token.')
+                cache.set(_clave(key), datos, timeout=settings.TOKEN_CACHE_TTL)
+            if settings.TOKEN_CACHE_TTL_LOCAL:
+                _local.set(key, datos, settings.TOKEN_CACHE_TTL_LOCAL)
+
+        usuario, token = _credenciales(key, datos)
+        if not usuario.is_active:
+            raise AuthenticationFailed('User inactive or deleted.')
+        return (usuario, token)
+
+    async def aauthenticate(self, request):
+        """
+        authenticate para las vistas async: con el token en la LRU del proceso
+        no sale del event loop; si no, lo busca en un hilo.
+        """
+        auth = get_authorization_header(request).split()
+        if len(auth) == 2 and auth[0].lower() == self.keyword.lower().encode():
+            try:
+                key = auth[1].decode()
+            except UnicodeError:
+                key = None
+            datos = _local.get(key) if key else None
+            if datos is not None:
+                usuario, token = _credenciales(key, datos)
+                if usuario.is_active:
+                    return (usuario, token)
+        return await sync_to_async(self.authenticate)(request)
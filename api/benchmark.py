@@ -0,0 +1,367 @@
+"""
+Datos de prueba y escenarios del benchmark de la API.
+
+- sembrar(): crea usuarios y movimientos directamente en PostgreSQL
+  (INSERT ... SELECT sobre generate_series), en lotes, con acumulados.
+- ejecutar(): recorre los escenarios con el cliente de pruebas de Django
+  dentro de una transacción que se revierte al final, y mide latencias y
+  consultas SQL por endpoint.
+- formatos(): tamaño y tiempo de codificación de respuestas típicas en cada
+  formato (JSON, MessagePack) y compresión (ninguna, gzip, zstd).
+"""
+import math
+import random
+import statistics
+import time
+from datetime import date, timedelta
+from itertools import product
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from .filtros import ORDENES
+from .models import MovimientoFinanciero, ResumenDiario, ResumenMensual
+from .renderers import MessagePackRenderer, ORJSONRenderer
+from . import resumenes, cache_reportes, compresion
+
+CONTRASEÑA = 'bench'
+
+# Textos de las descripciones y notas sembradas, para que la búsqueda tenga
+# palabras reales que encontrar
+CONCEPTOS = [
+    'Supermercado', 'Salario', 'Arriendo', 'Restaurante', 'Gasolina', 'Farmacia',
+    'Transporte público', 'Internet hogar', 'Factura de electricidad', 'Factura de agua',
+    'Gimnasio', 'Cine', 'Ropa', 'Librería', 'Regalo de cumpleaños', 'Viaje', 'Hotel',
+    'Seguro del carro', 'Impuestos', 'Honorarios', 'Venta de bicicleta', 'Intereses bancarios',
+    'Reembolso', 'Mercado semanal', 'Panadería', 'Café', 'Taxi', 'Parqueadero',
+    'Plan de celular', 'Suscripción de música',
+]
+NOTAS = [
+    'Pagado con tarjeta de crédito', 'Pago en efectivo', 'Transferencia bancaria',
+    'Compartido con la familia', 'Gasto recurrente', 'Revisar la factura',
+]
+
+INSERCION = """
+    INSERT INTO api_movimientofinanciero
+        (user_id, descripcion, monto, categoria, fecha, notas, fecha_creacion, fecha_actualizacion)
+    SELECT
+        (%(usuarios)s::bigint[])[1 + g %% %(cantidad_usuarios)s],
+        (%(conceptos)s::text[])[1 + floor(random() * cardinality(%(conceptos)s::text[]))::int] || ' ' || g,
+        round((0.01 + random() * %(monto_maximo)s)::numeric, 2),
+        CASE WHEN random() < %(proporcion_ingresos)s THEN 'ingreso' ELSE 'gasto' END,
+        fecha,
+        CASE WHEN random() < 0.2 THEN (%(notas)s::text[])[1 + floor(random() * cardinality(%(notas)s::text[]))::int] END,
+        creacion,
+        creacion
+    FROM (
+        SELECT g, fecha, fecha + random() * interval '1 day' AS creacion
+        FROM (
+            SELECT g, %(inicio)s::date + floor(random() * %(dias)s)::int AS fecha
+            FROM generate_series(%(desde)s, %(hasta)s) AS g
+        ) AS s
+    ) AS filas
+"""
+
+ALTAS_DESDE_ID = """
+    SELECT user_id, fecha, categoria, monto
+    FROM api_movimientofinanciero
+    WHERE id > %s
+"""
+
+
+def percentil(valores, p):
+    """
+    Percentil p (0-100) por el método del rango más cercano.
+    """
+    ordenados = sorted(valores)
+    indice = max(0, math.ceil(p / 100 * len(ordenados)) - 1)
+    return ordenados[indice]
+
+
+def crear_usuarios(cantidad, prefijo='bench'):
+    """
+    Crea (si faltan) los usuarios prefijo_0 .. prefijo_{cantidad-1}, todos con
+    la contraseña CONTRASEÑA, y los devuelve ordenados por username.
+    """
+    nombres = [f'{prefijo}_{i}' for i in range(cantidad)]
+    existentes = set(User.objects.filter(username__in=nombres).values_list('username', flat=True))
+    # Un solo hash para todos: PBKDF2 por usuario haría lenta la siembra
+    hash_contraseña = make_password(CONTRASEÑA)
+    User.objects.bulk_create(
+        [User(username=nombre, password=hash_contraseña) for nombre in nombres if nombre not in existentes],
+        batch_size=1000,
+    )
+    return list(User.objects.filter(username__in=nombres).order_by('username'))
+
+
+def limpiar(usuarios):
+    """
+    Borra los movimientos y acumulados de los usuarios.
+    """
+    with transaction.atomic():
+        MovimientoFinanciero.objects.filter(user__in=usuarios).delete()
+        ResumenDiario.objects.filter(user__in=usuarios).delete()
+        ResumenMensual.objects.filter(user__in=usuarios).delete()
+        cache_reportes.invalidar_al_confirmar(*[u.pk for u in usuarios])
+
+
+def sembrar(usuarios, movimientos, dias=730, semilla=42, lote=500_000,
+            monto_maximo=5000, proporcion_ingresos=0.3, progreso=None):
+    """
+    Inserta `movimientos` filas repartidas por igual entre `usuarios`, con
+    fechas uniformes en los últimos `dias` días (sin incluir hoy).
+
+    Cada lote es una transacción: inserta las filas y suma sus acumulados.
+    Con la misma semilla, usuarios y parámetros genera los mismos datos.
+    `progreso(insertadas, segundos)` se llama después de cada lote.
+    """
+    ids = [u.pk for u in usuarios]
+    semillas = random.Random(semilla)
+    inicio = date.today() - timedelta(days=dias)
+    comienzo = time.monotonic()
+    with connection.cursor() as cursor:
+        for desde in range(1, movimientos + 1, lote):
+            hasta = min(desde + lote - 1, movimientos)
+            with transaction.atomic():
+                cursor.execute('SELECT coalesce(max(id), 0) FROM api_movimientofinanciero')
+                ultimo_id = cursor.fetchone()[0]
+                cursor.execute('SELECT setseed(%s)', [semillas.uniform(-1, 1)])
+                cursor.execute(INSERCION, {
+                    'usuarios': ids,
+                    'cantidad_usuarios': len(ids),
+                    'conceptos': CONCEPTOS,
+                    'notas': NOTAS,
+                    'monto_maximo': monto_maximo,
+                    'proporcion_ingresos': proporcion_ingresos,
+                    'inicio': inicio,
+                    'dias': dias,
+                    'desde': desde,
+                    'hasta': hasta,
+                })
+                resumenes.registrar_alta_sql(ALTAS_DESDE_ID, [ultimo_id])
+                cache_reportes.invalidar_al_confirmar(*ids)
+            if progreso:
+                progreso(hasta, time.monotonic() - comienzo)
+        cursor.execute('ANALYZE api_movimientofinanciero, api_resumendiario, api_resumenmensual')
+
+
+def escenarios(peticiones, peticiones_auth, hoy=None):
+    """
+    Escenarios del benchmark: (nombre, método, ruta, datos(i), estado esperado, repeticiones).
+    `datos(i)` devuelve los parámetros o el cuerpo de la i-ésima petición.
+    """
+    hoy = hoy or date.today()
+    rango = {
+        'fecha_desde': (hoy - timedelta(days=90)).isoformat(),
+        'fecha_hasta': (hoy - timedelta(days=1)).isoformat(),
+    }
+    lista = []
+
+    # Listado: todas las combinaciones de categoría, rango de fechas y orden
+    for categoria, con_rango, ordenar_por, orden in product(
+        [None, 'ingreso', 'gasto'], [False, True], ORDENES, ['asc', 'desc']
+    ):
+        params = {'ordenar_por': ordenar_por, 'orden': orden}
+        if categoria:
+            params['categoria'] = categoria
+        if con_rango:
+            params.update(rango)
+        # El nombre no lleva fechas para poder comparar ejecuciones de días distintos
+        etiquetas = [f'categoria={categoria}'] if categoria else []
+        etiquetas += ['rango=90d'] if con_rango else []
+        etiquetas += [f'ordenar_por={ordenar_por}', f'orden={orden}']
+        nombre = 'listado ' + ' '.join(etiquetas)
+        lista.append((nombre, 'GET', '/api/movimientos/', lambda i, p=params: p, 200, peticiones))
+
+    lista += [
+        ('listado page_size=100', 'GET', '/api/movimientos/',
+         lambda i: {'page_size': 100}, 200, peticiones),
+        # Necesita al menos 1000 movimientos del usuario
+        ('listado pagina profunda', 'GET', '/api/movimientos/',
+         lambda i: {'page': 100}, 200, peticiones),
+        ('listado cursor', 'GET', '/api/movimientos/',
+         lambda i: {'paginacion': 'cursor', 'page_size': 50}, 200, peticiones),
+        ('crear', 'POST', '/api/movimientos/',
+         lambda i: {
+             'descripcion': f'Benchmark {i}',
+             'monto': f'{10 + i % 90}.50',
+             'categoria': 'ingreso' if i % 3 == 0 else 'gasto',
+             'fecha': (hoy - timedelta(days=1 + i % 30)).isoformat(),
+         }, 201, peticiones),
+        ('resumen', 'GET', '/api/movimientos/resumen/', lambda i: {}, 200, peticiones),
+        # Diez rangos distintos que no coinciden con meses completos
+        ('resumen rango', 'GET', '/api/movimientos/resumen/',
+         lambda i: {
+             'fecha_desde': (hoy - timedelta(days=200 + 7 * (i % 10))).isoformat(),
+             'fecha_hasta': (hoy - timedelta(days=3 + i % 10)).isoformat(),
+         }, 200, peticiones),
+        # Los últimos doce meses
+        ('reporte_mensual', 'GET', '/api/movimientos/reporte_mensual/',
+         lambda i: _mes_anterior(hoy, i % 12), 200, peticiones),
+        ('serie 24 meses', 'GET', '/api/movimientos/serie/',
+         lambda i: {'fecha_desde': (hoy - timedelta(days=700 + i % 10)).isoformat()}, 200, peticiones),
+        ('saldo rango', 'GET', '/api/movimientos/saldo/',
+         lambda i: {'fecha_desde': (hoy - timedelta(days=200 + 7 * (i % 10))).isoformat()}, 200, peticiones),
+        ('registro', 'POST', '/api/registro/',
+         lambda i: {'username': f'bench_registro_{i}', 'password': CONTRASEÑA}, 201, peticiones_auth),
+    ]
+    return lista
+
+
+def _mes_anterior(hoy, meses):
+    mes = hoy.month - 1 - meses
+    return {'año': hoy.year + mes // 12, 'mes': mes % 12 + 1}
+
+
+def _medir(cliente, metodo, ruta, datos):
+    with CaptureQueriesContext(connection) as consultas:
+        inicio = time.perf_counter()
+        if metodo == 'GET':
+            respuesta = cliente.get(ruta, datos)
+        else:
+            respuesta = cliente.post(ruta, datos, content_type='application/json')
+        duracion = time.perf_counter() - inicio
+    return duracion, len(consultas), respuesta.status_code
+
+
+def _resultado(ruta, metodo, mediciones, esperado):
+    latencias = [d * 1000 for d, _, _ in mediciones]
+    consultas = [c for _, c, _ in mediciones]
+    total = sum(d for d, _, _ in mediciones)
+    return {
+        'metodo': metodo,
+        'ruta': ruta,
+        'peticiones': len(mediciones),
+        'errores': sum(1 for _, _, estado in mediciones if estado != esperado),
+        'throughput': round(len(mediciones) / total, 1) if total else None,
+        'latencia_ms': {
+            'media': round(statistics.mean(latencias), 2),
+            'p50': round(percentil(latencias, 50), 2),
+            'p95': round(percentil(latencias, 95), 2),
+            'p99': round(percentil(latencias, 99), 2),
+        },
+        'consultas': {
+            'media': round(statistics.mean(consultas), 2),
+            'max': max(consultas),
+        },
+    }
+
+
+def ejecutar(usuario, peticiones=30, peticiones_auth=5, progreso=None):
+    """
+    Ejecuta todos los escenarios con el usuario dado (que debe tener la
+    contraseña CONTRASEÑA) y devuelve {nombre: métricas}.
+
+    Todo corre en una transacción que se revierte, así que los movimientos y
+    usuarios creados no quedan en la base de datos. La caché de reportes del
+    usuario se invalida al empezar para medir siempre desde el mismo estado.
+    """
+    token, _ = Token.objects.get_or_create(user=usuario)
+    cache_reportes.invalidar(usuario.pk)
+    cliente = Client(HTTP_AUTHORIZATION=f'Token {token.key}', raise_request_exception=False)
+    anonimo = Client(raise_request_exception=False)
+
+    resultados = {}
+    with transaction.atomic():
+        for nombre, metodo, ruta, datos, esperado, repeticiones in escenarios(peticiones, peticiones_auth):
+            cli = anonimo if ruta == '/api/registro/' else cliente
+            mediciones = [_medir(cli, metodo, ruta, datos(i)) for i in range(repeticiones)]
+            resultados[nombre] = _resultado(ruta, metodo, mediciones, esperado)
+            if progreso:
+                progreso(nombre, resultados[nombre])
+
+        login = {'username': usuario.username, 'password': CONTRASEÑA}
+        mediciones = [_medir(anonimo, 'POST', '/api/login/', login) for _ in range(peticiones_auth)]
+        resultados['login'] = _resultado('/api/login/', 'POST', mediciones, 200)
+        if progreso:
+            progreso('login', resultados['login'])
+
+        transaction.set_rollback(True)
+    # Lo creado dentro de la transacción ya no existe
+    cache_reportes.invalidar(usuario.pk)
+    return resultados
+
+
+def cargas_formatos(hoy=None):
+    """
+    Respuestas de formatos(): (nombre, ruta, parámetros).
+    """
+    hoy = hoy or date.today()
+    return [
+        ('listado 100 filas', '/api/movimientos/', {'page_size': 100}),
+        ('listado 100 filas fields movil', '/api/movimientos/',
+         {'page_size': 100, 'fields': 'id,descripcion,monto,categoria,fecha'}),
+        ('reporte_periodo 12 meses', '/api/movimientos/reporte_periodo/', {'año': hoy.year - 1}),
+        ('exportar ndjson 90 dias', '/api/movimientos/exportar/',
+         {'formato': 'ndjson', 'fecha_desde': (hoy - timedelta(days=90)).isoformat()}),
+    ]
+
+
+def _mediana_ms(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return resultado, round(statistics.median(tiempos) * 1000, 3)
+
+
+def formatos(usuario, repeticiones=20, hoy=None):
+    """
+    {respuesta: {'formato+compresión': {'bytes', 'ms'}}} para las respuestas
+    de cargas_formatos(), con los datos que devuelve la API al usuario. `ms`
+    es la mediana del render más la compresión; en exportar (streaming
+    NDJSON, sin render) es solo la compresión fragmento a fragmento.
+    """
+    token, _ = Token.objects.get_or_create(user=usuario)
+    cliente = Client(HTTP_AUTHORIZATION=f'Token {token.key}')
+    renderers = {'json': ORJSONRenderer(), 'msgpack': MessagePackRenderer()}
+    codificaciones = [None, *compresion.CODIFICACIONES]
+
+    resultados = {}
+    for nombre, ruta, params in cargas_formatos(hoy):
+        respuesta = cliente.get(ruta, params, HTTP_ACCEPT='application/json')
+        medidas = resultados[nombre] = {}
+        if respuesta.streaming:
+            fragmentos = list(respuesta.streaming_content)
+            for codificacion in codificaciones:
+                if codificacion is None:
+                    cuerpo, ms = b''.join(fragmentos), 0.0
+                else:
+                    cuerpo, ms = _mediana_ms(
+                        lambda: b''.join(compresion.comprimir_secuencia(fragmentos, codificacion)),
+                        repeticiones,
+                    )
+                medidas[f"ndjson+{codificacion or 'identity'}"] = {'bytes': len(cuerpo), 'ms': ms}
+            continue
+
+        datos = respuesta.json()
+        for formato, renderer in renderers.items():
+            for codificacion in codificaciones:
+                def codificar():
+                    cuerpo = renderer.render(datos)
+                    return compresion.comprimir(cuerpo, codificacion) if codificacion else cuerpo
+                cuerpo, ms = _mediana_ms(codificar, repeticiones)
+                medidas[f"{formato}+{codificacion or 'identity'}"] = {'bytes': len(cuerpo), 'ms': ms}
+    return resultados
+
+
+def comparar(anterior, actual):
+    """
+    Filas (nombre, p50 antes, p50 ahora, p99 antes, p99 ahora, consultas antes,
+    consultas ahora) para los endpoints presentes en ambos resultados.
+    """
+    filas = []
+    for nombre, ahora in actual['endpoints'].items():
+        antes = anterior['endpoints'].get(nombre)
+        if antes is None:
+            continue
+        filas.append((
+            nombre,
+            antes['latencia_ms']['p50'], ahora['latencia_ms']['p50'],
+            antes['latencia_ms']['p99'], ahora['latencia_ms']['p99'],
+            antes['consultas']['media'], ahora['consultas']['media'],
+        ))
+    return filas
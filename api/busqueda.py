@@ -0,0 +1,57 @@
+"""
+Búsqueda de movimientos por descripción y notas.
+
+- Texto completo: la columna generada `busqueda` (tsvector en español, la
+  descripción con más peso que las notas) con un índice GIN. Entiende
+  plurales y conjugaciones y la sintaxis de buscadores web ("frase exacta",
+  -excluir, OR).
+- Trigramas: si pg_trgm está instalado (ver la migración 0004), también
+  coinciden las descripciones parecidas, para tolerar errores de tipeo.
+
+El listado de la API (?search=) y la búsqueda del admin usan los mismos
+índices, en lugar de ILIKE '%...%' que recorre la tabla entera.
+"""
+from functools import cache
+from asgiref.sync import sync_to_async
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db import connection
+from django.db.models import F, Q
+
+CONFIGURACION = 'spanish'
+INDICE_TRIGRAMAS = 'movimiento_descripcion_trgm_idx'
+
+
+@cache
+def trigramas_disponibles():
+    """
+    True si existe el índice de trigramas. Se consulta una vez por proceso.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1 FROM pg_indexes WHERE indexname = %s', [INDICE_TRIGRAMAS])
+        return cursor.fetchone() is not None
+
+
+async def atrigramas_disponibles():
+    """
+    trigramas_disponibles() para las vistas async: la primera consulta del
+    proceso corre en un hilo, porque buscar() no puede consultar la base de
+    datos desde el event loop.
+    """
+    if trigramas_disponibles.cache_info().currsize:
+        return trigramas_disponibles()
+    return await sync_to_async(trigramas_disponibles)()
+
+
+def buscar(queryset, texto):
+    """
+    Filtra los movimientos que coinciden con `texto` y los anota con
+    `relevancia` (ts_rank, más la similitud de trigramas si está disponible)
+    para ordenar por ella.
+    """
+    consulta = SearchQuery(texto, config=CONFIGURACION, search_type='websearch')
+    coincide = Q(busqueda=consulta)
+    relevancia = SearchRank(F('busqueda'), consulta)
+    if trigramas_disponibles():
+        coincide |= Q(descripcion__trigram_similar=texto)
+        relevancia = relevancia + TrigramSimilarity('descripcion', texto)
+    return queryset.filter(coincide).annotate(relevancia=relevancia)
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import uuid
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+PREFIJO = 'reportes'
+CLAVE_ACIERTOS = f'{PREFIJO}:aciertos'
+CLAVE_FALLOS = f'{PREFIJO}:fallos'
+
+
+def _clave_version(user_id):
+    return f'{PREFIJO}:version:{user_id}'
+
+
+def _clave_modificado(user_id):
+    return f'{PREFIJO}:modificado:{user_id}'
+
+
+def version(user_id):
+    """
+    Versión actual de los reportes del usuario. Cambia en cada escritura de
+    sus movimientos, así que las entradas anteriores dejan de leerse.
+    """
+    clave = _clave_version(user_id)
+    valor = cache.get(clave)
+    if valor is None:
+        # Si la versión se perdió (desalojo, reinicio) se crea una nueva y
+        # nunca se reutiliza una anterior
+        cache.add(clave, uuid.uuid4().hex, timeout=None)
+        valor = cache.get(clave)
+    return valor
+
+
+def ultima_modificacion(user_id):
+    """
+    Momento de la última escritura confirmada sobre los movimientos del
+    usuario, incluidas las bajas (que no dejan fecha_actualizacion).
+    Si la caché no lo tiene se toma el momento actual, que nunca produce un
+    304 incorrecto.
+    """
+    clave = _clave_modificado(user_id)
+    valor = cache.get(clave)
+    if valor is None:
+        cache.add(clave, timezone.now(), timeout=None)
+        valor = cache.get(clave)
+    return valor
+
+
+def invalidar(user_id):
+    # Un valor nuevo en lugar de incr(): dos escrituras concurrentes nunca
+    # terminan con la misma versión
+    cache.set_many({
+        _clave_version(user_id): uuid.uuid4().hex,
+        _clave_modificado(user_id): timezone.now(),
+    }, timeout=None)
+
+
+def invalidar_al_confirmar(*user_ids):
+    """
+    Invalida los reportes de los usuarios cuando la transacción actual se
+    confirme. Antes del commit otro proceso podría volver a guardar datos viejos
+    con la versión nueva.
+    """
+    for user_id in set(user_ids):
+        transaction.on_commit(lambda user_id=user_id: invalidar(user_id))
+
+
+def _contar(clave):
+    try:
+        cache.incr(clave)
+    except ValueError:
+        if not cache.add(clave, 1, timeout=None):
+            cache.incr(clave)
+
+
+def _clave(user_id, accion, params):
+    normalizados = json.dumps(params, sort_keys=True, default=str)
+    huella = hashlib.sha1(normalizados.encode()).hexdigest()
+    return f'{PREFIJO}:{user_id}:{version(user_id)}:{accion}:{huella}'
+
+
+def obtener(user_id, accion, params, calcular):
+    """
+    Devuelve (datos, acierto). Busca el reporte en caché por usuario, acción
+    y parámetros normalizados; si no está lo calcula con `calcular()` y lo guarda.
+    """
+    clave = _clave(user_id, accion, params)
+
+    datos = cache.get(clave)
+    if datos is not None:
+        _contar(CLAVE_ACIERTOS)
+        return datos, True
+
+    _contar(CLAVE_FALLOS)
+    datos = calcular()
+    cache.set(clave, datos, timeout=settings.REPORTES_CACHE_TIMEOUT)
+    return datos, False
+
+
+async def aobtener(user_id, accion, params, calcular):
+    """
+    Versión async de obtener: `calcular` es una corrutina y los accesos a la
+    caché se hacen en un hilo para no bloquear el event loop.
+    """
+    clave = await sync_to_async(_clave)(user_id, accion, params)
+
+    datos = await cache.aget(clave)
+    if datos is not None:
+        await sync_to_async(_contar)(CLAVE_ACIERTOS)
+        return datos, True
+
+    await sync_to_async(_contar)(CLAVE_FALLOS)
+    datos = await calcular()
+    await cache.aset(clave, datos, timeout=settings.REPORTES_CACHE_TIMEOUT)
+    return datos, False
+
+
+def estadisticas():
+    aciertos = cache.get(CLAVE_ACIERTOS, 0)
+    fallos = cache.get(CLAVE_FALLOS, 0)
+    total = aciertos + fallos
+    return {
+        'aciertos': aciertos,
+        'fallos': fallos,
+        'tasa_aciertos': round(aciertos / total, 4) if total else None,
+    }
@@ -0,0 +1,134 @@
+"""
+Compresión de las respuestas de la API con zstd o gzip, según
+Accept-Encoding (zstd si el cliente acepta los dos).
+
+Se comprimen las respuestas JSON, MessagePack, NDJSON y CSV de al menos
+COMPRESION_MIN_BYTES; las más chicas (login, errores, 304) no ganan nada.
+Las respuestas en streaming (exportar) se comprimen fragmento a fragmento:
+cada fragmento se envía apenas está comprimido y la memoria no crece con
+el tamaño de la exportación.
+"""
+import gzip
+import zlib
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+import zstandard
+
+NIVEL_GZIP = 6
+NIVEL_ZSTD = 3
+
+TIPOS = {'application/json', 'application/msgpack', 'application/x-ndjson', 'text/csv'}
+
+
+def _zstd():
+    return zstandard.ZstdCompressor(level=NIVEL_ZSTD)
+
+
+def _flujo_gzip():
+    compresor = zlib.compressobj(NIVEL_GZIP, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return (
+        lambda datos: compresor.compress(datos) + compresor.flush(zlib.Z_SYNC_FLUSH),
+        compresor.flush,
+    )
+
+
+def _flujo_zstd():
+    compresor = _zstd().compressobj()
+    return (
+        lambda datos: compresor.compress(datos) + compresor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK),
+        compresor.flush,
+    )
+
+
+# Codificación -> (comprimir un cuerpo, crear un compresor incremental)
+CODIFICACIONES = {
+    'zstd': (lambda datos: _zstd().compress(datos), _flujo_zstd),
+    'gzip': (lambda datos: gzip.compress(datos, NIVEL_GZIP, mtime=0), _flujo_gzip),
+}
+
+
+def elegir_codificacion(accept_encoding):
+    """
+    Codificación de CODIFICACIONES que acepta el cliente, o None. Se respeta
+    q=0 y '*'; entre las aceptadas se prefiere el orden de CODIFICACIONES.
+    """
+    calidades = {}
+    for parte in accept_encoding.split(','):
+        nombre, _, parametros = parte.partition(';')
+        nombre = nombre.strip().lower()
+        if not nombre:
+            continue
+        calidad = 1.0
+        parametro = parametros.strip().lower()
+        if parametro.startswith('q='):
+            try:
+                calidad = float(parametro[2:])
+            except ValueError:
+                calidad = 0.0
+        calidades[nombre] = calidad
+    for codificacion in CODIFICACIONES:
+        if calidades.get(codificacion, calidades.get('*', 0)) > 0:
+            return codificacion
+    return None
+
+
+def comprimir(datos, codificacion):
+    return CODIFICACIONES[codificacion][0](datos)
+
+
+def comprimir_secuencia(fragmentos, codificacion):
+    comprimir_fragmento, terminar = CODIFICACIONES[codificacion][1]()
+    for fragmento in fragmentos:
+        if fragmento:
+            yield comprimir_fragmento(fragmento)
+    yield terminar()
+
+
+async def acomprimir_secuencia(fragmentos, codificacion):
+    comprimir_fragmento, terminar = CODIFICACIONES[codificacion][1]()
+    async for fragmento in fragmentos:
+        if fragmento:
+            yield comprimir_fragmento(fragmento)
+    yield terminar()
+
+
+class CompresionMiddleware(MiddlewareMixin):
+    """
+    Comprime la respuesta con la codificación que elige elegir_codificacion().
+    Como GZipMiddleware de Django, agrega Vary: Accept-Encoding y debilita
+    la ETag (la representación comprimida no es idéntica byte a byte).
+    """
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding'):
+            return response
+        tipo = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if tipo not in TIPOS:
+            return response
+        if not response.streaming and len(response.content) < settings.COMPRESION_MIN_BYTES:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        codificacion = elegir_codificacion(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if codificacion is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = acomprimir_secuencia(response.streaming_content, codificacion)
+            else:
+                response.streaming_content = comprimir_secuencia(response.streaming_content, codificacion)
+            del response.headers['Content-Length']
+        else:
+            comprimido = comprimir(response.content, codificacion)
+            if len(comprimido) >= len(response.content):
+                return response
+            response.content = comprimido
+            response.headers['Content-Length'] = str(len(comprimido))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = codificacion
+        return response
@@ -0,0 +1,69 @@
+import hashlib
+from functools import wraps
+from asgiref.sync import sync_to_async
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_headers
+from . import cache_reportes
+
+
+def _leer_validadores(user_id):
+    return cache_reportes.version(user_id), cache_reportes.ultima_modificacion(user_id)
+
+
+def _validadores(request):
+    """
+    (versión, última modificación) de los datos del usuario, leídas una sola
+    vez por petición. Las vistas async las traen ya precargadas.
+    """
+    if not hasattr(request, 'validadores'):
+        request.validadores = _leer_validadores(request.user.pk)
+    return request.validadores
+
+
+def _etag(request, *args, **kwargs):
+    """
+    ETag de la respuesta: versión de los datos del usuario (cambia con cada
+    alta, edición o baja), ruta con parámetros y formato negociado.
+    """
+    version, _ = _validadores(request)
+    formato = getattr(request, 'accepted_media_type', '')
+    contenido = f'{version}|{request.get_full_path()}|{formato}'
+    return hashlib.sha1(contenido.encode()).hexdigest()
+
+
+def _ultima_modificacion(request, *args, **kwargs):
+    _, modificado = _validadores(request)
+    return modificado
+
+
+def condicional_vista(vista):
+    """
+    GET condicional para una vista de función, síncrona o async: responde 304
+    con If-None-Match / If-Modified-Since antes de consultar los movimientos.
+    request.user ya debe estar autenticado. La respuesta depende del formato
+    negociado (JSON o MessagePack), así que varía según Accept.
+    """
+    return vary_on_headers('Accept')(cache_control(private=True, no_cache=True)(
+        condition(etag_func=_etag, last_modified_func=_ultima_modificacion)(vista)
+    ))
+
+
+def condicional_async(vista):
+    """
+    condicional_vista para vistas async: los validadores se leen de la caché
+    en un hilo para no bloquear el event loop.
+    """
+    decorada = condicional_vista(vista)
+
+    @wraps(vista)
+    async def inner(request, *args, **kwargs):
+        request.validadores = await sync_to_async(_leer_validadores)(request.user.pk)
+        return await decorada(request, *args, **kwargs)
+    return inner
+
+
+# Lo mismo para acciones de un ViewSet. Se aplica después de la autenticación
+# de DRF, así que request.user ya existe.
+condicional = method_decorator(condicional_vista)
@@ -0,0 +1,178 @@
+"""
+Login y registro con el hash de contraseñas fuera del hilo de la petición.
+
+PBKDF2 ocupa un núcleo durante cientos de milisegundos por contraseña. Los
+hash se calculan en un pool de HASH_HILOS hilos por proceso, con menor
+prioridad (HASH_NICE) que los hilos que atienden peticiones: una ráfaga de
+logins usa como mucho esos hilos y el CPU que sobra, mientras el resto de
+la API sigue respondiendo (hashlib libera el GIL mientras calcula). Como
+mucho HASH_EN_ESPERA peticiones más esperan turno; las siguientes reciben
+Saturado (503) en lugar de ocupar todos los hilos del worker. El costo se define
+con PASSWORD_ITERACIONES.
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    PBKDF2PasswordHasher, check_password, get_hasher, identify_hasher, make_password,
+)
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from rest_framework import exceptions
+from rest_framework.authtoken.models import Token
+
+_pool = None
+_cupos = None
+_lock = threading.Lock()
+
+
+class Saturado(exceptions.APIException):
+    """
+    Todos los cupos del pool de hash están ocupados.
+    """
+    status_code = 503
+    default_detail = 'Demasiados inicios de sesión simultáneos, reintenta en unos segundos.'
+    default_code = 'saturado'
+    # Cabecera Retry-After
+    wait = 1
+
+
+class PBKDF2Configurable(PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 de Django con PASSWORD_ITERACIONES iteraciones. Los hash
+    guardados con otro costo siguen siendo válidos y se recalculan en el
+    siguiente login.
+    """
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_ITERACIONES
+
+
+def _bajar_prioridad():
+    # En Linux la prioridad (nice) es por hilo
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), settings.HASH_NICE)
+    except (AttributeError, OSError):
+        pass
+
+
+def _ejecutor():
+    global _pool, _cupos
+    with _lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=settings.HASH_HILOS, thread_name_prefix='hash',
+                initializer=_bajar_prioridad,
+            )
+            _cupos = threading.BoundedSemaphore(settings.HASH_HILOS + settings.HASH_EN_ESPERA)
+        return _pool
+
+
+def _reiniciar():
+    # Los hilos del pool no sobreviven al fork: cada worker crea el suyo
+    global _pool, _cupos, _lock
+    _pool, _cupos, _lock = None, None, threading.Lock()
+
+
+def _enviar(funcion, *args):
+    """
+    Future de funcion(*args) en el pool. Lanza Saturado si no hay cupo.
+    """
+    pool = _ejecutor()
+    if not _cupos.acquire(blocking=False):
+        raise Saturado()
+    future = pool.submit(funcion, *args)
+    future.add_done_callback(lambda _: _cupos.release())
+    return future
+
+
+os.register_at_fork(after_in_child=_reiniciar)
+
+
+def _desactualizado(encoded):
+    preferido = get_hasher()
+    try:
+        actual = identify_hasher(encoded)
+    except ValueError:
+        return False
+    return actual.algorithm != preferido.algorithm or preferido.must_update(encoded)
+
+
+def _verificar(password, encoded):
+    """
+    (válida, hash nuevo si el guardado usa otro algoritmo o costo). Sin
+    usuario (`encoded` None) se calcula un hash igual, para no revelar por
+    el tiempo de respuesta si el usuario existe.
+    """
+    if encoded is None:
+        make_password(password)
+        return False, None
+    if not check_password(password, encoded):
+        return False, None
+    return True, make_password(password) if _desactualizado(encoded) else None
+
+
+def _resultado(user, valida, nuevo_hash):
+    if not valida or not user.is_active:
+        return None
+    if nuevo_hash:
+        user.password = nuevo_hash
+        user.save(update_fields=['password'])
+    return user
+
+
+def hashear(password):
+    return _enviar(make_password, password).result()
+
+
+async def ahashear(password):
+    return await asyncio.wrap_future(_enviar(make_password, password))
+
+
+def autenticar(username, password):
+    """
+    Usuario activo con esas credenciales, o None. Lanza Saturado.
+    """
+    user = User.objects.filter(username=username).first()
+    encoded = user.password if user else None
+    valida, nuevo_hash = _enviar(_verificar, password, encoded).result()
+    return _resultado(user, valida, nuevo_hash)
+
+
+async def aautenticar(username, password):
+    user = await User.objects.filter(username=username).afirst()
+    encoded = user.password if user else None
+    valida, nuevo_hash = await asyncio.wrap_future(_enviar(_verificar, password, encoded))
+    return await sync_to_async(_resultado)(user, valida, nuevo_hash)
+
+
+def _crear(username, email, encoded):
+    user = User(
+        username=User.normalize_username(username),
+        email=User.objects.normalize_email(email),
+        password=encoded,
+    )
+    try:
+        with transaction.atomic():
+            user.save(force_insert=True)
+            return Token.objects.create(user=user).key
+    except IntegrityError:
+        return None
+
+
+def registrar(username, password, email=''):
+    """
+    Crea el usuario y su token en una transacción y devuelve la clave del
+    token, o None si el username ya existe. Decide la restricción única de
+    auth_user, así que dos registros simultáneos no crean el mismo usuario.
+    Lanza Saturado.
+    """
+    return _crear(username, email, hashear(password))
+
+
+async def aregistrar(username, password, email=''):
+    return await sync_to_async(_crear)(username, email, await ahashear(password))
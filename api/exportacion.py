@@ -0,0 +1,64 @@
+import csv
+import json
+from django.utils import timezone
+from .serializers import CAMPOS, COLUMNAS, representar_fila
+
+# Filas leídas por viaje al servidor y filas por fragmento de la respuesta
+TAMAÑO_LOTE = 2000
+FILAS_POR_FRAGMENTO = 500
+
+
+class _Eco:
+    """
+    Objeto tipo archivo que devuelve lo escrito en lugar de guardarlo,
+    para usar csv.writer sin acumular la salida en memoria.
+    """
+    def write(self, valor):
+        return valor
+
+
+def filas(queryset):
+    """
+    Recorre el queryset con un cursor del lado del servidor y devuelve cada
+    movimiento como dict con la misma forma que MovimientoFinancieroSerializer.
+    """
+    zona = timezone.get_current_timezone()
+    for fila in queryset.values(*COLUMNAS).iterator(chunk_size=TAMAÑO_LOTE):
+        yield representar_fila(fila, zona)
+
+
+def _agrupar(lineas):
+    """
+    Junta las líneas en fragmentos para no enviar un chunk por fila.
+    """
+    fragmento = []
+    for linea in lineas:
+        fragmento.append(linea)
+        if len(fragmento) >= FILAS_POR_FRAGMENTO:
+            yield ''.join(fragmento)
+            fragmento = []
+    if fragmento:
+        yield ''.join(fragmento)
+
+
+def exportar_csv(queryset):
+    escritor = csv.writer(_Eco())
+    # La cabecera sale antes de ejecutar la consulta
+    yield escritor.writerow(CAMPOS)
+    yield from _agrupar(
+        escritor.writerow([fila[campo] for campo in CAMPOS])
+        for fila in filas(queryset)
+    )
+
+
+def exportar_ndjson(queryset):
+    yield from _agrupar(
+        json.dumps(fila, ensure_ascii=False) + '\n'
+        for fila in filas(queryset)
+    )
+
+
+FORMATOS = {
+    'csv': (exportar_csv, 'text/csv; charset=utf-8'),
+    'ndjson': (exportar_ndjson, 'application/x-ndjson; charset=utf-8'),
+}
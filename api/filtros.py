@@ -0,0 +1,259 @@
+from datetime import datetime, date, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from django.conf import settings
+from django.utils import timezone
+from .busqueda import buscar
+from .models import MovimientoFinanciero
+from .pagination import MovimientoPagination
+from .serializers import CAMPOS, columnas_para
+
+ORDENES = ['fecha', 'monto', 'fecha_creacion']
+# Columnas por las que puede ir ordenado el listado (ORDENES y el desempate por id)
+COLUMNAS_DE_ORDEN = ORDENES + ['id']
+
+# Agrupaciones de /serie/ -> unidad de date_trunc
+AGRUPACIONES = {'dia': 'day', 'semana': 'week', 'mes': 'month', 'año': 'year'}
+# Periodos que devuelve /serie/ si no se indica fecha_desde
+PERIODOS_POR_DEFECTO = {'dia': 31, 'semana': 12, 'mes': 12, 'año': 5}
+# Movimientos de mayor monto por mes en /reporte_periodo/
+TOP_POR_DEFECTO = 5
+TOP_MAXIMO = 50
+
+
+def parse_fecha(valor):
+    """
+    Convierte 'YYYY-MM-DD' en date; devuelve None si está vacío o es inválido.
+    """
+    if not valor:
+        return None
+    try:
+        return datetime.strptime(valor, '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+
+def filtrar_movimientos(user, query_params):
+    """
+    Movimientos del usuario filtrados y ordenados según los parámetros del listado:
+    - categoria: 'ingreso' o 'gasto'
+    - fecha_desde: fecha inicial (YYYY-MM-DD)
+    - fecha_hasta: fecha final (YYYY-MM-DD)
+    - search: texto a buscar en descripción y notas (ver api.busqueda)
+    - ordenar_por: 'fecha', 'monto', 'fecha_creacion'
+    - orden: 'asc' o 'desc'
+
+    Con search y sin ordenar_por los resultados van por relevancia, salvo en
+    la paginación por cursor, que necesita ordenar por una columna.
+    """
+    # busqueda solo sirve para filtrar en la base de datos
+    queryset = MovimientoFinanciero.objects.filter(user=user).defer('busqueda')
+
+    # Filtros
+    categoria = query_params.get('categoria', None)
+    if categoria:
+        queryset = queryset.filter(categoria=categoria)
+
+    fecha_desde = parse_fecha(query_params.get('fecha_desde', None))
+    if fecha_desde:
+        queryset = queryset.filter(fecha__gte=fecha_desde)
+
+    fecha_hasta = parse_fecha(query_params.get('fecha_hasta', None))
+    if fecha_hasta:
+        queryset = queryset.filter(fecha__lte=fecha_hasta)
+
+    texto = query_params.get('search', '').strip()
+    if texto:
+        queryset = buscar(queryset, texto)
+        modo_cursor = (
+            MovimientoPagination.cursor_query_param in query_params
+            or query_params.get(MovimientoPagination.modo_query_param) == 'cursor'
+        )
+        if 'ordenar_por' not in query_params and not modo_cursor:
+            return queryset.order_by('-relevancia', '-fecha', '-id')
+
+    # Ordenamiento
+    ordenar_por = query_params.get('ordenar_por', 'fecha')
+    orden = query_params.get('orden', 'desc')
+
+    # El id desempata para que el orden sea estable entre páginas
+    if ordenar_por in ORDENES:
+        if orden == 'asc':
+            queryset = queryset.order_by(ordenar_por, 'id')
+        else:
+            queryset = queryset.order_by(f'-{ordenar_por}', '-id')
+
+    return queryset
+
+
+def parametros_campos(query_params):
+    """
+    Campos de la salida de movimientos pedidos con fields= (solo esos) o
+    exclude= (todos menos esos), separados por comas y en el orden de
+    CAMPOS. None si no se indica ninguno de los dos. Lanza ValueError si
+    los parámetros no son válidos.
+    """
+    fields = query_params.get('fields')
+    exclude = query_params.get('exclude')
+    if fields is None and exclude is None:
+        return None
+    if fields is not None and exclude is not None:
+        raise ValueError('Usa fields o exclude, no los dos')
+
+    nombres = {nombre.strip() for nombre in (fields or exclude or '').split(',') if nombre.strip()}
+    desconocidos = nombres - set(CAMPOS)
+    if desconocidos:
+        raise ValueError(
+            f"Campos desconocidos: {', '.join(sorted(desconocidos))}. "
+            f"Disponibles: {', '.join(CAMPOS)}"
+        )
+    if fields is not None:
+        campos = [campo for campo in CAMPOS if campo in nombres]
+    else:
+        campos = [campo for campo in CAMPOS if campo not in nombres]
+    if not campos:
+        raise ValueError('La respuesta debe tener al menos un campo')
+    return campos
+
+
+def columnas_listado(queryset, campos):
+    """
+    Columnas de .values() para listar `campos`: las de la salida más las del
+    orden del queryset, que la paginación por cursor lee de cada fila.
+    """
+    columnas = columnas_para(campos)
+    orden = [criterio.lstrip('-') for criterio in queryset.query.order_by]
+    return columnas + [
+        columna for columna in orden
+        if columna in COLUMNAS_DE_ORDEN and columna not in columnas
+    ]
+
+
+def inicio_periodo(fecha, agrupar_por):
+    """
+    Primer día del periodo que contiene `fecha`, como date_trunc. Las semanas
+    empiezan el lunes.
+    """
+    if agrupar_por == 'semana':
+        return fecha - timedelta(days=fecha.weekday())
+    if agrupar_por == 'mes':
+        return fecha.replace(day=1)
+    if agrupar_por == 'año':
+        return fecha.replace(month=1, day=1)
+    return fecha
+
+
+def contar_periodos(fecha_desde, fecha_hasta, agrupar_por):
+    """
+    Cantidad de periodos entre los que contienen fecha_desde y fecha_hasta.
+    """
+    desde = inicio_periodo(fecha_desde, agrupar_por)
+    hasta = inicio_periodo(fecha_hasta, agrupar_por)
+    if agrupar_por == 'mes':
+        return (hasta.year - desde.year) * 12 + hasta.month - desde.month + 1
+    if agrupar_por == 'año':
+        return hasta.year - desde.year + 1
+    dias = 7 if agrupar_por == 'semana' else 1
+    return (hasta - desde).days // dias + 1
+
+
+def _retroceder(inicio, agrupar_por, periodos):
+    if agrupar_por == 'mes':
+        mes = inicio.year * 12 + inicio.month - 1 - periodos
+        return date(mes // 12, mes % 12 + 1, 1)
+    if agrupar_por == 'año':
+        return inicio.replace(year=inicio.year - periodos)
+    dias = 7 if agrupar_por == 'semana' else 1
+    return inicio - timedelta(days=dias * periodos)
+
+
+def parametros_serie(query_params):
+    """
+    Devuelve (agrupar_por, fecha_desde, fecha_hasta, zona) para /serie/:
+    - agrupar_por: 'dia', 'semana', 'mes' (por defecto) o 'año'
+    - zona: zona horaria IANA; por defecto la activa (TIME_ZONE). Define qué
+      día es hoy, el fin del rango por defecto.
+    - fecha_hasta: por defecto hoy en esa zona
+    - fecha_desde: por defecto PERIODOS_POR_DEFECTO periodos hasta fecha_hasta
+    Lanza ValueError con el motivo si algún parámetro es inválido.
+    """
+    agrupar_por = query_params.get('agrupar_por', 'mes')
+    if agrupar_por not in AGRUPACIONES:
+        raise ValueError('agrupar_por debe ser dia, semana, mes o año')
+
+    nombre_zona = query_params.get('zona')
+    try:
+        zona = ZoneInfo(nombre_zona) if nombre_zona else timezone.get_current_timezone()
+    except (ZoneInfoNotFoundError, ValueError, OSError):
+        # OSError: nombres de directorio ('America') o demasiado largos
+        raise ValueError(f'Zona horaria desconocida: {nombre_zona}')
+
+    desde = parse_fecha(query_params.get('fecha_desde'))
+    hasta = parse_fecha(query_params.get('fecha_hasta'))
+    if (desde is None and query_params.get('fecha_desde')) or (hasta is None and query_params.get('fecha_hasta')):
+        raise ValueError('Las fechas deben tener el formato YYYY-MM-DD')
+    hasta = hasta or timezone.localdate(timezone=zona)
+    desde = desde or _retroceder(
+        inicio_periodo(hasta, agrupar_por), agrupar_por, PERIODOS_POR_DEFECTO[agrupar_por] - 1
+    )
+    if desde > hasta:
+        raise ValueError('fecha_desde no puede ser posterior a fecha_hasta')
+    if contar_periodos(desde, hasta, agrupar_por) > settings.MOVIMIENTOS_MAX_PERIODOS_SERIE:
+        raise ValueError(
+            f'Máximo {settings.MOVIMIENTOS_MAX_PERIODOS_SERIE} periodos por petición; '
+            f'acorta el rango o agrupa por un periodo mayor'
+        )
+    return agrupar_por, desde, hasta, zona
+
+
+def parametros_reporte_mensual(query_params):
+    """
+    Devuelve (año, mes) como enteros, por defecto el mes actual.
+    Lanza ValueError si no son números.
+    """
+    año = query_params.get('año', date.today().year)
+    mes = query_params.get('mes', date.today().month)
+    return int(año), int(mes)
+
+
+def _parse_mes(valor, nombre):
+    try:
+        return datetime.strptime(valor, '%Y-%m').date()
+    except ValueError:
+        raise ValueError(f'{nombre} debe tener el formato YYYY-MM')
+
+
+def parametros_reporte_periodo(query_params):
+    """
+    Devuelve (desde, hasta, top) para /reporte_periodo/, con desde y hasta
+    como primer día de su mes (ambos meses incluidos):
+    - año: los 12 meses del año (por defecto el actual)
+    - mes_desde / mes_hasta (YYYY-MM): un rango de meses cualquiera, en lugar de año
+    - top: movimientos de mayor monto por mes (TOP_POR_DEFECTO, hasta TOP_MAXIMO)
+    Lanza ValueError con el motivo si algún parámetro es inválido.
+    """
+    mes_desde = query_params.get('mes_desde')
+    mes_hasta = query_params.get('mes_hasta')
+    if mes_desde or mes_hasta:
+        if not (mes_desde and mes_hasta):
+            raise ValueError('mes_desde y mes_hasta van juntos')
+        desde = _parse_mes(mes_desde, 'mes_desde')
+        hasta = _parse_mes(mes_hasta, 'mes_hasta')
+    else:
+        try:
+            año = int(query_params.get('año', date.today().year))
+            desde, hasta = date(año, 1, 1), date(año, 12, 1)
+        except ValueError:
+            raise ValueError('El año debe ser un número válido')
+    if desde > hasta:
+        raise ValueError('mes_desde no puede ser posterior a mes_hasta')
+    meses = contar_periodos(desde, hasta, 'mes')
+    if meses > settings.MOVIMIENTOS_MAX_MESES_REPORTE:
+        raise ValueError(f'Máximo {settings.MOVIMIENTOS_MAX_MESES_REPORTE} meses por petición')
+
+    try:
+        top = int(query_params.get('top', TOP_POR_DEFECTO))
+    except ValueError:
+        raise ValueError('top debe ser un número')
+    if not 0 <= top <= TOP_MAXIMO:
+        raise ValueError(f'top debe estar entre 0 y {TOP_MAXIMO}')
+    return desde, hasta, top
@@ -0,0 +1,175 @@
+import csv
+import re
+from django.db import connection, transaction
+from .exportacion import CAMPOS
+from . import resumenes, cache_reportes
+
+# Tabla temporal donde COPY vuelca el CSV tal cual, todo como texto
+STAGING = 'importacion_movimientos'
+
+# Columnas obligatorias; el resto de CAMPOS (id, categoria_display,
+# fecha_creacion...) se acepta para poder reimportar una exportación, pero se ignora
+OBLIGATORIAS = ['descripcion', 'monto', 'categoria', 'fecha']
+
+# Mismas reglas que MovimientoFinanciero y MovimientoFinancieroSerializer.
+# CASE evalúa en orden, así que los casts solo se hacen sobre texto ya validado.
+VALIDACION = f"""
+UPDATE {STAGING} SET motivo = CASE
+    WHEN descripcion IS NULL OR btrim(descripcion) = '' THEN 'La descripción es obligatoria'
+    WHEN char_length(btrim(descripcion)) > 200 THEN 'La descripción supera 200 caracteres'
+    WHEN monto IS NULL OR NOT pg_input_is_valid(btrim(monto), 'numeric(10,2)')
+        OR btrim(monto)::numeric = 'NaN' THEN 'Monto inválido'
+    WHEN btrim(monto)::numeric <> round(btrim(monto)::numeric, 2) THEN 'El monto admite 2 decimales'
+    WHEN btrim(monto)::numeric < 0.01 THEN 'El monto debe ser mayor a 0'
+    WHEN categoria IS NULL OR categoria NOT IN ('ingreso', 'gasto') THEN 'Categoría inválida'
+    WHEN fecha IS NULL OR fecha !~ '^\\d{{4}}-\\d{{2}}-\\d{{2}}$'
+        OR NOT pg_input_is_valid(fecha, 'date') THEN 'Fecha inválida'
+    WHEN fecha::date > current_date THEN 'La fecha no puede ser futura'
+END
+"""
+
+VALIDAS = f"""
+SELECT %s::bigint, fecha::date, categoria, btrim(monto)::numeric(10,2)
+FROM {STAGING} WHERE motivo IS NULL
+"""
+
+INSERCION = f"""
+INSERT INTO api_movimientofinanciero
+    (user_id, descripcion, monto, categoria, fecha, notas, fecha_creacion, fecha_actualizacion)
+SELECT %s, btrim(descripcion), btrim(monto)::numeric(10,2), categoria, fecha::date,
+       nullif(btrim(notas), ''), now(), now()
+FROM {STAGING}
+WHERE motivo IS NULL
+ORDER BY fecha::date, fila
+"""
+
+RECHAZADAS = f"""
+SELECT fila, motivo, descripcion, monto, categoria, fecha, notas
+FROM {STAGING} WHERE motivo IS NOT NULL ORDER BY fila
+"""
+
+
+class CSVMalFormado(ValueError):
+    """
+    Línea que COPY no puede leer: cantidad de columnas distinta a la
+    cabecera, comillas sin cerrar o bytes que no son UTF-8. COPY se detiene
+    en la primera, así que no se importa nada. `linea` se cuenta sin la
+    cabecera y por líneas del archivo (un campo entre comillas puede ocupar
+    varias).
+    """
+
+    def __init__(self, linea, motivo, contenido=None):
+        super().__init__(f'CSV mal formado en la línea {linea}: {motivo}')
+        self.linea = linea
+        self.motivo = motivo
+        self.contenido = contenido
+
+    @classmethod
+    def desde_copy(cls, error):
+        # CONTEXT:  COPY importacion_movimientos, line 2: "b,2,gasto"
+        contexto = re.search(r'line (\d+)(?:, column \w+)?(?:: "(.*)")?', error.diag.context or '', re.S)
+        if contexto is None:
+            return cls(None, error.diag.message_primary)
+        return cls(int(contexto[1]), error.diag.message_primary, contexto[2])
+
+
+def leer_cabecera(archivo):
+    """
+    Lee la primera línea del CSV y devuelve la lista de columnas.
+    Lanza ValueError si faltan columnas obligatorias o hay columnas desconocidas.
+    """
+    linea = archivo.readline()
+    if isinstance(linea, bytes):
+        linea = linea.decode('utf-8-sig')
+    columnas = [c.strip() for c in next(csv.reader([linea.lstrip('\ufeff')]), [])]
+    desconocidas = [c for c in columnas if c not in CAMPOS]
+    if desconocidas:
+        raise ValueError(f"Columnas desconocidas: {', '.join(desconocidas)}")
+    faltantes = [c for c in OBLIGATORIAS if c not in columnas]
+    if faltantes:
+        raise ValueError(f"Faltan columnas: {', '.join(faltantes)}")
+    if len(set(columnas)) != len(columnas):
+        raise ValueError("Columnas repetidas en la cabecera")
+    return columnas
+
+
+def _copiar(cursor, sql, archivo):
+    """
+    COPY ... FROM STDIN / TO STDOUT con el driver que use la conexión
+    (psycopg2 copy_expert o psycopg 3 cursor.copy).
+    """
+    crudo = cursor.cursor
+    if hasattr(crudo, 'copy_expert'):
+        crudo.copy_expert(sql, archivo, size=1 << 20)
+        return
+    with crudo.copy(sql) as copia:
+        if 'FROM STDIN' in sql:
+            while bloque := archivo.read(1 << 20):
+                copia.write(bloque)
+        else:
+            for bloque in copia:
+                archivo.write(bytes(bloque))
+
+
+def importar_csv(archivo, user, rechazadas=None, max_errores=100):
+    """
+    Carga un CSV de movimientos para `user` usando COPY.
+
+    El archivo (binario, UTF-8, con cabecera) se copia a una tabla temporal,
+    se valida en SQL y las filas válidas se insertan en una sola sentencia,
+    junto con sus acumulados, dentro de una transacción. Las filas inválidas
+    no se insertan: se devuelven las primeras `max_errores` y, si se indica
+    `rechazadas` (archivo binario), se escriben todas ahí como CSV.
+    Lanza CSVMalFormado si COPY no puede leer alguna línea.
+    """
+    columnas = leer_cabecera(archivo)
+    lista = ', '.join(columnas)
+    definicion = ', '.join(f'{c} text' for c in CAMPOS)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TEMP TABLE {STAGING} ('
+            f'fila bigint GENERATED ALWAYS AS IDENTITY, {definicion}, motivo text'
+            f') ON COMMIT DROP'
+        )
+        try:
+            _copiar(cursor, f'COPY {STAGING} ({lista}) FROM STDIN WITH (FORMAT csv)', archivo)
+        except connection.Database.DataError as error:
+            raise CSVMalFormado.desde_copy(error) from error
+        cursor.execute(VALIDACION)
+
+        resumenes.registrar_alta_sql(VALIDAS, [user.pk])
+        cache_reportes.invalidar_al_confirmar(user.pk)
+        cursor.execute(INSERCION, [user.pk])
+        importados = cursor.rowcount
+
+        cursor.execute(f'{RECHAZADAS} LIMIT %s', [max_errores])
+        errores = [
+            {
+                'fila': fila,
+                'motivo': motivo,
+                'datos': {
+                    'descripcion': descripcion,
+                    'monto': monto,
+                    'categoria': categoria,
+                    'fecha': fecha,
+                    'notas': notas,
+                },
+            }
+            for fila, motivo, descripcion, monto, categoria, fecha, notas in cursor.fetchall()
+        ]
+        cursor.execute(f'SELECT count(*) FROM {STAGING} WHERE motivo IS NOT NULL')
+        total_rechazadas = cursor.fetchone()[0]
+
+        if rechazadas is not None:
+            _copiar(cursor, f'COPY ({RECHAZADAS}) TO STDOUT WITH (FORMAT csv, HEADER)', rechazadas)
+
+        # ON COMMIT DROP no alcanza si ya había una transacción abierta
+        cursor.execute(f'DROP TABLE {STAGING}')
+
+    return {
+        'importados': importados,
+        'rechazados': total_rechazadas,
+        'errores': errores,
+    }
+
@@ -0,0 +1,99 @@
+import json
+import subprocess
+from datetime import datetime, timezone
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from api import benchmark
+from api.models import MovimientoFinanciero
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True, cwd=settings.BASE_DIR,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _filas_estimadas():
+    # reltuples evita un count(*) sobre decenas de millones de filas
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = 'api_movimientofinanciero'::regclass"
+        )
+        return max(cursor.fetchone()[0], 0)
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide cada endpoint (listado con todos los filtros y órdenes, crear, resumen, "
+        "reporte_mensual, registro y login) y guarda throughput, latencias p50/p95/p99 "
+        "y consultas SQL por endpoint, más el tamaño y tiempo de codificación de cada "
+        "formato de respuesta, en un JSON comparable entre commits"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuario', default='bench_0', help="Usuario con contraseña 'bench' (ver sembrar_movimientos)")
+        parser.add_argument('--peticiones', type=int, default=30, help='Peticiones por escenario')
+        parser.add_argument('--peticiones-auth', type=int, default=5, help='Peticiones de registro y login (hash PBKDF2)')
+        parser.add_argument('--salida', default='benchmark.json', help='Archivo JSON de resultados')
+        parser.add_argument('--comparar', help='JSON de una ejecución anterior para mostrar diferencias')
+
+    def handle(self, *args, **options):
+        try:
+            usuario = User.objects.get(username=options['usuario'])
+        except User.DoesNotExist:
+            raise CommandError(f"Usuario inexistente: {options['usuario']}. Crea datos con sembrar_movimientos.")
+
+        def progreso(nombre, metricas):
+            latencia = metricas['latencia_ms']
+            self.stdout.write(
+                f"{nombre:<70} p50 {latencia['p50']:>8.2f} ms  p99 {latencia['p99']:>8.2f} ms  "
+                f"{metricas['consultas']['media']:>5.1f} consultas"
+                + (f"  {metricas['errores']} errores" if metricas['errores'] else '')
+            )
+
+        endpoints = benchmark.ejecutar(
+            usuario,
+            peticiones=options['peticiones'],
+            peticiones_auth=options['peticiones_auth'],
+            progreso=progreso,
+        )
+        resultado = {
+            'commit': _commit(),
+            'fecha': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'configuracion': {
+                'async_views': settings.ASYNC_VIEWS,
+                'peticiones': options['peticiones'],
+                'peticiones_auth': options['peticiones_auth'],
+            },
+            'datos': {
+                'movimientos_estimados': _filas_estimadas(),
+                'movimientos_usuario': MovimientoFinanciero.objects.filter(user=usuario).count(),
+            },
+            'endpoints': endpoints,
+            'formatos': benchmark.formatos(usuario),
+        }
+        self.stdout.write('\nTamaño y tiempo de codificación por formato:')
+        for nombre, medidas in resultado['formatos'].items():
+            for formato, medida in medidas.items():
+                self.stdout.write(f"{nombre:<40} {formato:<18} {medida['bytes']:>10,} bytes  {medida['ms']:>8.3f} ms")
+
+        with open(options['salida'], 'w', encoding='utf-8') as archivo:
+            json.dump(resultado, archivo, ensure_ascii=False, indent=2, sort_keys=True)
+            archivo.write('\n')
+        self.stdout.write(self.style.SUCCESS(f"Resultados en {options['salida']}"))
+
+        if options['comparar']:
+            with open(options['comparar'], encoding='utf-8') as archivo:
+                anterior = json.load(archivo)
+            self.stdout.write(f"\nComparación con {anterior.get('commit') or options['comparar']}:")
+            for nombre, p50_antes, p50, p99_antes, p99, consultas_antes, consultas in benchmark.comparar(anterior, resultado):
+                self.stdout.write(
+                    f"{nombre:<70} p50 {p50_antes:.2f} -> {p50:.2f}  p99 {p99_antes:.2f} -> {p99:.2f}  "
+                    f"consultas {consultas_antes} -> {consultas}"
+                )
@@ -0,0 +1,128 @@
+import http.client
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote, urlsplit
+from django.core.management.base import BaseCommand, CommandError
+from api.benchmark import percentil
+
+
+class Command(BaseCommand):
+    help = (
+        "Lanza peticiones GET concurrentes contra un servidor en marcha y mide "
+        "throughput y latencias (p50/p95/p99). Sirve para comparar el despliegue "
+        "WSGI con el ASGI sobre las mismas rutas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', nargs='+', help='URLs a pedir por turnos, p. ej. http://localhost:8000/api/movimientos/')
+        parser.add_argument('--token', help='Token de autenticación (cabecera Authorization: Token ...)')
+        parser.add_argument('--concurrencia', type=int, default=50, help='Conexiones simultáneas')
+        parser.add_argument('--peticiones', type=int, default=2000, help='Total de peticiones medidas')
+        parser.add_argument('--calentamiento', type=int, default=100, help='Peticiones previas sin medir')
+        parser.add_argument(
+            '--login', metavar='USUARIO:CONTRASEÑA',
+            help='Mientras se mide, otros hilos hacen POST /api/login/ sin parar con estas credenciales',
+        )
+        parser.add_argument('--concurrencia-login', type=int, default=8, help='Hilos que hacen login (con --login)')
+
+    def handle(self, *args, **options):
+        urls = [urlsplit(url) for url in options['url']]
+        if any(url.scheme != 'http' or not url.hostname for url in urls):
+            raise CommandError('Solo se admiten URLs http://host[:puerto]/ruta')
+        cabeceras = {}
+        if options['token']:
+            cabeceras['Authorization'] = f"Token {options['token']}"
+
+        login = None
+        if options['login']:
+            usuario, _, contraseña = options['login'].partition(':')
+            login = json.dumps({'username': usuario, 'password': contraseña})
+
+        local = threading.local()
+        contador = iter(range(10 ** 9))
+        lock = threading.Lock()
+
+        def pedir(_):
+            with lock:
+                url = urls[next(contador) % len(urls)]
+            # Una conexión keep-alive por hilo, como un cliente real
+            conexion = getattr(local, 'conexion', None)
+            if conexion is None or local.destino != url.netloc:
+                conexion = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=60)
+                local.conexion, local.destino = conexion, url.netloc
+            # Parámetros como año= se envían codificados
+            ruta = quote(url.path + (f'?{url.query}' if url.query else ''), safe='/?&=%+:,')
+            inicio = time.perf_counter()
+            try:
+                conexion.request('GET', ruta, headers=cabeceras)
+                respuesta = conexion.getresponse()
+                respuesta.read()
+                estado = respuesta.status
+            except (OSError, http.client.HTTPException):
+                local.conexion = None
+                conexion.close()
+                estado = None
+            return time.perf_counter() - inicio, estado
+
+        midiendo = threading.Event()
+        logins = []
+
+        def hacer_logins():
+            # Carga de CPU en el servidor: cada login calcula un hash PBKDF2
+            conexion = http.client.HTTPConnection(urls[0].hostname, urls[0].port or 80, timeout=60)
+            while not midiendo.is_set():
+                time.sleep(0.01)
+            while midiendo.is_set():
+                inicio = time.perf_counter()
+                espera = 0
+                try:
+                    conexion.request('POST', '/api/login/', login, {'Content-Type': 'application/json'})
+                    respuesta = conexion.getresponse()
+                    respuesta.read()
+                    estado = respuesta.status
+                    # Como un cliente real, respeta Retry-After si el servidor está saturado
+                    espera = float(respuesta.getheader('Retry-After') or 0)
+                except (OSError, http.client.HTTPException, ValueError):
+                    conexion.close()
+                    estado = None
+                logins.append((time.perf_counter() - inicio, estado))
+                time.sleep(espera)
+
+        hilos_login = [
+            threading.Thread(target=hacer_logins, daemon=True)
+            for _ in range(options['concurrencia_login'] if login else 0)
+        ]
+        for hilo in hilos_login:
+            hilo.start()
+        with ThreadPoolExecutor(max_workers=options['concurrencia']) as pool:
+            list(pool.map(pedir, range(options['calentamiento'])))
+            midiendo.set()
+            inicio = time.perf_counter()
+            resultados = list(pool.map(pedir, range(options['peticiones'])))
+            duracion = time.perf_counter() - inicio
+            midiendo.clear()
+        for hilo in hilos_login:
+            hilo.join()
+
+        latencias = [segundos * 1000 for segundos, _ in resultados]
+        errores = sum(1 for _, estado in resultados if estado is None or estado >= 400)
+
+        self.stdout.write(f"Peticiones: {len(resultados)} ({errores} con error), concurrencia {options['concurrencia']}")
+        self.stdout.write(f"Throughput: {len(resultados) / duracion:,.0f} peticiones/s")
+        self.stdout.write(
+            f"Latencia ms: media {statistics.mean(latencias):.1f} | "
+            f"p50 {percentil(latencias, 50):.1f} | p95 {percentil(latencias, 95):.1f} | "
+            f"p99 {percentil(latencias, 99):.1f} | máx {max(latencias):.1f}"
+        )
+        if login:
+            latencias = [segundos * 1000 for segundos, estado in logins if estado == 200] or [0]
+            rechazados = sum(1 for _, estado in logins if estado == 503)
+            errores = sum(1 for _, estado in logins if estado not in (200, 503))
+            self.stdout.write(
+                f"Logins: {(len(logins) - rechazados - errores) / duracion:,.1f} por segundo "
+                f"({rechazados} rechazados con 503, {errores} con error), "
+                f"p50 {percentil(latencias, 50):.1f} ms | p99 {percentil(latencias, 99):.1f} ms"
+            )
@@ -0,0 +1,39 @@
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from api.importacion import importar_csv
+
+
+class Command(BaseCommand):
+    help = "Importa movimientos financieros desde un CSV usando COPY de PostgreSQL"
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='CSV con cabecera (descripcion, monto, categoria, fecha[, notas])')
+        parser.add_argument('--usuario', required=True, help='Username dueño de los movimientos')
+        parser.add_argument('--rechazadas', help='Ruta donde escribir las filas rechazadas como CSV')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['usuario'])
+        except User.DoesNotExist:
+            raise CommandError(f"Usuario inexistente: {options['usuario']}")
+
+        rechazadas = open(options['rechazadas'], 'wb') if options['rechazadas'] else None
+        inicio = time.monotonic()
+        try:
+            with open(options['archivo'], 'rb') as archivo:
+                resultado = importar_csv(archivo, user, rechazadas=rechazadas, max_errores=10)
+        except ValueError as error:
+            raise CommandError(str(error))
+        finally:
+            if rechazadas is not None:
+                rechazadas.close()
+        duracion = time.monotonic() - inicio
+
+        for error in resultado['errores']:
+            self.stdout.write(f"Fila {error['fila']}: {error['motivo']}")
+        filas = resultado['importados'] + resultado['rechazados']
+        self.stdout.write(self.style.SUCCESS(
+            f"{resultado['importados']} movimientos importados, {resultado['rechazados']} rechazados "
+            f"en {duracion:.2f}s ({filas / duracion if duracion else 0:,.0f} filas/s)"
+        ))
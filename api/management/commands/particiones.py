@@ -0,0 +1,62 @@
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from api import particiones
+
+
+class Command(BaseCommand):
+    help = (
+        "Particiona la tabla de movimientos por fecha y administra sus particiones: "
+        "convertir, crear las próximas, separar las antiguas o listarlas"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('accion', choices=['convertir', 'crear', 'separar', 'listar'])
+        parser.add_argument(
+            '--intervalo', choices=particiones.INTERVALOS, default='mensual',
+            help='Rango de cada partición (solo convertir)',
+        )
+        parser.add_argument(
+            '--meses-adelante', type=int, default=3,
+            help='Meses a futuro que deben tener partición (convertir y crear)',
+        )
+        parser.add_argument(
+            '--antes-de', type=date.fromisoformat,
+            help='Separa las particiones que terminan en o antes de esta fecha (YYYY-MM-DD)',
+        )
+        parser.add_argument(
+            '--borrar', action='store_true',
+            help='Borra las particiones separadas en lugar de conservarlas como tablas de archivo',
+        )
+
+    def handle(self, *args, **options):
+        accion = options['accion']
+        if accion == 'convertir':
+            try:
+                filas = particiones.convertir(options['intervalo'], options['meses_adelante'])
+            except ValueError as e:
+                raise CommandError(str(e))
+            self.stdout.write(self.style.SUCCESS(
+                f"Tabla particionada ({options['intervalo']}), {filas:,} movimientos copiados"
+            ))
+            return
+
+        if not particiones.esta_particionada():
+            raise CommandError('La tabla no está particionada; ejecuta primero "particiones convertir"')
+
+        if accion == 'crear':
+            hasta = date.today() + timedelta(days=31 * options['meses_adelante'])
+            creadas = particiones.crear_particiones(hasta)
+            for nombre in creadas:
+                self.stdout.write(f"Creada {nombre}")
+            self.stdout.write(self.style.SUCCESS(f"{len(creadas)} particiones creadas"))
+        elif accion == 'separar':
+            if options['antes_de'] is None:
+                raise CommandError('separar necesita --antes-de')
+            separadas = particiones.separar_particiones(options['antes_de'], options['borrar'])
+            for nombre in separadas:
+                self.stdout.write(f"{'Borrada' if options['borrar'] else 'Separada'} {nombre}")
+            self.stdout.write(self.style.SUCCESS(f"{len(separadas)} particiones separadas"))
+        else:
+            for particion in particiones.particiones():
+                rango = f"{particion.desde} .. {particion.hasta}" if particion.desde else 'DEFAULT'
+                self.stdout.write(f"{particion.nombre}: {rango} (~{particion.filas_estimadas:,} filas)")
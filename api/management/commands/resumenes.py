@@ -0,0 +1,36 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from api import resumenes
+
+
+class Command(BaseCommand):
+    help = "Reconstruye o verifica los acumulados diarios y mensuales de movimientos financieros"
+
+    def add_arguments(self, parser):
+        parser.add_argument('accion', choices=['reconstruir', 'verificar'])
+        parser.add_argument(
+            '--usuario',
+            action='append',
+            dest='usuarios',
+            help='Username a procesar (se puede repetir). Por defecto, todos.',
+        )
+
+    def handle(self, *args, **options):
+        usuarios = None
+        if options['usuarios']:
+            usuarios = list(User.objects.filter(username__in=options['usuarios']))
+            faltantes = set(options['usuarios']) - {u.username for u in usuarios}
+            if faltantes:
+                raise CommandError(f"Usuarios inexistentes: {', '.join(sorted(faltantes))}")
+
+        if options['accion'] == 'reconstruir':
+            resumenes.reconstruir(usuarios)
+            self.stdout.write(self.style.SUCCESS("Acumulados reconstruidos"))
+            return
+
+        diferencias = resumenes.verificar(usuarios)
+        for modelo, clave, esperado, guardado in diferencias:
+            self.stdout.write(f"{modelo} {clave}: esperado={esperado} guardado={guardado}")
+        if diferencias:
+            raise CommandError(f"{len(diferencias)} acumulados no coinciden con los movimientos")
+        self.stdout.write(self.style.SUCCESS("Acumulados correctos"))
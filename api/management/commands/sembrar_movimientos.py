@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+from api import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Crea usuarios bench_N (contraseña 'bench') y genera movimientos aleatorios "
+        "reproducibles para el benchmark, con sus acumulados"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=10, help='Cantidad de usuarios')
+        parser.add_argument('--movimientos', type=int, default=100_000, help='Movimientos en total, repartidos entre los usuarios')
+        parser.add_argument('--dias', type=int, default=730, help='Días hacia atrás que cubren las fechas')
+        parser.add_argument('--semilla', type=int, default=42, help='Semilla de los datos aleatorios')
+        parser.add_argument('--lote', type=int, default=500_000, help='Filas por transacción')
+        parser.add_argument('--prefijo', default='bench', help='Prefijo de los usernames')
+        parser.add_argument('--limpiar', action='store_true', help='Borra antes los movimientos de esos usuarios')
+
+    def handle(self, *args, **options):
+        if options['usuarios'] < 1 or options['movimientos'] < 0 or options['lote'] < 1 or options['dias'] < 1:
+            raise CommandError('usuarios, lote y dias deben ser positivos')
+
+        usuarios = benchmark.crear_usuarios(options['usuarios'], options['prefijo'])
+        if options['limpiar']:
+            benchmark.limpiar(usuarios)
+            self.stdout.write(f"Movimientos de {len(usuarios)} usuarios borrados")
+
+        def progreso(insertadas, segundos):
+            self.stdout.write(f"{insertadas:,} movimientos en {segundos:.1f}s ({insertadas / segundos if segundos else 0:,.0f} filas/s)")
+
+        benchmark.sembrar(
+            usuarios,
+            options['movimientos'],
+            dias=options['dias'],
+            semilla=options['semilla'],
+            lote=options['lote'],
+            progreso=progreso,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{options['movimientos']:,} movimientos para {len(usuarios)} usuarios "
+            f"({options['prefijo']}_0 .. {options['prefijo']}_{len(usuarios) - 1})"
+        ))
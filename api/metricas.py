@@ -0,0 +1,256 @@
+"""
+Instrumentación por petición: tiempo total, tiempo y cantidad de consultas
+SQL y tiempo de serialización. También publica el estado del pool de
+conexiones a la base de datos.
+
+Cada petición acumula sus mediciones en un contextvar, que también ven los
+hilos a los que las vistas async delegan el ORM. El middleware las publica en
+la cabecera Server-Timing y en histogramas de Prometheus. Con varios workers
+de gunicorn, PROMETHEUS_MULTIPROC_DIR hace que cada proceso escriba sus
+valores en archivos compartidos y /metrics los combina.
+"""
+import collections
+import contextvars
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from prometheus_client import (
+    CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess,
+)
+
+logger = logging.getLogger(__name__)
+
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BUCKETS_CONSULTAS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+DURACION = Histogram(
+    'http_request_duration_seconds', 'Duración de la petición',
+    ['vista', 'metodo', 'estado'], buckets=BUCKETS_SEGUNDOS,
+)
+DURACION_BD = Histogram(
+    'http_request_db_duration_seconds', 'Tiempo en consultas SQL por petición',
+    ['vista', 'metodo'], buckets=BUCKETS_SEGUNDOS,
+)
+CONSULTAS = Histogram(
+    'http_request_db_queries', 'Consultas SQL por petición',
+    ['vista', 'metodo'], buckets=BUCKETS_CONSULTAS,
+)
+SERIALIZACION = Histogram(
+    'http_request_serialization_duration_seconds', 'Tiempo de serialización y render por petición',
+    ['vista', 'metodo'], buckets=BUCKETS_SEGUNDOS,
+)
+
+# Estado del pool; con varios workers se suman los de los procesos vivos
+POOL_CONEXIONES = Gauge(
+    'db_pool_connections', 'Conexiones del pool por estado',
+    ['estado'], multiprocess_mode='livesum',
+)
+POOL_MAXIMO = Gauge('db_pool_max_connections', 'Tamaño máximo del pool', multiprocess_mode='livesum')
+POOL_ESPERANDO = Gauge(
+    'db_pool_requests_waiting', 'Pedidos esperando una conexión libre', multiprocess_mode='livesum',
+)
+# Contadores del pool: clave de get_stats() de psycopg_pool -> (métrica, escala)
+POOL_CONTADORES = {
+    'requests_num': (Counter('db_pool_checkouts', 'Conexiones pedidas al pool'), 1),
+    'requests_queued': (Counter('db_pool_checkouts_queued', 'Pedidos que tuvieron que esperar'), 1),
+    'requests_wait_ms': (Counter('db_pool_wait_seconds', 'Tiempo total esperando una conexión'), 1000),
+    'requests_errors': (Counter('db_pool_checkout_errors', 'Pedidos sin conexión (timeout)'), 1),
+    'connections_lost': (Counter('db_pool_connections_lost', 'Conexiones caídas descartadas al verificarlas'), 1),
+}
+# Segundos mínimos entre lecturas del pool en cada proceso
+INTERVALO_POOL = 1.0
+
+
+class Medicion:
+    __slots__ = ('bd', 'consultas', 'serializacion', 'sentencias')
+
+    def __init__(self, guardar_sentencias=False):
+        self.bd = 0.0
+        self.consultas = 0
+        self.serializacion = 0.0
+        self.sentencias = [] if guardar_sentencias else None
+
+
+_actual = contextvars.ContextVar('medicion', default=None)
+
+
+def medir_consulta(execute, sql, params, many, context):
+    """
+    execute_wrapper instalado en cada conexión (ver api.signals).
+    Fuera de una petición medida no hace nada.
+    """
+    medicion = _actual.get()
+    if medicion is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        medicion.bd += time.perf_counter() - inicio
+        medicion.consultas += 1
+        if medicion.sentencias is not None:
+            medicion.sentencias.append(sql)
+
+
+def instalar(conexion):
+    if medir_consulta not in conexion.execute_wrappers:
+        conexion.execute_wrappers.append(medir_consulta)
+
+
+@contextmanager
+def serializacion():
+    """
+    Suma el tiempo del bloque a la serialización de la petición en curso.
+    """
+    medicion = _actual.get()
+    if medicion is None:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        medicion.serializacion += time.perf_counter() - inicio
+
+
+class _EstadoPool:
+    lock = threading.Lock()
+    ultima_lectura = 0.0
+    anteriores = {}
+
+
+def actualizar_pool(forzar=False):
+    """
+    Copia las estadísticas del pool de este proceso a las métricas, como
+    mucho una vez por INTERVALO_POOL. No hace nada sin DB_POOL.
+    """
+    ahora = time.monotonic()
+    if not forzar and ahora - _EstadoPool.ultima_lectura < INTERVALO_POOL:
+        return
+    if not _EstadoPool.lock.acquire(blocking=False):
+        return
+    try:
+        _EstadoPool.ultima_lectura = ahora
+        pool = connections['default'].pool
+        if pool is None:
+            return
+        stats = pool.get_stats()
+        tamaño = stats.get('pool_size', 0)
+        disponibles = stats.get('pool_available', 0)
+        POOL_CONEXIONES.labels('abiertas').set(tamaño)
+        POOL_CONEXIONES.labels('disponibles').set(disponibles)
+        POOL_CONEXIONES.labels('en_uso').set(tamaño - disponibles)
+        POOL_MAXIMO.set(stats.get('pool_max', 0))
+        POOL_ESPERANDO.set(stats.get('requests_waiting', 0))
+        # get_stats() es acumulado por pool: se suma la diferencia
+        for clave, (contador, escala) in POOL_CONTADORES.items():
+            valor = stats.get(clave, 0)
+            diferencia = valor - _EstadoPool.anteriores.get(clave, 0)
+            if diferencia > 0:
+                contador.inc(diferencia / escala)
+            _EstadoPool.anteriores[clave] = valor
+    finally:
+        _EstadoPool.lock.release()
+
+
+def exportar():
+    """
+    Métricas en formato de texto de Prometheus, de todos los workers si
+    PROMETHEUS_MULTIPROC_DIR está definido.
+    """
+    actualizar_pool(forzar=True)
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registro = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registro)
+        return generate_latest(registro)
+    return generate_latest(REGISTRY)
+
+
+def _vista(request):
+    coincidencia = getattr(request, 'resolver_match', None)
+    if coincidencia is None:
+        return 'sin_ruta'
+    return coincidencia.view_name or coincidencia.route or 'sin_nombre'
+
+
+def _revisar_consultas(vista, request, medicion):
+    presupuesto = settings.METRICAS_PRESUPUESTO_CONSULTAS.get(vista)
+    if presupuesto is not None and medicion.consultas > presupuesto:
+        logger.warning(
+            '%s %s: %d consultas (presupuesto %d)\n%s',
+            request.method, request.get_full_path(), medicion.consultas, presupuesto,
+            '\n'.join(medicion.sentencias or []),
+        )
+    umbral = settings.METRICAS_N_MAS_1
+    if umbral and medicion.sentencias:
+        for sql, veces in collections.Counter(medicion.sentencias).items():
+            if veces >= umbral:
+                logger.warning(
+                    '%s %s: posible N+1, %d veces la misma consulta: %s',
+                    request.method, request.get_full_path(), veces, sql,
+                )
+
+
+class MetricasMiddleware:
+    """
+    Mide cada petición y agrega la cabecera
+    Server-Timing: total;dur=.., db;dur=..;desc="N consultas", serializacion;dur=..
+
+    Debe ir primero en MIDDLEWARE para incluir al resto del stack. Las
+    consultas de respuestas en streaming (exportar) ocurren después y no se
+    cuentan.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def _iniciar(self):
+        guardar = bool(settings.METRICAS_PRESUPUESTO_CONSULTAS or settings.METRICAS_N_MAS_1)
+        medicion = Medicion(guardar_sentencias=guardar)
+        return medicion, _actual.set(medicion), time.perf_counter()
+
+    def _terminar(self, request, response, medicion, inicio):
+        total = time.perf_counter() - inicio
+        vista = _vista(request)
+        DURACION.labels(vista, request.method, response.status_code).observe(total)
+        DURACION_BD.labels(vista, request.method).observe(medicion.bd)
+        CONSULTAS.labels(vista, request.method).observe(medicion.consultas)
+        SERIALIZACION.labels(vista, request.method).observe(medicion.serializacion)
+        actualizar_pool()
+
+        if settings.METRICAS_SERVER_TIMING:
+            response['Server-Timing'] = (
+                f'total;dur={total * 1000:.2f}, '
+                f'db;dur={medicion.bd * 1000:.2f};desc="{medicion.consultas} consultas", '
+                f'serializacion;dur={medicion.serializacion * 1000:.2f}'
+            )
+        if medicion.sentencias is not None:
+            _revisar_consultas(vista, request, medicion)
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        medicion, token, inicio = self._iniciar()
+        try:
+            response = self.get_response(request)
+        finally:
+            _actual.reset(token)
+        return self._terminar(request, response, medicion, inicio)
+
+    async def __acall__(self, request):
+        medicion, token, inicio = self._iniciar()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _actual.reset(token)
+        return self._terminar(request, response, medicion, inicio)
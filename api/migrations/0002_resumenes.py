@@ -0,0 +1,79 @@
+# Generated by Django 5.2.4 on 2026-10-17 00:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum, Count
+from django.db.models.functions import TruncMonth
+
+
+def poblar_resumenes(apps, schema_editor):
+    MovimientoFinanciero = apps.get_model('api', 'MovimientoFinanciero')
+    ResumenDiario = apps.get_model('api', 'ResumenDiario')
+    ResumenMensual = apps.get_model('api', 'ResumenMensual')
+    movimientos = MovimientoFinanciero.objects.order_by()
+    ResumenDiario.objects.bulk_create(
+        (
+            ResumenDiario(**fila)
+            for fila in movimientos.values('user_id', 'fecha', 'categoria')
+            .annotate(total=Sum('monto'), cantidad=Count('id'))
+            .iterator()
+        ),
+        batch_size=1000,
+    )
+    ResumenMensual.objects.bulk_create(
+        (
+            ResumenMensual(**fila)
+            for fila in movimientos.annotate(mes=TruncMonth('fecha'))
+            .values('user_id', 'mes', 'categoria')
+            .annotate(total=Sum('monto'), cantidad=Count('id'))
+            .iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(verbose_name='Fecha')),
+                ('categoria', models.CharField(choices=[('ingreso', 'Ingreso'), ('gasto', 'Gasto')], max_length=10, verbose_name='Categoría')),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Total')),
+                ('cantidad', models.IntegerField(default=0, verbose_name='Cantidad de movimientos')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_diarios', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Resumen Diario',
+                'verbose_name_plural': 'Resúmenes Diarios',
+                'ordering': ['-fecha'],
+                'constraints': [models.UniqueConstraint(fields=('user', 'fecha', 'categoria'), name='resumen_diario_unico')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenMensual',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.DateField(verbose_name='Mes')),
+                ('categoria', models.CharField(choices=[('ingreso', 'Ingreso'), ('gasto', 'Gasto')], max_length=10, verbose_name='Categoría')),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Total')),
+                ('cantidad', models.IntegerField(default=0, verbose_name='Cantidad de movimientos')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_mensuales', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Resumen Mensual',
+                'verbose_name_plural': 'Resúmenes Mensuales',
+                'ordering': ['-mes'],
+                'constraints': [models.UniqueConstraint(fields=('user', 'mes', 'categoria'), name='resumen_mensual_unico')],
+            },
+        ),
+        migrations.RunPython(poblar_resumenes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.4 on 2026-10-17 00:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY no puede ejecutarse dentro de una transacción
+    atomic = False
+
+    dependencies = [
+        ('api', '0002_resumenes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='movimientofinanciero',
+            index=models.Index(fields=['user', 'fecha', 'id'], name='movimiento_user_fecha_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='movimientofinanciero',
+            index=models.Index(fields=['user', 'categoria', 'fecha', 'id'], name='movimiento_user_cat_fecha_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='movimientofinanciero',
+            index=models.Index(fields=['user', 'monto', 'id'], name='movimiento_user_monto_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='movimientofinanciero',
+            index=models.Index(fields=['user', 'fecha_creacion', 'id'], name='movimiento_user_creacion_idx'),
+        ),
+        migrations.AlterField(
+            model_name='movimientofinanciero',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='movimientos', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.4 on 2026-10-17 01:51
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+INDICE_TRIGRAMAS = 'movimiento_descripcion_trgm_idx'
+
+
+def _particionada(schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass('api_movimientofinanciero')"
+        )
+        fila = cursor.fetchone()
+    return bool(fila and fila[0])
+
+
+class AgregarIndice(AddIndexConcurrently):
+    """
+    CREATE INDEX CONCURRENTLY, salvo si la tabla está particionada (ver
+    api.particiones): PostgreSQL no lo admite y se crea bloqueando escrituras.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if _particionada(schema_editor):
+            return migrations.AddIndex.database_forwards(self, app_label, schema_editor, from_state, to_state)
+        return super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+
+def crear_indice_trigramas(apps, schema_editor):
+    """
+    Índice de trigramas sobre descripcion para la búsqueda tolerante a
+    errores de tipeo. pg_trgm viene en el paquete contrib de PostgreSQL; si
+    el servidor no lo tiene se omite y la búsqueda usa solo texto completo.
+    """
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return
+        cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        concurrente = '' if _particionada(schema_editor) else 'CONCURRENTLY'
+        cursor.execute(
+            f'CREATE INDEX {concurrente} IF NOT EXISTS {INDICE_TRIGRAMAS} '
+            f'ON api_movimientofinanciero USING gin (descripcion gin_trgm_ops)'
+        )
+
+
+def borrar_indice_trigramas(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'DROP INDEX IF EXISTS {INDICE_TRIGRAMAS}')
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY no puede ejecutarse dentro de una transacción
+    atomic = False
+
+    dependencies = [
+        ('api', '0003_indices_movimientos'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Reescribe la tabla para calcular la columna en las filas existentes
+        migrations.AddField(
+            model_name='movimientofinanciero',
+            name='busqueda',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector('descripcion', config='spanish', weight='A'), '||', django.contrib.postgres.search.SearchVector('notas', config='spanish', weight='B'), django.contrib.postgres.search.SearchConfig('spanish')), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        AgregarIndice(
+            model_name='movimientofinanciero',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['busqueda'], name='movimiento_busqueda_idx'),
+        ),
+        migrations.RunPython(crear_indice_trigramas, borrar_indice_trigramas),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.4 on 2026-10-17 01:56
+
+from django.conf import settings
+from django.db import migrations, models
+from api.operaciones import AgregarIndice
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY no puede ejecutarse dentro de una transacción
+    atomic = False
+
+    dependencies = [
+        ('api', '0004_busqueda'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AgregarIndice(
+            model_name='movimientofinanciero',
+            index=models.Index(fields=['fecha', 'id'], name='movimiento_fecha_idx'),
+        ),
+    ]
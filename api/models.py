@@ -1,4 +1,6 @@
 from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.core.validators import MinValueValidator
 from decimal import Decimal
 from django.contrib.auth.models import User
@@ -9,7 +11,8 @@ class MovimientoFinanciero(models.Model):
         ('gasto', 'Gasto'),
     ]
 
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='movimientos')
+    # Sin índice propio: lo cubren los índices compuestos que empiezan por user
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='movimientos', db_index=False)
     descripcion = models.CharField(max_length=200, verbose_name="Descripción")
     monto = models.DecimalField(
         max_digits=10, 
@@ -26,11 +29,32 @@ class MovimientoFinanciero(models.Model):
     notas = models.TextField(blank=True, null=True, verbose_name="Notas")
     fecha_creacion = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de creación")
     fecha_actualizacion = models.DateTimeField(auto_now=True, verbose_name="Fecha de actualización")
+    # Documento de búsqueda de texto completo (ver api.busqueda); PostgreSQL
+    # lo recalcula al guardar. La descripción pesa más que las notas.
+    busqueda = models.GeneratedField(
+        expression=(
+            SearchVector('descripcion', weight='A', config='spanish')
+            + SearchVector('notas', weight='B', config='spanish')
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
 
     class Meta:
         ordering = ['-fecha', '-fecha_creacion']
         verbose_name = "Movimiento Financiero"
         verbose_name_plural = "Movimientos Financieros"
+        # Cada consulta filtra por user; el id final desempata el orden
+        # (ver get_queryset y la paginación por cursor)
+        indexes = [
+            models.Index(fields=['user', 'fecha', 'id'], name='movimiento_user_fecha_idx'),
+            models.Index(fields=['user', 'categoria', 'fecha', 'id'], name='movimiento_user_cat_fecha_idx'),
+            models.Index(fields=['user', 'monto', 'id'], name='movimiento_user_monto_idx'),
+            models.Index(fields=['user', 'fecha_creacion', 'id'], name='movimiento_user_creacion_idx'),
+            GinIndex(fields=['busqueda'], name='movimiento_busqueda_idx'),
+            # El admin lista y filtra por fecha los movimientos de todos los usuarios
+            models.Index(fields=['fecha', 'id'], name='movimiento_fecha_idx'),
+        ]
 
     def __str__(self):
         return f"{self.descripcion} - {self.monto} ({self.categoria})"
@@ -42,3 +66,57 @@ class MovimientoFinanciero(models.Model):
     @property
     def es_gasto(self):
         return self.categoria == 'gasto'
+
+
+class ResumenDiario(models.Model):
+    """
+    Acumulado por usuario, día y categoría de los movimientos financieros.
+    Se mantiene de forma incremental desde api.resumenes.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='resumenes_diarios')
+    fecha = models.DateField(verbose_name="Fecha")
+    categoria = models.CharField(
+        max_length=10,
+        choices=MovimientoFinanciero.CATEGORIA_CHOICES,
+        verbose_name="Categoría"
+    )
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Total")
+    cantidad = models.IntegerField(default=0, verbose_name="Cantidad de movimientos")
+
+    class Meta:
+        ordering = ['-fecha']
+        verbose_name = "Resumen Diario"
+        verbose_name_plural = "Resúmenes Diarios"
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'fecha', 'categoria'], name='resumen_diario_unico'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.fecha} {self.categoria}: {self.total} ({self.cantidad})"
+
+
+class ResumenMensual(models.Model):
+    """
+    Acumulado por usuario, mes y categoría. `mes` es el primer día del mes.
+    Se mantiene de forma incremental desde api.resumenes.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='resumenes_mensuales')
+    mes = models.DateField(verbose_name="Mes")
+    categoria = models.CharField(
+        max_length=10,
+        choices=MovimientoFinanciero.CATEGORIA_CHOICES,
+        verbose_name="Categoría"
+    )
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Total")
+    cantidad = models.IntegerField(default=0, verbose_name="Cantidad de movimientos")
+
+    class Meta:
+        ordering = ['-mes']
+        verbose_name = "Resumen Mensual"
+        verbose_name_plural = "Resúmenes Mensuales"
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'mes', 'categoria'], name='resumen_mensual_unico'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.mes:%Y-%m} {self.categoria}: {self.total} ({self.cantidad})"
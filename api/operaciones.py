@@ -0,0 +1,25 @@
+"""
+Operaciones de migración propias de la app.
+"""
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+def tabla_particionada(schema_editor, tabla='api_movimientofinanciero'):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(%s)", [tabla])
+        fila = cursor.fetchone()
+    return bool(fila and fila[0])
+
+
+class AgregarIndice(AddIndexConcurrently):
+    """
+    CREATE INDEX CONCURRENTLY, salvo si la tabla está particionada (ver
+    api.particiones): PostgreSQL no lo admite y se crea bloqueando escrituras.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        modelo = to_state.apps.get_model(app_label, self.model_name)
+        if tabla_particionada(schema_editor, modelo._meta.db_table):
+            return migrations.AddIndex.database_forwards(self, app_label, schema_editor, from_state, to_state)
+        return super().database_forwards(app_label, schema_editor, from_state, to_state)
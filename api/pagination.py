@@ -0,0 +1,203 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import date, datetime
+from decimal import Decimal
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class MovimientoPagination(PageNumberPagination):
+    """
+    Paginación de movimientos con dos modos:
+
+    - Por número de página (por defecto): ?page=N, incluye `count`.
+    - Por cursor (keyset): ?paginacion=cursor o ?cursor=... No cuenta filas ni
+      usa OFFSET; cada página continúa desde el último (campo, id) devuelto,
+      así que el costo no crece con la profundidad.
+
+    En ambos modos el cliente puede elegir ?page_size= hasta
+    MOVIMIENTOS_MAX_PAGE_SIZE. El modo cursor respeta el orden que aplicó
+    get_queryset y desempata por `id`.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = settings.MOVIMIENTOS_MAX_PAGE_SIZE
+    cursor_query_param = 'cursor'
+    modo_query_param = 'paginacion'
+    invalid_cursor_message = 'Cursor inválido'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.preparar(request):
+            return super().paginate_queryset(queryset, request, view)
+        return self.completar_cursor(list(self.consulta_cursor(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request):
+        """
+        Igual que paginate_queryset pero evalúa las consultas con el ORM async.
+        """
+        if self.preparar(request):
+            consulta = self.consulta_cursor(queryset, request)
+            return self.completar_cursor([m async for m in consulta])
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        paginator = self.django_paginator_class(queryset, page_size)
+        # count es una cached_property: se precarga para que el Paginator no consulte
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(page_number=page_number, message=str(exc))
+            raise NotFound(msg)
+        self.page.object_list = [m async for m in self.page.object_list]
+        return list(self.page)
+
+    def preparar(self, request):
+        """
+        Guarda la petición y devuelve True si se pidió el modo cursor.
+        """
+        self.request = request
+        self.modo_cursor = (
+            self.cursor_query_param in request.query_params
+            or request.query_params.get(self.modo_query_param) == 'cursor'
+        )
+        return self.modo_cursor
+
+    def consulta_cursor(self, queryset, request):
+        """
+        Queryset de la página pedida en modo cursor, con una fila de más para
+        saber si hay otra página.
+        """
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.campo, self.descendente = self.get_ordering(queryset)
+
+        self.cursor = self.decode_cursor(request)
+        self.hacia_atras = self.cursor is not None and self.cursor['atras']
+
+        # Orden (campo, id) en el sentido pedido; hacia atrás se recorre invertido
+        invertir = self.descendente != self.hacia_atras
+        prefijo = '-' if invertir else ''
+        queryset = queryset.order_by(f'{prefijo}{self.campo}', f'{prefijo}id')
+
+        if self.cursor is not None:
+            lookup = 'lt' if invertir else 'gt'
+            try:
+                # (campo, id) > (valor, id) escrito de forma que el índice
+                # (user, campo, id) pueda empezar el recorrido en `valor`
+                queryset = queryset.filter(
+                    Q(**{f'{self.campo}__{lookup}e': self.cursor['valor']}),
+                    Q(**{f'{self.campo}__{lookup}': self.cursor['valor']})
+                    | Q(**{f'id__{lookup}': self.cursor['id']}),
+                )
+            except ValidationError:
+                raise NotFound(self.invalid_cursor_message)
+
+        return queryset[:self.page_size + 1]
+
+    def completar_cursor(self, resultados):
+        hay_mas = len(resultados) > self.page_size
+        resultados = resultados[:self.page_size]
+
+        if self.hacia_atras:
+            resultados.reverse()
+            self.hay_siguiente = True
+            self.hay_anterior = hay_mas
+        else:
+            self.hay_siguiente = hay_mas
+            self.hay_anterior = self.cursor is not None
+
+        self.page = resultados
+        return resultados
+
+    def get_ordering(self, queryset):
+        """
+        Campo y sentido del primer criterio de orden del queryset.
+        """
+        ordering = queryset.query.order_by or queryset.model._meta.ordering
+        campo = ordering[0]
+        if campo.startswith('-'):
+            return campo[1:], True
+        return campo, False
+
+    def encode_cursor(self, movimiento, atras):
+        # Filas de .values() o instancias del modelo
+        if isinstance(movimiento, dict):
+            valor, pk = movimiento[self.campo], movimiento['id']
+        else:
+            valor, pk = getattr(movimiento, self.campo), movimiento.pk
+        if isinstance(valor, (date, datetime)):
+            valor = valor.isoformat()
+        elif isinstance(valor, Decimal):
+            valor = str(valor)
+        datos = {'c': self.campo, 'v': valor, 'id': pk}
+        if atras:
+            datos['a'] = 1
+        cursor = urlsafe_b64encode(json.dumps(datos, separators=(',', ':')).encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            datos = json.loads(urlsafe_b64decode(cursor.encode()))
+            # encode_cursor guarda el valor siempre como texto (isoformat o
+            # Decimal); listas, objetos o números llegarían tal cual al filtro
+            if datos['c'] != self.campo or not isinstance(datos['v'], str):
+                raise ValueError
+            return {'valor': datos['v'], 'id': int(datos['id']), 'atras': bool(datos.get('a'))}
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.modo_cursor:
+            return super().get_next_link()
+        if not self.hay_siguiente or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], atras=False)
+
+    def get_previous_link(self):
+        if not self.modo_cursor:
+            return super().get_previous_link()
+        if not self.hay_anterior:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], atras=True)
+
+    def get_paginated_response(self, data):
+        if not self.modo_cursor:
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        parameters += [
+            {
+                'name': self.modo_query_param,
+                'required': False,
+                'in': 'query',
+                'description': "Usa 'cursor' para paginación por cursor (sin count ni OFFSET)",
+                'schema': {'type': 'string', 'enum': ['pagina', 'cursor']},
+            },
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Cursor devuelto en `next`/`previous` en modo cursor',
+                'schema': {'type': 'string'},
+            },
+        ]
+        return parameters
@@ -0,0 +1,287 @@
+"""
+Particionado opcional de api_movimientofinanciero por rangos de `fecha`
+(mensual o anual), con el particionado declarativo de PostgreSQL.
+
+- convertir(): transforma la tabla en una particionada y copia las filas.
+- crear_particiones(): crea las particiones que faltan hasta una fecha y
+  mueve a ellas las filas que hubieran caído en la partición por defecto.
+- separar_particiones(): desengancha (y opcionalmente borra) las
+  particiones anteriores a una fecha, restando sus movimientos de los
+  acumulados.
+
+La clave primaria pasa a ser (id, fecha), porque PostgreSQL exige que
+incluya la columna de particionado; el id sigue saliendo de una secuencia,
+así que no se repite. Los índices del modelo se crean en la tabla padre y
+PostgreSQL los replica en cada partición. Las consultas que filtran por
+fecha (listado con fecha_desde/fecha_hasta, reporte_mensual) solo leen las
+particiones del rango.
+"""
+import re
+from collections import namedtuple
+from datetime import date, timedelta
+from django.db import connection, transaction
+from .models import MovimientoFinanciero
+from . import cache_reportes, resumenes
+
+TABLA = MovimientoFinanciero._meta.db_table
+INTERVALOS = ('mensual', 'anual')
+
+Particion = namedtuple('Particion', 'nombre desde hasta filas_estimadas')
+
+_LIMITES = re.compile(r"FROM \('([\d-]+)'\) TO \('([\d-]+)'\)")
+
+
+def _q(nombre):
+    return connection.ops.quote_name(nombre)
+
+
+def _inicio(fecha, intervalo):
+    if intervalo == 'mensual':
+        return fecha.replace(day=1)
+    return fecha.replace(month=1, day=1)
+
+
+def _siguiente(inicio, intervalo):
+    if intervalo == 'mensual':
+        return (inicio + timedelta(days=32)).replace(day=1)
+    return inicio.replace(year=inicio.year + 1)
+
+
+def _nombre(inicio, intervalo):
+    formato = '%Y_%m' if intervalo == 'mensual' else '%Y'
+    return f'{TABLA}_{inicio:{formato}}'
+
+
+def _por_defecto():
+    return f'{TABLA}_default'
+
+
+def _columnas(cursor, tabla):
+    """
+    Columnas de la tabla sin las generadas, que PostgreSQL calcula y no
+    acepta en un INSERT.
+    """
+    cursor.execute(
+        "SELECT attname FROM pg_attribute WHERE attrelid = to_regclass(%s) "
+        "AND attnum > 0 AND NOT attisdropped AND attgenerated = '' ORDER BY attnum",
+        [tabla],
+    )
+    return ', '.join(_q(fila[0]) for fila in cursor.fetchall())
+
+
+def _sin_verificaciones_pendientes():
+    # ALTER TABLE falla si la transacción tiene claves foráneas diferidas sin
+    # verificar (filas insertadas antes en la misma transacción)
+    connection.check_constraints()
+
+
+def esta_particionada():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(%s)", [TABLA]
+        )
+        fila = cursor.fetchone()
+    return bool(fila and fila[0])
+
+
+def particiones():
+    """
+    Particiones de la tabla ordenadas por fecha; la partición por defecto
+    va al final con desde/hasta en None.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT hija.relname, pg_get_expr(hija.relpartbound, hija.oid), hija.reltuples
+            FROM pg_inherits
+            JOIN pg_class AS hija ON hija.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = to_regclass(%s)
+            """,
+            [TABLA],
+        )
+        filas = cursor.fetchall()
+    resultado = []
+    for nombre, limites, tuplas in filas:
+        coincidencia = _LIMITES.search(limites)
+        desde, hasta = (
+            (date.fromisoformat(coincidencia[1]), date.fromisoformat(coincidencia[2]))
+            if coincidencia else (None, None)
+        )
+        resultado.append(Particion(nombre, desde, hasta, max(int(tuplas), 0)))
+    return sorted(resultado, key=lambda p: (p.desde is None, p.desde or date.min))
+
+
+def _intervalo_actual(existentes):
+    con_rango = [p for p in existentes if p.desde]
+    if not con_rango:
+        raise ValueError('La tabla no tiene particiones por rango')
+    ultima = con_rango[-1]
+    return 'mensual' if (ultima.hasta - ultima.desde).days <= 31 else 'anual'
+
+
+def _rangos(desde, hasta, intervalo):
+    """
+    Inicios de los intervalos que cubren [desde, hasta].
+    """
+    inicio = _inicio(desde, intervalo)
+    while inicio <= hasta:
+        yield inicio
+        inicio = _siguiente(inicio, intervalo)
+
+
+def convertir(intervalo='mensual', meses_adelante=3):
+    """
+    Convierte la tabla de movimientos en una tabla particionada por fecha,
+    con particiones desde el movimiento más antiguo hasta `meses_adelante`
+    meses después de hoy, más una partición por defecto para fechas fuera
+    de rango. Todo ocurre en una transacción que bloquea la tabla: con
+    muchas filas conviene hacerlo en una ventana de mantenimiento.
+    Devuelve la cantidad de filas copiadas.
+    """
+    if intervalo not in INTERVALOS:
+        raise ValueError(f'Intervalo desconocido: {intervalo}')
+    if esta_particionada():
+        raise ValueError('La tabla ya está particionada')
+    antigua = f'{TABLA}_sin_particiones'
+    secuencia = f'{TABLA}_id_seq'
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        _sin_verificaciones_pendientes()
+        cursor.execute(f'LOCK TABLE {_q(TABLA)} IN ACCESS EXCLUSIVE MODE')
+        cursor.execute(f'SELECT min(fecha), max(fecha), max(id), count(*) FROM {_q(TABLA)}')
+        minimo, maximo, max_id, filas = cursor.fetchone()
+        cursor.execute(
+            "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s AND indexname <> %s",
+            [TABLA, f'{TABLA}_pkey'],
+        )
+        indices = cursor.fetchall()
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+            [TABLA],
+        )
+        claves_foraneas = cursor.fetchall()
+
+        # Los nombres de índices y restricciones son únicos en el esquema:
+        # se quitan de la tabla vieja para crearlos iguales en la nueva
+        cursor.execute(f'ALTER TABLE {_q(TABLA)} RENAME TO {_q(antigua)}')
+        for nombre, _ in indices:
+            cursor.execute(f'DROP INDEX {_q(nombre)}')
+        for nombre, _ in claves_foraneas:
+            cursor.execute(f'ALTER TABLE {_q(antigua)} DROP CONSTRAINT {_q(nombre)}')
+        cursor.execute(f'ALTER TABLE {_q(antigua)} DROP CONSTRAINT {_q(TABLA + "_pkey")}')
+        # La identidad de id se reemplaza por una secuencia: PostgreSQL < 17
+        # no admite columnas identity en tablas particionadas
+        cursor.execute(f'ALTER TABLE {_q(antigua)} ALTER COLUMN id DROP IDENTITY IF EXISTS')
+
+        cursor.execute(
+            f'CREATE TABLE {_q(TABLA)} (LIKE {_q(antigua)} INCLUDING DEFAULTS INCLUDING GENERATED) '
+            f'PARTITION BY RANGE (fecha)'
+        )
+        cursor.execute(f'CREATE SEQUENCE {_q(secuencia)} OWNED BY {_q(TABLA)}.id')
+        cursor.execute(
+            f"ALTER TABLE {_q(TABLA)} ALTER COLUMN id SET DEFAULT nextval('{secuencia}')"
+        )
+        if max_id is not None:
+            cursor.execute('SELECT setval(%s, %s)', [secuencia, max_id])
+
+        hoy = date.today()
+        fin = hoy + timedelta(days=31 * meses_adelante)
+        for inicio in _rangos(min(minimo or hoy, hoy), max(maximo or fin, fin), intervalo):
+            _crear_particion(cursor, inicio, _siguiente(inicio, intervalo), intervalo)
+        cursor.execute(f'CREATE TABLE {_q(_por_defecto())} PARTITION OF {_q(TABLA)} DEFAULT')
+
+        columnas = _columnas(cursor, antigua)
+        cursor.execute(f'INSERT INTO {_q(TABLA)} ({columnas}) SELECT {columnas} FROM {_q(antigua)}')
+        if cursor.rowcount != filas:
+            raise RuntimeError(f'Se copiaron {cursor.rowcount} de {filas} filas')
+
+        cursor.execute(
+            f'ALTER TABLE {_q(TABLA)} ADD CONSTRAINT {_q(TABLA + "_pkey")} PRIMARY KEY (id, fecha)'
+        )
+        for nombre, definicion in claves_foraneas:
+            cursor.execute(f'ALTER TABLE {_q(TABLA)} ADD CONSTRAINT {_q(nombre)} {definicion}')
+        for _, definicion in indices:
+            cursor.execute(definicion)
+        cursor.execute(f'DROP TABLE {_q(antigua)}')
+    # Estadísticas y mapa de visibilidad de las particiones nuevas, para que
+    # los conteos por usuario usen index-only scans desde el principio.
+    # VACUUM no puede ejecutarse dentro de una transacción.
+    with connection.cursor() as cursor:
+        comando = 'ANALYZE' if connection.in_atomic_block else 'VACUUM (ANALYZE)'
+        cursor.execute(f'{comando} {_q(TABLA)}')
+    return filas
+
+
+def _crear_particion(cursor, desde, hasta, intervalo):
+    cursor.execute(
+        f'CREATE TABLE {_q(_nombre(desde, intervalo))} PARTITION OF {_q(TABLA)} '
+        f'FOR VALUES FROM (%s) TO (%s)',
+        [desde, hasta],
+    )
+
+
+def crear_particiones(hasta):
+    """
+    Crea las particiones que faltan desde la más antigua hasta la que
+    contiene `hasta`, y las de los rangos con filas en la partición por
+    defecto (fechas anteriores a la primera partición). Esas filas pasan a
+    la partición nueva. Devuelve los nombres creados.
+    """
+    existentes = particiones()
+    intervalo = _intervalo_actual(existentes)
+    ocupados = {p.desde for p in existentes if p.desde}
+    por_defecto = _por_defecto()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT DISTINCT date_trunc(%s, fecha)::date FROM {_q(por_defecto)} WHERE fecha <= %s",
+            ['month' if intervalo == 'mensual' else 'year', hasta],
+        )
+        pendientes = {fila[0] for fila in cursor.fetchall()}
+    creadas = []
+    for inicio in sorted(pendientes.union(_rangos(min(ocupados), hasta, intervalo))):
+        if inicio in ocupados:
+            continue
+        fin = _siguiente(inicio, intervalo)
+        with transaction.atomic(), connection.cursor() as cursor:
+            _sin_verificaciones_pendientes()
+            columnas = _columnas(cursor, TABLA)
+            # PostgreSQL no deja crear la partición si la de por defecto
+            # tiene filas de su rango: se sacan y se vuelven a insertar
+            cursor.execute(
+                f'CREATE TEMPORARY TABLE particion_pendiente ON COMMIT DROP AS '
+                f'SELECT {columnas} FROM {_q(por_defecto)} WHERE fecha >= %s AND fecha < %s',
+                [inicio, fin],
+            )
+            cursor.execute(
+                f'DELETE FROM {_q(por_defecto)} WHERE fecha >= %s AND fecha < %s', [inicio, fin]
+            )
+            _crear_particion(cursor, inicio, fin, intervalo)
+            cursor.execute(f'INSERT INTO {_q(TABLA)} ({columnas}) SELECT {columnas} FROM particion_pendiente')
+            cursor.execute('DROP TABLE particion_pendiente')
+        creadas.append(_nombre(inicio, intervalo))
+    return creadas
+
+
+def separar_particiones(antes_de, borrar=False):
+    """
+    Desengancha las particiones que terminan en o antes de `antes_de`: sus
+    movimientos dejan de verse en la API y se restan de los acumulados. La
+    tabla queda en la base de datos como archivo, salvo con borrar=True.
+    Devuelve los nombres de las particiones separadas.
+    """
+    separadas = []
+    for particion in particiones():
+        if particion.hasta is None or particion.hasta > antes_de:
+            continue
+        with transaction.atomic(), connection.cursor() as cursor:
+            _sin_verificaciones_pendientes()
+            nombre = _q(particion.nombre)
+            cursor.execute(f'SELECT DISTINCT user_id FROM {nombre}')
+            cache_reportes.invalidar_al_confirmar(*(fila[0] for fila in cursor.fetchall()))
+            resumenes.registrar_baja_sql(f'SELECT user_id, fecha, categoria, monto FROM {nombre}')
+            cursor.execute(f'ALTER TABLE {_q(TABLA)} DETACH PARTITION {nombre}')
+            if borrar:
+                cursor.execute(f'DROP TABLE {nombre}')
+        separadas.append(particion.nombre)
+    return separadas
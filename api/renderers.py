@@ -0,0 +1,57 @@
+import msgpack
+import orjson
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+from .metricas import serializacion
+
+_encoder = JSONEncoder()
+
+# Fechas y horas pasan por el encoder de DRF ('Z' en lugar de '+00:00')
+OPCIONES = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer que serializa con orjson. Produce los mismos bytes que el
+    renderer de DRF con la configuración por defecto (compacto, UTF-8 y
+    \\u2028/\\u2029 escapados): los tipos que orjson no conoce, o que
+    representaría distinto, se convierten con el encoder de DRF.
+
+    Con indentación (API navegable, 'application/json; indent=4') o si
+    orjson no puede serializar los datos, usa el renderer de DRF.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with serializacion():
+            return self._render(data, accepted_media_type, renderer_context)
+
+    def _render(self, data, accepted_media_type, renderer_context):
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=_encoder.default, option=OPCIONES)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    MessagePack (Accept: application/msgpack o ?format=msgpack) con los
+    mismos datos que la respuesta JSON: mismas claves y los montos como
+    texto decimal exacto. Más compacto que JSON y sin parsear texto en el
+    cliente.
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with serializacion():
+            if data is None:
+                return b''
+            # Fechas, Decimal y demás tipos que msgpack no conoce: como en JSON
+            return msgpack.packb(data, default=_encoder.default, datetime=False)
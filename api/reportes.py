@@ -0,0 +1,344 @@
+from datetime import date, timedelta
+from django.db import connection
+from django.db.models import Sum, Count, Q
+from .filtros import AGRUPACIONES
+from .models import MovimientoFinanciero, ResumenDiario, ResumenMensual
+from .serializers import COLUMNAS, representar_filas
+
+
+def rango_mes(año, mes):
+    """
+    Devuelve el rango [inicio, fin) que cubre un mes completo.
+
+    Filtrar con fecha__gte/fecha__lt permite usar los índices sobre `fecha`,
+    a diferencia de fecha__year/fecha__month que aplican funciones a la columna.
+    Lanza ValueError si el año o el mes no son válidos.
+    """
+    inicio = date(año, mes, 1)
+    if mes == 12:
+        fin = date(año + 1, 1, 1)
+    else:
+        fin = date(año, mes + 1, 1)
+    return inicio, fin
+
+
+def movimientos_en_rango(user, fecha_desde=None, fecha_hasta=None):
+    """
+    Movimientos del usuario con fecha en [fecha_desde, fecha_hasta] (ambos opcionales).
+    """
+    queryset = MovimientoFinanciero.objects.filter(user=user)
+    if fecha_desde:
+        queryset = queryset.filter(fecha__gte=fecha_desde)
+    if fecha_hasta:
+        queryset = queryset.filter(fecha__lte=fecha_hasta)
+    return queryset
+
+
+def calcular_totales(queryset):
+    """
+    Calcula totales, conteos y balance por categoría en una sola consulta
+    usando agregación condicional.
+    """
+    datos = queryset.aggregate(
+        total_ingresos=Sum('monto', filter=Q(categoria='ingreso')),
+        total_gastos=Sum('monto', filter=Q(categoria='gasto')),
+        total_movimientos=Count('id'),
+        movimientos_ingresos=Count('id', filter=Q(categoria='ingreso')),
+        movimientos_gastos=Count('id', filter=Q(categoria='gasto')),
+    )
+    datos['total_ingresos'] = datos['total_ingresos'] or 0
+    datos['total_gastos'] = datos['total_gastos'] or 0
+    datos['balance'] = datos['total_ingresos'] - datos['total_gastos']
+    return datos
+
+
+def _totales_acumulados():
+    return {
+        'total_ingresos': Sum('total', filter=Q(categoria='ingreso')),
+        'total_gastos': Sum('total', filter=Q(categoria='gasto')),
+        'total_movimientos': Sum('cantidad'),
+        'movimientos_ingresos': Sum('cantidad', filter=Q(categoria='ingreso')),
+        'movimientos_gastos': Sum('cantidad', filter=Q(categoria='gasto')),
+    }
+
+
+def _completar_totales(datos):
+    for campo in datos:
+        datos[campo] = datos[campo] or 0
+    datos['balance'] = datos['total_ingresos'] - datos['total_gastos']
+    return datos
+
+
+def calcular_totales_acumulados(queryset):
+    """
+    Igual que calcular_totales pero sobre ResumenDiario/ResumenMensual,
+    sumando filas ya agregadas en lugar de movimientos.
+    """
+    return _completar_totales(queryset.aggregate(**_totales_acumulados()))
+
+
+async def acalcular_totales_acumulados(queryset):
+    return _completar_totales(await queryset.aaggregate(**_totales_acumulados()))
+
+
+def _es_inicio_de_mes(fecha):
+    return fecha is None or fecha.day == 1
+
+
+def _es_fin_de_mes(fecha):
+    return fecha is None or (fecha + timedelta(days=1)).day == 1
+
+
+def _acumulados_en_rango(user, fecha_desde, fecha_hasta):
+    """
+    Acumulados mensuales si el rango cubre meses completos y diarios en otro
+    caso, de modo que el costo depende de la longitud del rango y no de la
+    cantidad de movimientos.
+    """
+    if _es_inicio_de_mes(fecha_desde) and _es_fin_de_mes(fecha_hasta):
+        queryset = ResumenMensual.objects.filter(user=user)
+        if fecha_desde:
+            queryset = queryset.filter(mes__gte=fecha_desde)
+        if fecha_hasta:
+            queryset = queryset.filter(mes__lte=fecha_hasta)
+    else:
+        queryset = ResumenDiario.objects.filter(user=user)
+        if fecha_desde:
+            queryset = queryset.filter(fecha__gte=fecha_desde)
+        if fecha_hasta:
+            queryset = queryset.filter(fecha__lte=fecha_hasta)
+    return queryset
+
+
+def resumen(user, fecha_desde=None, fecha_hasta=None):
+    """
+    Totales del usuario en un rango de fechas opcional (1 consulta).
+    """
+    return calcular_totales_acumulados(_acumulados_en_rango(user, fecha_desde, fecha_hasta))
+
+
+async def aresumen(user, fecha_desde=None, fecha_hasta=None):
+    """
+    Versión async de resumen para las vistas ASGI.
+    """
+    return await acalcular_totales_acumulados(_acumulados_en_rango(user, fecha_desde, fecha_hasta))
+
+
+def _top_del_mes(user, inicio, fin, top):
+    queryset = MovimientoFinanciero.objects.filter(
+        user=user,
+        fecha__gte=inicio,
+        fecha__lt=fin,
+    )
+    # Mismo desempate que _top_por_mes
+    return queryset.order_by('-monto', '-id').values(*COLUMNAS)[:top]
+
+
+def reporte_mensual(user, año, mes, top=5):
+    """
+    Totales del mes y los `top` movimientos de mayor monto (2 consultas),
+    estos ya con la forma de MovimientoFinancieroSerializer.
+    """
+    inicio, fin = rango_mes(año, mes)
+    datos = calcular_totales_acumulados(
+        ResumenMensual.objects.filter(user=user, mes=inicio)
+    )
+    datos['top_movimientos'] = representar_filas(_top_del_mes(user, inicio, fin, top))
+    return datos
+
+
+async def areporte_mensual(user, año, mes, top=5):
+    """
+    Versión async de reporte_mensual para las vistas ASGI.
+    """
+    inicio, fin = rango_mes(año, mes)
+    datos = await acalcular_totales_acumulados(
+        ResumenMensual.objects.filter(user=user, mes=inicio)
+    )
+    datos['top_movimientos'] = representar_filas([m async for m in _top_del_mes(user, inicio, fin, top)])
+    return datos
+
+
+def _top_por_mes(user, desde, fin, top):
+    """
+    Los `top` movimientos de mayor monto de cada mes en [desde, fin), en una
+    sola consulta: ROW_NUMBER() numera los movimientos de cada mes por monto
+    y se conservan los primeros. Devuelve {primer día del mes: filas}.
+    """
+    columnas = ', '.join(connection.ops.quote_name(columna) for columna in COLUMNAS)
+    # Truncado como timestamp sin zona, igual que en serie()
+    mes = "date_trunc('month', fecha::timestamp)"
+    sql = f"""
+        SELECT {columnas}, mes::date
+        FROM (
+            SELECT {columnas}, {mes} AS mes,
+                   ROW_NUMBER() OVER (PARTITION BY {mes} ORDER BY monto DESC, id DESC) AS posicion
+            FROM {connection.ops.quote_name(MovimientoFinanciero._meta.db_table)}
+            WHERE user_id = %(user)s AND fecha >= %(desde)s AND fecha < %(fin)s
+        ) AS movimientos
+        WHERE posicion <= %(top)s
+        ORDER BY mes, posicion
+    """
+    por_mes = {}
+    if top == 0:
+        return por_mes
+    with connection.cursor() as cursor:
+        cursor.execute(sql.strip(), {'user': user.pk, 'desde': desde, 'fin': fin, 'top': top})
+        for *valores, inicio in cursor.fetchall():
+            por_mes.setdefault(inicio, []).append(dict(zip(COLUMNAS, valores)))
+    return por_mes
+
+
+def reporte_periodo(user, desde, hasta, top=5):
+    """
+    reporte_mensual de cada mes entre desde y hasta (primeros días de mes,
+    ambos incluidos) en 2 consultas en total: los totales de todos los meses
+    con un GROUP BY sobre ResumenMensual y los top de todos con _top_por_mes.
+    Devuelve una lista de (año, mes, reporte), también para los meses sin
+    movimientos.
+    """
+    _, fin = rango_mes(hasta.year, hasta.month)
+    totales = {
+        fila.pop('mes'): _completar_totales(fila)
+        for fila in ResumenMensual.objects.filter(user=user, mes__gte=desde, mes__lt=fin)
+        .values('mes').annotate(**_totales_acumulados()).order_by('mes')
+    }
+    tops = _top_por_mes(user, desde, fin, top)
+
+    resultado = []
+    inicio = desde
+    while inicio < fin:
+        datos = totales.get(inicio) or _completar_totales(dict.fromkeys(_totales_acumulados()))
+        datos['top_movimientos'] = representar_filas(tops.get(inicio, []))
+        resultado.append((inicio.year, inicio.month, datos))
+        inicio = rango_mes(inicio.year, inicio.month)[1]
+    return resultado
+
+
+def serie(user, agrupar_por, fecha_desde, fecha_hasta):
+    """
+    Totales por periodo (día, semana, mes o año) entre fecha_desde y
+    fecha_hasta en una sola consulta: date_trunc + GROUP BY sobre los
+    acumulados, y generate_series para incluir los periodos sin movimientos.
+    Cada periodo se identifica por su primer día; el primero y el último
+    solo suman los días dentro del rango.
+    """
+    unidad = AGRUPACIONES[agrupar_por]
+    # Meses y años completos salen de ResumenMensual, el resto de ResumenDiario
+    if agrupar_por in ('mes', 'año') and _es_inicio_de_mes(fecha_desde) and _es_fin_de_mes(fecha_hasta):
+        tabla, columna = ResumenMensual._meta.db_table, 'mes'
+    else:
+        tabla, columna = ResumenDiario._meta.db_table, 'fecha'
+    # Las fechas se truncan como timestamp sin zona: el resultado no depende
+    # de la zona horaria de la sesión
+    sql = f"""
+        SELECT serie.periodo::date,
+               COALESCE(totales.ingresos, 0), COALESCE(totales.gastos, 0),
+               COALESCE(totales.movimientos_ingresos, 0), COALESCE(totales.movimientos_gastos, 0)
+        FROM generate_series(
+            date_trunc(%(unidad)s, %(desde)s::timestamp),
+            %(hasta)s::timestamp,
+            ('1 ' || %(unidad)s)::interval
+        ) AS serie (periodo)
+        LEFT JOIN (
+            SELECT date_trunc(%(unidad)s, {columna}::timestamp) AS periodo,
+                   sum(total) FILTER (WHERE categoria = 'ingreso') AS ingresos,
+                   sum(total) FILTER (WHERE categoria = 'gasto') AS gastos,
+                   sum(cantidad) FILTER (WHERE categoria = 'ingreso') AS movimientos_ingresos,
+                   sum(cantidad) FILTER (WHERE categoria = 'gasto') AS movimientos_gastos
+            FROM {connection.ops.quote_name(tabla)}
+            WHERE user_id = %(user)s AND {columna} >= %(desde)s AND {columna} <= %(hasta)s
+            GROUP BY 1
+        ) AS totales USING (periodo)
+        ORDER BY 1
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql.strip(), {
+            'unidad': unidad, 'desde': fecha_desde, 'hasta': fecha_hasta, 'user': user.pk,
+        })
+        return cursor.fetchall()
+
+
+def datos_resumen(totales, fecha_desde, fecha_hasta):
+    """
+    Cuerpo de la respuesta de /resumen/.
+    """
+    return {
+        'resumen': {
+            'total_ingresos': float(totales['total_ingresos']),
+            'total_gastos': float(totales['total_gastos']),
+            'balance': float(totales['balance']),
+            'total_movimientos': totales['total_movimientos'],
+            'movimientos_ingresos': totales['movimientos_ingresos'],
+            'movimientos_gastos': totales['movimientos_gastos'],
+        },
+        'rango_fechas': {
+            'fecha_desde': fecha_desde,
+            'fecha_hasta': fecha_hasta,
+        }
+    }
+
+
+def _datos_mes(año, mes, reporte):
+    return {
+        'año': año,
+        'mes': mes,
+        'total_ingresos': float(reporte['total_ingresos']),
+        'total_gastos': float(reporte['total_gastos']),
+        'balance': float(reporte['balance']),
+        'total_movimientos': reporte['total_movimientos'],
+        'top_movimientos': reporte['top_movimientos']
+    }
+
+
+def datos_reporte_mensual(año, mes, reporte):
+    """
+    Cuerpo de la respuesta de /reporte_mensual/.
+    """
+    return {'reporte_mensual': _datos_mes(año, mes, reporte)}
+
+
+def datos_reporte_periodo(desde, hasta, reportes):
+    """
+    Cuerpo de la respuesta de /reporte_periodo/: los totales del periodo y
+    cada mes con la forma de /reporte_mensual/.
+    """
+    meses = [_datos_mes(año, mes, reporte) for año, mes, reporte in reportes]
+    ingresos = sum(reporte['total_ingresos'] for _, _, reporte in reportes)
+    gastos = sum(reporte['total_gastos'] for _, _, reporte in reportes)
+    return {
+        'reporte_periodo': {
+            'mes_desde': f'{desde:%Y-%m}',
+            'mes_hasta': f'{hasta:%Y-%m}',
+            'total_ingresos': float(ingresos),
+            'total_gastos': float(gastos),
+            'balance': float(ingresos - gastos),
+            'total_movimientos': sum(mes['total_movimientos'] for mes in meses),
+            'meses': meses,
+        }
+    }
+
+
+def datos_serie(agrupar_por, fecha_desde, fecha_hasta, zona, filas):
+    """
+    Cuerpo de la respuesta de /serie/.
+    """
+    return {
+        'serie': {
+            'agrupar_por': agrupar_por,
+            'fecha_desde': fecha_desde.isoformat(),
+            'fecha_hasta': fecha_hasta.isoformat(),
+            'zona': str(zona),
+            'periodos': [
+                {
+                    'periodo': periodo.isoformat(),
+                    'total_ingresos': float(ingresos),
+                    'total_gastos': float(gastos),
+                    'balance': float(ingresos - gastos),
+                    'movimientos_ingresos': movimientos_ingresos,
+                    'movimientos_gastos': movimientos_gastos,
+                }
+                for periodo, ingresos, gastos, movimientos_ingresos, movimientos_gastos in filas
+            ],
+        }
+    }
@@ -0,0 +1,236 @@
+from collections import defaultdict
+from decimal import Decimal
+from django.db import connection, transaction
+from django.db.models import Sum, Count
+from django.db.models.functions import TruncMonth
+from .models import MovimientoFinanciero, ResumenDiario, ResumenMensual
+from . import cache_reportes
+
+# Filas de acumulados por INSERT (5 parámetros por fila)
+FILAS_POR_SENTENCIA = 5000
+
+
+def _clave(movimiento):
+    return (movimiento.user_id, movimiento.fecha, movimiento.categoria)
+
+
+def _aplicar(deltas):
+    """
+    Suma a los acumulados diarios y mensuales los deltas
+    {(user_id, fecha, categoria): [total, cantidad]}.
+    Debe ejecutarse dentro de la misma transacción que modifica los movimientos.
+    También invalida los reportes en caché de esos usuarios al confirmar.
+    """
+    cache_reportes.invalidar_al_confirmar(*(user_id for user_id, _, _ in deltas))
+
+    mensuales = defaultdict(lambda: [Decimal('0'), 0])
+    for (user_id, fecha, categoria), (total, cantidad) in deltas.items():
+        acumulado = mensuales[(user_id, fecha.replace(day=1), categoria)]
+        acumulado[0] += total
+        acumulado[1] += cantidad
+
+    for modelo, campo, filas in (
+        (ResumenDiario, 'fecha', deltas),
+        (ResumenMensual, 'mes', mensuales),
+    ):
+        # Orden estable para que transacciones concurrentes bloqueen filas en el mismo orden
+        valores = [
+            (user_id, fecha, categoria, total, cantidad)
+            for (user_id, fecha, categoria), (total, cantidad) in sorted(filas.items())
+            if total or cantidad
+        ]
+        if valores:
+            _sumar(modelo, campo, valores)
+
+
+def _insertar_o_sumar(modelo, campo, origen):
+    """
+    INSERT ... ON CONFLICT DO UPDATE que suma las filas (user_id, campo,
+    categoria, total, cantidad) de `origen` (VALUES o SELECT) a los acumulados.
+    """
+    tabla = connection.ops.quote_name(modelo._meta.db_table)
+    campo = connection.ops.quote_name(campo)
+    return (
+        f'INSERT INTO {tabla} (user_id, {campo}, categoria, total, cantidad) {origen} '
+        f'ON CONFLICT (user_id, {campo}, categoria) DO UPDATE SET '
+        f'total = {tabla}.total + EXCLUDED.total, '
+        f'cantidad = {tabla}.cantidad + EXCLUDED.cantidad'
+    )
+
+
+def _sumar(modelo, campo, valores):
+    """
+    Inserta o incrementa filas de acumulados, FILAS_POR_SENTENCIA por
+    sentencia: PostgreSQL admite como mucho 65535 parámetros por consulta.
+    """
+    with connection.cursor() as cursor:
+        for inicio in range(0, len(valores), FILAS_POR_SENTENCIA):
+            lote = valores[inicio:inicio + FILAS_POR_SENTENCIA]
+            origen = f'VALUES {", ".join(["(%s, %s, %s, %s, %s)"] * len(lote))}'
+            cursor.execute(
+                _insertar_o_sumar(modelo, campo, origen),
+                [valor for fila in lote for valor in fila],
+            )
+
+
+def _registrar_sql(consulta, params, signo):
+    with connection.cursor() as cursor:
+        for modelo, campo, clave in (
+            (ResumenDiario, 'fecha', 'fecha'),
+            (ResumenMensual, 'mes', "date_trunc('month', fecha)::date"),
+        ):
+            origen = (
+                f'SELECT user_id, {clave}, categoria, {signo}sum(monto), {signo}count(*) '
+                f'FROM ({consulta}) AS filas (user_id, fecha, categoria, monto) '
+                f'GROUP BY 1, 2, 3 ORDER BY 1, 2, 3'
+            )
+            cursor.execute(_insertar_o_sumar(modelo, campo, origen), params)
+
+
+def registrar_alta_sql(consulta, params=()):
+    """
+    Suma a los acumulados las filas (user_id, fecha, categoria, monto) que
+    devuelve una consulta SQL, agrupando en la base de datos. Pensado para
+    cargas masivas donde los movimientos nunca pasan por Python.
+    """
+    _registrar_sql(consulta, params, '')
+
+
+def registrar_baja_sql(consulta, params=()):
+    """
+    Como registrar_alta_sql, pero resta las filas de los acumulados.
+    """
+    _registrar_sql(consulta, params, '-')
+
+
+def registrar_alta(*movimientos):
+    """
+    Suma los movimientos recién creados a los acumulados.
+    """
+    deltas = defaultdict(lambda: [Decimal('0'), 0])
+    for movimiento in movimientos:
+        delta = deltas[_clave(movimiento)]
+        delta[0] += movimiento.monto
+        delta[1] += 1
+    _aplicar(deltas)
+
+
+def registrar_baja(*movimientos):
+    """
+    Resta de los acumulados los movimientos que se van a eliminar.
+    """
+    deltas = defaultdict(lambda: [Decimal('0'), 0])
+    for movimiento in movimientos:
+        delta = deltas[_clave(movimiento)]
+        delta[0] -= movimiento.monto
+        delta[1] -= 1
+    _aplicar(deltas)
+
+
+def registrar_cambio(anterior, actual):
+    """
+    Ajusta los acumulados cuando un movimiento cambia de fecha, categoría o monto.
+    """
+    deltas = defaultdict(lambda: [Decimal('0'), 0])
+    deltas[_clave(anterior)][0] -= anterior.monto
+    deltas[_clave(anterior)][1] -= 1
+    deltas[_clave(actual)][0] += actual.monto
+    deltas[_clave(actual)][1] += 1
+    _aplicar(deltas)
+
+
+def estado_guardado(movimiento):
+    """
+    Lee y bloquea la versión guardada de un movimiento antes de modificarlo,
+    para calcular el delta sobre los valores reales de la base de datos.
+    """
+    return (
+        MovimientoFinanciero.objects
+        .select_for_update()
+        .only('user_id', 'fecha', 'categoria', 'monto')
+        .get(pk=movimiento.pk)
+    )
+
+
+def calcular_diarios(movimientos):
+    return (
+        movimientos
+        .order_by()
+        .values('user_id', 'fecha', 'categoria')
+        .annotate(total=Sum('monto'), cantidad=Count('id'))
+    )
+
+
+def calcular_mensuales(movimientos):
+    return (
+        movimientos
+        .order_by()
+        .annotate(mes=TruncMonth('fecha'))
+        .values('user_id', 'mes', 'categoria')
+        .annotate(total=Sum('monto'), cantidad=Count('id'))
+    )
+
+
+def reconstruir(usuarios=None):
+    """
+    Recalcula los acumulados desde los movimientos. Si se indican usuarios
+    solo se reconstruyen los suyos.
+    """
+    movimientos = MovimientoFinanciero.objects.all()
+    diarios = ResumenDiario.objects.all()
+    mensuales = ResumenMensual.objects.all()
+    if usuarios is not None:
+        movimientos = movimientos.filter(user__in=usuarios)
+        diarios = diarios.filter(user__in=usuarios)
+        mensuales = mensuales.filter(user__in=usuarios)
+
+    with transaction.atomic():
+        afectados = set(diarios.values_list('user_id', flat=True).distinct())
+        afectados.update(movimientos.order_by().values_list('user_id', flat=True).distinct())
+        cache_reportes.invalidar_al_confirmar(*afectados)
+
+        diarios.delete()
+        mensuales.delete()
+        ResumenDiario.objects.bulk_create(
+            (ResumenDiario(**fila) for fila in calcular_diarios(movimientos).iterator()),
+            batch_size=1000,
+        )
+        ResumenMensual.objects.bulk_create(
+            (ResumenMensual(**fila) for fila in calcular_mensuales(movimientos).iterator()),
+            batch_size=1000,
+        )
+
+
+def verificar(usuarios=None):
+    """
+    Compara los acumulados guardados con los calculados desde los movimientos.
+    Devuelve una lista de diferencias (modelo, clave, esperado, guardado).
+    """
+    movimientos = MovimientoFinanciero.objects.all()
+    diarios = ResumenDiario.objects.all()
+    mensuales = ResumenMensual.objects.all()
+    if usuarios is not None:
+        movimientos = movimientos.filter(user__in=usuarios)
+        diarios = diarios.filter(user__in=usuarios)
+        mensuales = mensuales.filter(user__in=usuarios)
+
+    diferencias = []
+    for modelo, campo, esperados, guardados in (
+        (ResumenDiario, 'fecha', calcular_diarios(movimientos), diarios),
+        (ResumenMensual, 'mes', calcular_mensuales(movimientos), mensuales),
+    ):
+        esperado = {
+            (fila['user_id'], fila[campo], fila['categoria']): (fila['total'], fila['cantidad'])
+            for fila in esperados
+        }
+        guardado = {
+            (fila['user_id'], fila[campo], fila['categoria']): (fila['total'], fila['cantidad'])
+            for fila in guardados.values('user_id', campo, 'categoria', 'total', 'cantidad')
+            if fila['cantidad'] or fila['total']
+        }
+        for clave in sorted(esperado.keys() | guardado.keys()):
+            if esperado.get(clave) != guardado.get(clave):
+                diferencias.append(
+                    (modelo.__name__, clave, esperado.get(clave), guardado.get(clave))
+                )
+    return diferencias
@@ -0,0 +1,135 @@
+"""
+Saldo acumulado movimiento a movimiento, calculado en PostgreSQL con una
+función de ventana sobre (fecha, fecha_creacion, id).
+
+El saldo parte del saldo inicial del rango, que sale de los acumulados
+(ResumenMensual para los meses completos anteriores y ResumenDiario para
+los días del mes de fecha_desde), no de sumar todos los movimientos
+anteriores. Cada página continúa desde el último movimiento devuelto y su
+cursor lleva el saldo alcanzado, así que la ventana solo recorre las filas
+de la página pedida.
+"""
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from django.db.models import Case, DecimalField, F, Q, Sum, Value, When, Window
+from django.db.models.expressions import RowRange
+from .models import MovimientoFinanciero, ResumenDiario, ResumenMensual
+from .serializers import COLUMNAS, representar_filas
+
+ORDEN = ('fecha', 'fecha_creacion', 'id')
+
+_IMPORTE = Case(
+    When(categoria='ingreso', then=F('monto')),
+    default=-F('monto'),
+    output_field=DecimalField(max_digits=10, decimal_places=2),
+)
+
+
+def _balance(queryset):
+    datos = queryset.aggregate(
+        ingresos=Sum('total', filter=Q(categoria='ingreso')),
+        gastos=Sum('total', filter=Q(categoria='gasto')),
+    )
+    return (datos['ingresos'] or 0) - (datos['gastos'] or 0)
+
+
+def saldo_inicial(user, fecha_desde):
+    """
+    Saldo del usuario antes de fecha_desde, desde los acumulados (2 consultas
+    sobre filas ya agregadas). Sin fecha_desde el saldo inicial es 0.
+    """
+    if fecha_desde is None:
+        return Decimal('0')
+    inicio_mes = fecha_desde.replace(day=1)
+    saldo = _balance(ResumenMensual.objects.filter(user=user, mes__lt=inicio_mes))
+    if fecha_desde > inicio_mes:
+        saldo += _balance(ResumenDiario.objects.filter(
+            user=user, fecha__gte=inicio_mes, fecha__lt=fecha_desde,
+        ))
+    return Decimal(saldo)
+
+
+def movimientos_con_saldo(user, fecha_desde=None, fecha_hasta=None, inicial=0, despues_de=None):
+    """
+    Filas de .values(*COLUMNAS) en orden cronológico con la columna `saldo`:
+    `inicial` más la suma de ingresos menos gastos hasta cada movimiento.
+
+    `despues_de` es la clave (fecha, fecha_creacion, id) del último
+    movimiento ya devuelto; el filtro va en el WHERE, así que la ventana
+    empieza a sumar en la fila siguiente.
+    """
+    queryset = MovimientoFinanciero.objects.filter(user=user)
+    if fecha_desde:
+        queryset = queryset.filter(fecha__gte=fecha_desde)
+    if fecha_hasta:
+        queryset = queryset.filter(fecha__lte=fecha_hasta)
+    if despues_de is not None:
+        fecha, creacion, pk = despues_de
+        # (fecha, fecha_creacion, id) > clave, con fecha >= para que el índice
+        # pueda empezar el recorrido en `fecha`
+        queryset = queryset.filter(
+            Q(fecha__gte=fecha),
+            Q(fecha__gt=fecha)
+            | Q(fecha_creacion__gt=creacion)
+            | Q(fecha_creacion=creacion, id__gt=pk),
+        )
+    return queryset.order_by(*ORDEN).values(*COLUMNAS).annotate(
+        saldo=Value(inicial, output_field=DecimalField()) + Window(
+            Sum(_IMPORTE),
+            order_by=[F(campo).asc() for campo in ORDEN],
+            frame=RowRange(start=None, end=0),
+        ),
+    )
+
+
+def pagina(user, fecha_desde, fecha_hasta, cursor, cantidad):
+    """
+    Devuelve (filas, saldo antes de la página, cursor siguiente o None).
+    """
+    if cursor is None:
+        inicial, despues_de = saldo_inicial(user, fecha_desde), None
+    else:
+        inicial, despues_de = cursor
+    filas = list(movimientos_con_saldo(
+        user, fecha_desde, fecha_hasta, inicial, despues_de
+    )[:cantidad + 1])
+    siguiente = None
+    if len(filas) > cantidad:
+        filas = filas[:cantidad]
+        ultima = filas[-1]
+        siguiente = codificar_cursor(ultima['saldo'], [ultima[campo] for campo in ORDEN])
+    return filas, inicial, siguiente
+
+
+def representar(filas):
+    """
+    Filas de movimientos_con_saldo -> salida de MovimientoFinancieroSerializer con `saldo`.
+    """
+    return [
+        {**datos, 'saldo': str(fila['saldo'])}
+        for fila, datos in zip(filas, representar_filas(filas))
+    ]
+
+
+def codificar_cursor(saldo, clave):
+    fecha, creacion, pk = clave
+    datos = {'s': str(saldo), 'f': fecha.isoformat(), 'c': creacion.isoformat(), 'id': pk}
+    return urlsafe_b64encode(json.dumps(datos, separators=(',', ':')).encode()).decode()
+
+
+def decodificar_cursor(cursor):
+    """
+    (saldo, (fecha, fecha_creacion, id)) del cursor. Lanza ValueError si no es válido.
+    """
+    try:
+        datos = json.loads(urlsafe_b64decode(cursor.encode()))
+        clave = (
+            date.fromisoformat(datos['f']),
+            datetime.fromisoformat(datos['c']),
+            int(datos['id']),
+        )
+        return Decimal(datos['s']), clave
+    except (TypeError, KeyError, InvalidOperation, ValueError) as error:
+        raise ValueError('Cursor inválido') from error
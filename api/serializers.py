@@ -1,8 +1,24 @@
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
+from rest_framework.authtoken.serializers import AuthTokenSerializer
 from .models import MovimientoFinanciero
+from .metricas import serializacion
+from . import cuentas
 
 class MovimientoFinancieroSerializer(serializers.ModelSerializer):
     categoria_display = serializers.CharField(source='get_categoria_display', read_only=True)
+
+    def __init__(self, *args, campos=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Solo los campos pedidos con fields= / exclude= (ver filtros.parametros_campos)
+        if campos is not None:
+            for campo in set(self.fields) - set(campos):
+                self.fields.pop(campo)
+
+    def to_representation(self, instance):
+        with serializacion():
+            return super().to_representation(instance)
     
     class Meta:
         model = MovimientoFinanciero
@@ -21,4 +37,92 @@ class MovimientoFinancieroSerializer(serializers.ModelSerializer):
         from datetime import date
         if value > date.today():
             raise serializers.ValidationError("La fecha no puede ser futura")
-        return value 
\ No newline at end of file
+        return value 
+
+
+# Ruta de lectura: la misma salida que MovimientoFinancieroSerializer pero
+# construida directamente desde filas de .values(), sin instanciar modelos
+# ni recorrer los campos del serializer.
+CAMPOS = MovimientoFinancieroSerializer.Meta.fields
+COLUMNAS = [campo for campo in CAMPOS if campo != 'categoria_display']
+CATEGORIAS = dict(MovimientoFinanciero.CATEGORIA_CHOICES)
+# Columna de la que sale cada campo que no es una columna
+_ORIGEN = {'categoria_display': 'categoria'}
+
+
+def columnas_para(campos):
+    """
+    Columnas que hay que leer para representar `campos` (todas si es None).
+    """
+    if campos is None:
+        return COLUMNAS
+    necesarias = {_ORIGEN.get(campo, campo) for campo in campos}
+    return [columna for columna in COLUMNAS if columna in necesarias]
+
+
+def _fecha_hora(valor, zona):
+    # Mismo formato que DateTimeField de DRF
+    valor = valor.astimezone(zona).isoformat()
+    if valor.endswith('+00:00'):
+        valor = valor[:-6] + 'Z'
+    return valor
+
+
+# Representación de cada campo, para salidas con solo algunos campos
+_REPRESENTACION = {
+    'id': lambda fila, zona: fila['id'],
+    'descripcion': lambda fila, zona: fila['descripcion'],
+    'monto': lambda fila, zona: str(fila['monto']),
+    'categoria': lambda fila, zona: fila['categoria'],
+    'categoria_display': lambda fila, zona: CATEGORIAS.get(fila['categoria'], fila['categoria']),
+    'fecha': lambda fila, zona: fila['fecha'].isoformat(),
+    'notas': lambda fila, zona: fila['notas'],
+    'fecha_creacion': lambda fila, zona: _fecha_hora(fila['fecha_creacion'], zona),
+    'fecha_actualizacion': lambda fila, zona: _fecha_hora(fila['fecha_actualizacion'], zona),
+}
+
+
+def representar_fila(fila, zona=None, campos=None):
+    """
+    Dict de .values(*COLUMNAS) -> dict igual al de MovimientoFinancieroSerializer.
+
+    `zona` es la zona horaria de salida; al representar muchas filas conviene
+    obtenerla una sola vez (ver representar_filas). Con `campos` la salida
+    tiene solo esos campos y basta con que la fila traiga columnas_para(campos).
+    """
+    if zona is None:
+        zona = timezone.get_current_timezone()
+    if campos is not None:
+        return {campo: _REPRESENTACION[campo](fila, zona) for campo in campos}
+    return {
+        'id': fila['id'],
+        'descripcion': fila['descripcion'],
+        'monto': str(fila['monto']),
+        'categoria': fila['categoria'],
+        'categoria_display': CATEGORIAS.get(fila['categoria'], fila['categoria']),
+        'fecha': fila['fecha'].isoformat(),
+        'notas': fila['notas'],
+        'fecha_creacion': _fecha_hora(fila['fecha_creacion'], zona),
+        'fecha_actualizacion': _fecha_hora(fila['fecha_actualizacion'], zona),
+    }
+
+
+def representar_filas(filas, campos=None):
+    with serializacion():
+        zona = timezone.get_current_timezone()
+        return [representar_fila(fila, zona, campos) for fila in filas]
+
+
+class LoginSerializer(AuthTokenSerializer):
+    """
+    AuthTokenSerializer con la contraseña verificada en el pool de api.cuentas.
+    """
+
+    def validate(self, attrs):
+        user = cuentas.autenticar(attrs.get('username'), attrs.get('password'))
+        if user is None:
+            raise serializers.ValidationError(
+                _('Unable to log in with provided credentials.'), code='authorization'
+            )
+        attrs['user'] = user
+        return attrs
@@ -0,0 +1,35 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+from .autenticacion import invalidar_token
+from . import metricas
+
+
+def _invalidar(key):
+    # De nuevo al confirmar, por si otra petición volvió a cachear el token
+    # leyendo la base de datos antes del commit
+    invalidar_token(key)
+    transaction.on_commit(lambda: invalidar_token(key))
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def invalidar_token_guardado(sender, instance, **kwargs):
+    _invalidar(instance.key)
+
+
+@receiver(post_save, sender=User)
+def invalidar_tokens_usuario(sender, instance, created, **kwargs):
+    # El usuario en caché queda viejo ante cualquier cambio (is_active, is_staff...)
+    if created:
+        return
+    for key in Token.objects.filter(user=instance).values_list('key', flat=True):
+        _invalidar(key)
+
+
+@receiver(connection_created)
+def medir_consultas(sender, connection, **kwargs):
+    metricas.instalar(connection)
@@ -1,3 +1,1489 @@
-from django.test import TestCase
+import base64
+import csv
+import gzip
+import importlib
+import inspect
+import io
+import json
+import random
+import threading
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest.mock import patch
+import msgpack
+import zstandard
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+from django.test import AsyncClient, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import clear_url_caches, resolve
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from Movimientos_financieros import urls as urls_proyecto
+from .models import MovimientoFinanciero, ResumenDiario, ResumenMensual
+from .views import MovimientoFinancieroViewSet
+from . import urls as urls_api, vistas_async
+from . import arranque, autenticacion, benchmark, busqueda, compresion, cuentas, filtros, importacion, metricas, particiones, reportes, resumenes
 
-# Create your tests here.
+
+class PlanesDeConsultaTests(TestCase):
+    """
+    Ejecuta EXPLAIN sobre las consultas que emite cada endpoint y falla si
+    alguna recorre una tabla de api completa (Seq Scan) u ordena en memoria
+    (Sort) en lugar de usar un índice.
+
+    Con enable_seqscan/enable_sort desactivados el planificador solo recurre
+    a esos nodos cuando no existe un índice que los evite, así que el
+    resultado no depende del volumen de datos sembrado.
+    """
+    USUARIOS = 5
+    MOVIMIENTOS_POR_USUARIO = 400
+
+    @classmethod
+    def setUpTestData(cls):
+        rnd = random.Random(0)
+        cls.usuarios = [
+            User.objects.create_user(username=f'plan{i}', password='clave-segura')
+            for i in range(cls.USUARIOS)
+        ]
+        MovimientoFinanciero.objects.bulk_create(
+            MovimientoFinanciero(
+                user=usuario,
+                descripcion=f'Movimiento {n}',
+                monto=Decimal(rnd.randint(1, 500000)) / 100,
+                categoria=rnd.choice(['ingreso', 'gasto']),
+                fecha=date(2023, 1, 1) + timedelta(days=rnd.randint(0, 700)),
+            )
+            for usuario in cls.usuarios
+            for n in range(cls.MOVIMIENTOS_POR_USUARIO)
+        )
+        resumenes.reconstruir()
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def setUp(self):
+        # Los reportes en caché no ejecutarían consultas
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuarios[0])
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('SET LOCAL enable_sort = off')
+
+    def nodos(self, plan):
+        yield plan
+        for hijo in plan.get('Plans', []):
+            yield from self.nodos(hijo)
+
+    def assertSinScanNiSort(self, url, params=None, sort_permitido=False):
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(url, params or {})
+        self.assertEqual(respuesta.status_code, 200, respuesta.content)
+
+        sql_api = [
+            q['sql'] for q in consultas.captured_queries
+            if q['sql'].startswith('SELECT') and '"api_' in q['sql']
+        ]
+        self.assertTrue(sql_api, f'{url} no ejecutó consultas sobre api')
+        for sql in sql_api:
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+                plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            for nodo in self.nodos(plan[0]['Plan']):
+                tipo = nodo['Node Type']
+                relacion = nodo.get('Relation Name', '')
+                self.assertFalse(
+                    tipo == 'Seq Scan' and relacion.startswith('api_'),
+                    f'{url} {params}: Seq Scan sobre {relacion}\n{sql}',
+                )
+                if sort_permitido:
+                    continue
+                self.assertNotIn(
+                    tipo, ('Sort', 'Incremental Sort'),
+                    f'{url} {params}: {tipo} explícito\n{sql}',
+                )
+        return respuesta
+
+    def test_listado_con_cada_orden(self):
+        for campo in ['fecha', 'monto', 'fecha_creacion']:
+            for orden in ['asc', 'desc']:
+                params = {'ordenar_por': campo, 'orden': orden}
+                self.assertSinScanNiSort('/api/movimientos/', params)
+                self.assertSinScanNiSort('/api/movimientos/', {**params, 'page': 3})
+
+    def test_listado_con_filtros(self):
+        self.assertSinScanNiSort('/api/movimientos/', {'categoria': 'gasto'})
+        self.assertSinScanNiSort('/api/movimientos/', {
+            'categoria': 'ingreso',
+            'fecha_desde': '2023-03-01',
+            'fecha_hasta': '2023-09-30',
+        })
+        self.assertSinScanNiSort('/api/movimientos/', {
+            'fecha_desde': '2023-03-01',
+            'ordenar_por': 'monto',
+        })
+
+    def test_listado_por_cursor(self):
+        for campo in ['fecha', 'monto', 'fecha_creacion']:
+            for orden in ['asc', 'desc']:
+                params = {'ordenar_por': campo, 'orden': orden, 'paginacion': 'cursor'}
+                primera = self.assertSinScanNiSort('/api/movimientos/', params)
+                siguiente = self.assertSinScanNiSort(primera.json()['next'])
+                self.assertSinScanNiSort(siguiente.json()['previous'])
+
+    def test_cursor_invalido(self):
+        def cursor(datos):
+            return base64.urlsafe_b64encode(json.dumps(datos).encode()).decode()
+
+        for campo in ['fecha', 'monto', 'fecha_creacion']:
+            for valor in [[1], {'a': 1}, None, True, 20240101, 1e400, '2024-13-45', 'x', 'NaN', 'Infinity']:
+                respuesta = self.client.get('/api/movimientos/', {
+                    'ordenar_por': campo, 'cursor': cursor({'c': campo, 'v': valor, 'id': 1}),
+                })
+                self.assertEqual(respuesta.status_code, 404, (campo, valor))
+        for valor in ['no-es-un-cursor', cursor([]), cursor({'c': 'fecha', 'v': '2024-01-01', 'id': [1]})]:
+            self.assertEqual(self.client.get('/api/movimientos/', {'cursor': valor}).status_code, 404, valor)
+
+    def test_busqueda(self):
+        self.assertSinScanNiSort('/api/movimientos/', {'search': 'movimiento', 'ordenar_por': 'fecha'})
+        self.assertSinScanNiSort('/api/movimientos/', {'search': 'movimiento', 'paginacion': 'cursor'})
+        # Por relevancia se ordenan solo las coincidencias
+        self.assertSinScanNiSort('/api/movimientos/', {'search': 'movimiento'}, sort_permitido=True)
+
+    def test_detalle(self):
+        movimiento = MovimientoFinanciero.objects.filter(user=self.usuarios[0]).first()
+        self.assertSinScanNiSort(f'/api/movimientos/{movimiento.pk}/')
+
+    def test_resumen(self):
+        self.assertSinScanNiSort('/api/movimientos/resumen/')
+        self.assertSinScanNiSort('/api/movimientos/resumen/', {
+            'fecha_desde': '2023-02-01',
+            'fecha_hasta': '2023-05-31',
+        })
+        self.assertSinScanNiSort('/api/movimientos/resumen/', {
+            'fecha_desde': '2023-02-10',
+            'fecha_hasta': '2023-05-20',
+        })
+
+    def test_reporte_mensual(self):
+        self.assertSinScanNiSort('/api/movimientos/reporte_mensual/', {'año': 2023, 'mes': 6})
+
+    def test_reporte_periodo(self):
+        # ROW_NUMBER() ordena por monto los movimientos del usuario en el periodo
+        self.assertSinScanNiSort('/api/movimientos/reporte_periodo/', {'año': 2023}, sort_permitido=True)
+
+    def test_serie(self):
+        # Se ordenan los periodos generados (como mucho
+        # MOVIMIENTOS_MAX_PERIODOS_SERIE filas), no los movimientos
+        for agrupar_por in ['dia', 'semana', 'mes', 'año']:
+            self.assertSinScanNiSort('/api/movimientos/serie/', {
+                'agrupar_por': agrupar_por,
+                'fecha_desde': '2023-02-10',
+                'fecha_hasta': '2023-11-20',
+            }, sort_permitido=True)
+        self.assertSinScanNiSort('/api/movimientos/serie/', {
+            'fecha_desde': '2023-01-01',
+            'fecha_hasta': '2024-12-31',
+        }, sort_permitido=True)
+
+
+class BenchmarkTests(TestCase):
+    """
+    Ejecuta la siembra y todos los escenarios del benchmark con pocos datos
+    para que la suite no se rompa con cambios en la API.
+    """
+
+    def test_siembra_y_escenarios_sin_errores(self):
+        usuarios = benchmark.crear_usuarios(2, prefijo='prueba_bench')
+        benchmark.sembrar(usuarios, 2400, dias=400, lote=1000)
+        self.assertEqual(MovimientoFinanciero.objects.filter(user=usuarios[0]).count(), 1200)
+        self.assertEqual(resumenes.verificar(usuarios), [])
+
+        resultados = benchmark.ejecutar(usuarios[0], peticiones=1, peticiones_auth=1)
+
+        nombres = {nombre for nombre, *_ in benchmark.escenarios(1, 1)} | {'login'}
+        self.assertEqual(set(resultados), nombres)
+        for nombre, metricas in resultados.items():
+            self.assertEqual(metricas['errores'], 0, nombre)
+            self.assertGreater(metricas['consultas']['max'], 0, nombre)
+        # Lo creado durante el benchmark se revierte
+        self.assertEqual(MovimientoFinanciero.objects.filter(user=usuarios[0]).count(), 1200)
+        self.assertFalse(User.objects.filter(username__startswith='bench_registro_').exists())
+
+        formatos = benchmark.formatos(usuarios[0], repeticiones=1)
+        self.assertEqual(set(formatos), {nombre for nombre, *_ in benchmark.cargas_formatos()})
+        for nombre, medidas in formatos.items():
+            identidad = [medida['bytes'] for formato, medida in medidas.items() if formato.endswith('+identity')]
+            self.assertTrue(all(identidad), nombre)
+
+
+class MetricasTests(TestCase):
+    """
+    Cabecera Server-Timing, histogramas en /metrics y avisos de presupuesto
+    de consultas.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = User.objects.create_user(username='metricas', password='clave-segura')
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def test_server_timing(self):
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get('/api/movimientos/')
+        self.assertEqual(response.status_code, 200)
+        partes = [p.strip() for p in response['Server-Timing'].split(',')]
+        self.assertEqual([p.split(';')[0] for p in partes], ['total', 'db', 'serializacion'])
+        self.assertIn(f'desc="{len(consultas)} consultas"', partes[1])
+
+    def test_endpoint_prometheus(self):
+        self.client.get('/api/movimientos/resumen/')
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        texto = response.content.decode()
+        self.assertIn('http_request_db_queries_count{metodo="GET",vista="movimiento-resumen"}', texto)
+        self.assertIn('http_request_duration_seconds_bucket{estado="200",le="0.005",metodo="GET",vista="movimiento-resumen"}', texto)
+
+    def test_metricas_del_pool(self):
+        if connection.pool is None:
+            self.skipTest('DB_POOL desactivado')
+        texto = self.client.get('/metrics').content.decode()
+        self.assertIn('db_pool_max_connections', texto)
+        self.assertIn('db_pool_connections{estado="en_uso"}', texto)
+        self.assertIn('db_pool_checkouts_total', texto)
+
+    @override_settings(METRICAS_TOKEN='secreto')
+    def test_endpoint_con_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secreto').status_code, 200)
+
+    @override_settings(METRICAS_PRESUPUESTO_CONSULTAS={'movimiento-resumen': 0}, METRICAS_N_MAS_1=2)
+    def test_avisos_de_consultas(self):
+        with self.assertLogs(metricas.logger, 'WARNING') as logs:
+            self.client.get('/api/movimientos/resumen/')
+        self.assertIn('presupuesto 0', logs.output[0])
+
+
+class BusquedaTests(TestCase):
+    """
+    ?search= del listado y búsqueda del admin sobre el índice de texto completo.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = User.objects.create_superuser(username='busqueda', password='clave-segura')
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+        otro = User.objects.create_user(username='otro_busqueda', password='clave-segura')
+        datos = [
+            (self.usuario, 'Supermercado del barrio', None),
+            (self.usuario, 'Taxi al aeropuerto', 'Después del supermercado'),
+            (self.usuario, 'Factura de electricidad', None),
+            (otro, 'Supermercado', None),
+        ]
+        MovimientoFinanciero.objects.bulk_create(
+            MovimientoFinanciero(
+                user=user, descripcion=descripcion, notas=notas,
+                monto=Decimal('10.00'), categoria='gasto', fecha=date(2024, 1, 1),
+            )
+            for user, descripcion, notas in datos
+        )
+
+    def descripciones(self, **params):
+        respuesta = self.client.get('/api/movimientos/', params)
+        self.assertEqual(respuesta.status_code, 200)
+        return [fila['descripcion'] for fila in respuesta.data['results']]
+
+    def test_relevancia_y_plurales(self):
+        # La descripción pesa más que las notas; "supermercados" coincide por la raíz
+        self.assertEqual(
+            self.descripciones(search='supermercados'),
+            ['Supermercado del barrio', 'Taxi al aeropuerto'],
+        )
+        self.assertEqual(self.descripciones(search='facturas electricidad'), ['Factura de electricidad'])
+        self.assertEqual(self.descripciones(search='supermercado -barrio'), ['Taxi al aeropuerto'])
+        self.assertEqual(self.descripciones(search='inexistente'), [])
+
+    def test_con_orden_y_cursor(self):
+        params = {'search': 'supermercado', 'paginacion': 'cursor', 'orden': 'asc'}
+        self.assertEqual(len(self.descripciones(**params)), 2)
+        self.assertEqual(len(self.descripciones(search='supermercado', ordenar_por='monto')), 2)
+
+    def test_busqueda_del_admin(self):
+        self.client.force_login(self.usuario)
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get('/admin/api/movimientofinanciero/', {'q': 'supermercados'})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertContains(respuesta, 'Supermercado del barrio')
+        self.assertContains(respuesta, 'Taxi al aeropuerto')
+        self.assertNotContains(respuesta, 'Factura de electricidad')
+        sql = ' '.join(q['sql'] for q in consultas.captured_queries)
+        self.assertIn('@@', sql)
+        self.assertNotIn('LIKE', sql.upper())
+
+
+class AdminTests(TestCase):
+    """
+    Lista del admin de movimientos: filtros por periodo y usuario sin DISTINCT ni COUNT(*).
+    """
+    url = '/admin/api/movimientofinanciero/'
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username='admin_mov', password='clave-segura')
+        self.client.force_login(self.admin)
+        self.otro = User.objects.create_user(username='otro_admin', password='clave-segura')
+        MovimientoFinanciero.objects.bulk_create(
+            MovimientoFinanciero(
+                user=user, descripcion=f'Movimiento {user.username} {fecha:%Y-%m}',
+                monto=Decimal('10.00'), categoria='gasto', fecha=fecha,
+            )
+            for user in (self.admin, self.otro)
+            for fecha in (date(2023, 12, 31), date(2024, 3, 1), date(2024, 3, 31), date(2024, 4, 1))
+        )
+
+    def lista(self, **params):
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(self.url, params)
+        self.assertEqual(respuesta.status_code, 200)
+        sql = ' '.join(q['sql'] for q in consultas.captured_queries).upper()
+        self.assertNotIn('DISTINCT', sql)
+        return respuesta.context['cl'], sql
+
+    def test_filtros_por_periodo_y_usuario(self):
+        cl, _ = self.lista(periodo='2024-03', user=str(self.otro.pk))
+        self.assertEqual(
+            sorted(m.descripcion for m in cl.result_list),
+            ['Movimiento otro_admin 2024-03'] * 2,
+        )
+        cl, _ = self.lista(periodo='2024')
+        self.assertEqual(cl.result_count, 6)
+        cl, _ = self.lista(periodo='2023')
+        self.assertEqual(cl.result_count, 2)
+
+    @override_settings(ADMIN_CONTEO_EXACTO_HASTA=0)
+    def test_conteo_estimado(self):
+        _, sql = self.lista()
+        self.assertNotIn('COUNT(', sql)
+
+    def test_conteo_exacto_en_tablas_chicas(self):
+        cl, sql = self.lista(user=str(self.admin.pk))
+        self.assertEqual(cl.result_count, 4)
+        self.assertIn('COUNT(', sql)
+
+    def test_filtros_invalidos(self):
+        for params in ({'periodo': '2024-13'}, {'user': 'x'}):
+            respuesta = self.client.get(self.url, params)
+            self.assertRedirects(respuesta, f'{self.url}?e=1', fetch_redirect_response=False)
+
+    def test_alta_con_usuario(self):
+        respuesta = self.client.post(f'{self.url}add/', {
+            'user': self.otro.pk, 'descripcion': 'Alta desde el admin', 'monto': '25.50',
+            'categoria': 'ingreso', 'fecha': '2024-05-02', 'notas': '',
+        })
+        self.assertEqual(respuesta.status_code, 302)
+        movimiento = MovimientoFinanciero.objects.get(descripcion='Alta desde el admin')
+        self.assertEqual(movimiento.user, self.otro)
+        self.assertEqual(
+            reportes.reporte_mensual(self.otro, 2024, 5)['total_ingresos'],
+            Decimal('25.50'),
+        )
+
+
+class ReportePeriodoTests(TestCase):
+    """
+    reporte_periodo: cada mes igual a reporte_mensual, en 2 consultas.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = User.objects.create_user(username='periodo', password='clave-segura')
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+        rnd = random.Random(3)
+        # Sin movimientos en marzo de 2024
+        fechas = [date(2023, 11, 1) + timedelta(days=rnd.randint(0, 120)) for _ in range(150)]
+        fechas += [date(2024, 4, 1) + timedelta(days=rnd.randint(0, 90)) for _ in range(60)]
+        MovimientoFinanciero.objects.bulk_create(
+            MovimientoFinanciero(
+                user=self.usuario,
+                descripcion=f'Movimiento {n}',
+                monto=Decimal(rnd.randint(1, 1000000)) / 100,
+                categoria=rnd.choice(['ingreso', 'gasto']),
+                fecha=fecha,
+            )
+            for n, fecha in enumerate(fechas)
+            if fecha < date(2024, 3, 1) or fecha >= date(2024, 4, 1)
+        )
+        resumenes.reconstruir([self.usuario])
+
+    def test_igual_a_reporte_mensual(self):
+        with self.assertNumQueries(2):
+            respuesta = self.client.get(
+                '/api/movimientos/reporte_periodo/', {'mes_desde': '2023-11', 'mes_hasta': '2024-07'}
+            )
+        self.assertEqual(respuesta.status_code, 200)
+        periodo = respuesta.data['reporte_periodo']
+        self.assertEqual([(m['año'], m['mes']) for m in periodo['meses']], [
+            (2023, 11), (2023, 12), (2024, 1), (2024, 2), (2024, 3), (2024, 4), (2024, 5), (2024, 6), (2024, 7),
+        ])
+        for mes in periodo['meses']:
+            mensual = self.client.get(
+                '/api/movimientos/reporte_mensual/', {'año': mes['año'], 'mes': mes['mes']}
+            ).data['reporte_mensual']
+            self.assertEqual(mes, mensual)
+        self.assertEqual(periodo['meses'][4]['total_movimientos'], 0)
+        self.assertEqual(periodo['meses'][4]['top_movimientos'], [])
+        self.assertEqual(periodo['total_movimientos'], MovimientoFinanciero.objects.filter(user=self.usuario).count())
+        self.assertAlmostEqual(
+            periodo['balance'], sum(m['balance'] for m in periodo['meses']), places=2
+        )
+
+    def test_empates_en_monto(self):
+        # Mismo monto: los dos reportes desempatan por id descendente
+        MovimientoFinanciero.objects.bulk_create(
+            MovimientoFinanciero(
+                user=self.usuario, descripcion=f'Empate {n}', monto=Decimal('50.00'),
+                categoria='gasto', fecha=date(2024, 8, 1) + timedelta(days=n % 3),
+            )
+            for n in range(8)
+        )
+        resumenes.reconstruir([self.usuario])
+        # Sin el índice (user, monto, id) el orden de los empates queda a
+        # cargo del sort y no del recorrido del índice
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_indexscan = off')
+            cursor.execute('SET LOCAL enable_bitmapscan = off')
+        esperados = list(MovimientoFinanciero.objects.filter(
+            user=self.usuario, fecha__gte=date(2024, 8, 1)
+        ).order_by('-id').values_list('id', flat=True)[:5])
+        mensual = self.client.get('/api/movimientos/reporte_mensual/', {'año': 2024, 'mes': 8})
+        periodo = self.client.get('/api/movimientos/reporte_periodo/', {'mes_desde': '2024-08', 'mes_hasta': '2024-08'})
+        self.assertEqual([m['id'] for m in mensual.data['reporte_mensual']['top_movimientos']], esperados)
+        self.assertEqual([m['id'] for m in periodo.data['reporte_periodo']['meses'][0]['top_movimientos']], esperados)
+
+    def test_año_y_top(self):
+        respuesta = self.client.get('/api/movimientos/reporte_periodo/', {'año': 2024, 'top': 2})
+        meses = respuesta.data['reporte_periodo']['meses']
+        self.assertEqual(len(meses), 12)
+        self.assertEqual(respuesta.data['reporte_periodo']['mes_desde'], '2024-01')
+        montos = [m['monto'] for m in meses[0]['top_movimientos']]
+        self.assertEqual(len(montos), 2)
+        esperados = MovimientoFinanciero.objects.filter(
+            user=self.usuario, fecha__gte=date(2024, 1, 1), fecha__lt=date(2024, 2, 1)
+        ).order_by('-monto', '-id').values_list('monto', flat=True)[:2]
+        self.assertEqual(montos, [str(monto) for monto in esperados])
+        respuesta = self.client.get('/api/movimientos/reporte_periodo/', {'año': 2024, 'top': 0})
+        self.assertEqual(respuesta.data['reporte_periodo']['meses'][0]['top_movimientos'], [])
+
+    def test_parametros_invalidos(self):
+        for params in [
+            {'año': 'dos mil'},
+            {'mes_desde': '2024-01'},
+            {'mes_desde': '2024-13', 'mes_hasta': '2024-12'},
+            {'mes_desde': '2024-05', 'mes_hasta': '2024-04'},
+            {'mes_desde': '2020-01', 'mes_hasta': '2024-01'},
+            {'top': 500},
+        ]:
+            respuesta = self.client.get('/api/movimientos/reporte_periodo/', params)
+            self.assertEqual(respuesta.status_code, 400, params)
+            self.assertIn('error', respuesta.data)
+
+
+class SerieTests(TestCase):
+    """
+    Serie temporal: periodos vacíos rellenados y totales iguales a los de los movimientos.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = User.objects.create_user(username='serie', password='clave-segura')
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+        rnd = random.Random(2)
+        # Sin movimientos en marzo de 2024
+        fechas = [date(2024, 1, 1) + timedelta(days=rnd.randint(0, 59)) for _ in range(80)]
+        fechas += [date(2024, 4, 1) + timedelta(days=rnd.randint(0, 60)) for _ in range(40)]
+        MovimientoFinanciero.objects.bulk_create(
+            MovimientoFinanciero(
+                user=self.usuario,
+                descripcion=f'Movimiento {n}',
+                monto=Decimal(rnd.randint(1, 100000)) / 100,
+                categoria=rnd.choice(['ingreso', 'gasto']),
+                fecha=fecha,
+            )
+            for n, fecha in enumerate(fechas)
+        )
+        resumenes.reconstruir([self.usuario])
+
+    def esperado(self, agrupar_por, desde, hasta):
+        periodos = {}
+        for movimiento in MovimientoFinanciero.objects.filter(
+            user=self.usuario, fecha__gte=desde, fecha__lte=hasta
+        ):
+            clave = filtros.inicio_periodo(movimiento.fecha, agrupar_por).isoformat()
+            totales = periodos.setdefault(clave, [Decimal('0'), Decimal('0')])
+            totales[0 if movimiento.es_ingreso else 1] += movimiento.monto
+        return {clave: (float(ingresos), float(gastos)) for clave, (ingresos, gastos) in periodos.items()}
+
+    def serie(self, **params):
+        respuesta = self.client.get('/api/movimientos/serie/', params)
+        self.assertEqual(respuesta.status_code, 200, respuesta.content)
+        return respuesta.data['serie']['periodos']
+
+    def test_meses_con_periodos_vacios(self):
+        periodos = self.serie(agrupar_por='mes', fecha_desde='2023-12-01', fecha_hasta='2024-06-30')
+        self.assertEqual(
+            [p['periodo'] for p in periodos],
+            ['2023-12-01', '2024-01-01', '2024-02-01', '2024-03-01', '2024-04-01', '2024-05-01', '2024-06-01'],
+        )
+        vacios = [p['periodo'] for p in periodos if p['movimientos_ingresos'] + p['movimientos_gastos'] == 0]
+        self.assertEqual(vacios, ['2023-12-01', '2024-03-01', '2024-06-01'])
+        esperado = self.esperado('mes', date(2023, 12, 1), date(2024, 6, 30))
+        for periodo in periodos:
+            if periodo['periodo'] in esperado:
+                ingresos, gastos = esperado[periodo['periodo']]
+                self.assertAlmostEqual(periodo['total_ingresos'], ingresos, places=2)
+                self.assertAlmostEqual(periodo['total_gastos'], gastos, places=2)
+
+    def test_semanas_en_rango_parcial(self):
+        # 2024-01-10 es miércoles: la primera semana empieza el lunes 8 pero solo suma desde el 10
+        periodos = self.serie(agrupar_por='semana', fecha_desde='2024-01-10', fecha_hasta='2024-02-20')
+        self.assertEqual(periodos[0]['periodo'], '2024-01-08')
+        self.assertEqual(periodos[-1]['periodo'], '2024-02-19')
+        self.assertEqual(len(periodos), 7)
+        esperado = self.esperado('semana', date(2024, 1, 10), date(2024, 2, 20))
+        for periodo in periodos:
+            ingresos, gastos = esperado.get(periodo['periodo'], (0, 0))
+            self.assertAlmostEqual(periodo['total_ingresos'], ingresos, places=2)
+            self.assertAlmostEqual(periodo['total_gastos'], gastos, places=2)
+
+    def test_rango_por_defecto_y_zona(self):
+        respuesta = self.client.get('/api/movimientos/serie/', {'zona': 'America/Bogota'})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.data['serie']['zona'], 'America/Bogota')
+        self.assertEqual(len(respuesta.data['serie']['periodos']), filtros.PERIODOS_POR_DEFECTO['mes'])
+
+    def test_parametros_invalidos(self):
+        for params in [
+            {'agrupar_por': 'hora'},
+            {'zona': 'Marte/Olympus'},
+            {'zona': 'America'},
+            {'zona': 'Europe/' + 'x' * 300},
+            {'fecha_desde': '2024-13-01'},
+            {'fecha_desde': '2024-05-01', 'fecha_hasta': '2024-04-01'},
+            {'agrupar_por': 'dia', 'fecha_desde': '2000-01-01', 'fecha_hasta': '2024-01-01'},
+        ]:
+            respuesta = self.client.get('/api/movimientos/serie/', params)
+            self.assertEqual(respuesta.status_code, 400, params)
+            self.assertIn('error', respuesta.data)
+
+
+class SaldoTests(TestCase):
+    """
+    Saldo acumulado con saldo inicial desde los acumulados y paginación por cursor.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = User.objects.create_user(username='saldo', password='clave-segura')
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+        rnd = random.Random(1)
+        MovimientoFinanciero.objects.bulk_create(
+            MovimientoFinanciero(
+                user=self.usuario,
+                descripcion=f'Movimiento {n}',
+                monto=Decimal(rnd.randint(1, 100000)) / 100,
+                categoria=rnd.choice(['ingreso', 'gasto']),
+                fecha=date(2024, 1, 1) + timedelta(days=rnd.randint(0, 120)),
+            )
+            for n in range(150)
+        )
+        resumenes.reconstruir([self.usuario])
+
+    def esperados(self):
+        saldo, resultado = Decimal('0'), {}
+        for movimiento in MovimientoFinanciero.objects.filter(user=self.usuario).order_by(
+            'fecha', 'fecha_creacion', 'id'
+        ):
+            saldo += movimiento.monto if movimiento.es_ingreso else -movimiento.monto
+            resultado[movimiento.pk] = (movimiento.fecha, saldo)
+        return resultado
+
+    def test_saldo_por_paginas(self):
+        esperados = self.esperados()
+        params = {'fecha_desde': '2024-02-10', 'fecha_hasta': '2024-04-15', 'page_size': 20}
+        respuesta = self.client.get('/api/movimientos/saldo/', params)
+        anteriores = [s for fecha, s in esperados.values() if fecha < date(2024, 2, 10)]
+        self.assertEqual(respuesta.data['saldo_inicial'], str(anteriores[-1]))
+
+        vistos = []
+        while True:
+            self.assertEqual(respuesta.status_code, 200)
+            vistos += respuesta.data['results']
+            if respuesta.data['next'] is None:
+                break
+            respuesta = self.client.get(respuesta.data['next'])
+        en_rango = [pk for pk, (fecha, _) in esperados.items() if date(2024, 2, 10) <= fecha <= date(2024, 4, 15)]
+        self.assertEqual([fila['id'] for fila in vistos], en_rango)
+        for fila in vistos:
+            self.assertEqual(fila['saldo'], str(esperados[fila['id']][1]))
+
+    def test_cursor_invalido(self):
+        respuesta = self.client.get('/api/movimientos/saldo/', {'cursor': 'no-es-un-cursor'})
+        self.assertEqual(respuesta.status_code, 404)
+
+
+@override_settings(PASSWORD_ITERACIONES=1000)
+class CuentasTests(TestCase):
+    """
+    Login y registro con el hash en el pool de api.cuentas.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_registro_y_login(self):
+        respuesta = self.client.post('/api/registro/', {'username': 'nueva', 'password': 'clave-segura'})
+        self.assertEqual(respuesta.status_code, 201)
+        token = respuesta.data['token']
+        respuesta = self.client.post('/api/login/', {'username': 'nueva', 'password': 'clave-segura'})
+        self.assertEqual(respuesta.data, {'token': token})
+
+        for datos in ({'username': 'nueva', 'password': 'otra'}, {'username': 'nadie', 'password': 'x'}):
+            respuesta = self.client.post('/api/login/', datos)
+            self.assertEqual(respuesta.status_code, 400)
+            self.assertIn('non_field_errors', respuesta.data)
+        respuesta = self.client.post('/api/login/', {'username': 'nueva'})
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertIn('password', respuesta.data)
+
+    def test_registro_duplicado_sin_consulta_previa(self):
+        User.objects.create_user(username='repetida', password='clave-segura')
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.post('/api/registro/', {'username': 'repetida', 'password': 'x'})
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(respuesta.data, {'error': 'El usuario ya existe.'})
+        # El INSERT choca con la restricción única, sin SELECT previo
+        self.assertTrue(consultas.captured_queries[0]['sql'].startswith('SAVEPOINT'))
+        self.assertIn('INSERT INTO "auth_user"', consultas.captured_queries[1]['sql'])
+        self.assertEqual(User.objects.filter(username='repetida').count(), 1)
+
+    def test_hash_en_el_pool(self):
+        hilos = []
+        original = cuentas.make_password
+
+        def make_password(password):
+            hilos.append(threading.current_thread().name)
+            return original(password)
+
+        with patch.object(cuentas, 'make_password', make_password):
+            self.client.post('/api/registro/', {'username': 'pool', 'password': 'clave-segura'})
+            self.client.post('/api/login/', {'username': 'otro', 'password': 'clave-segura'})
+        self.assertEqual(len(hilos), 2)
+        self.assertTrue(all(nombre.startswith('hash') for nombre in hilos))
+
+    def test_saturado(self):
+        cuentas._ejecutor()
+        cupos = threading.BoundedSemaphore(1)
+        cupos.acquire()
+        with patch.object(cuentas, '_cupos', cupos):
+            respuesta = self.client.post('/api/login/', {'username': 'x', 'password': 'y'})
+        self.assertEqual(respuesta.status_code, 503)
+        self.assertEqual(respuesta['Retry-After'], '1')
+
+    def test_costo_configurable(self):
+        user = User.objects.create_user(username='costo', password='clave-segura')
+        self.assertEqual(user.password.split('$')[1], '1000')
+        with self.settings(PASSWORD_ITERACIONES=2000):
+            respuesta = self.client.post('/api/login/', {'username': 'costo', 'password': 'clave-segura'})
+        self.assertEqual(respuesta.status_code, 200)
+        user.refresh_from_db()
+        self.assertEqual(user.password.split('$')[1], '2000')
+        self.assertTrue(user.check_password('clave-segura'))
+
+        user.is_active = False
+        user.save()
+        respuesta = self.client.post('/api/login/', {'username': 'costo', 'password': 'clave-segura'})
+        self.assertEqual(respuesta.status_code, 400)
+
+
+class CamposTests(TestCase):
+    """
+    fields= / exclude=: la salida y el SELECT tienen solo los campos pedidos.
+    """
+    MOVIL = ['id', 'descripcion', 'monto', 'categoria', 'fecha']
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = User.objects.create_user(username='campos', password='clave-segura')
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+        MovimientoFinanciero.objects.bulk_create(
+            MovimientoFinanciero(
+                user=self.usuario,
+                descripcion=f'Movimiento {n}',
+                monto=Decimal(n + 1),
+                categoria='gasto' if n % 3 else 'ingreso',
+                fecha=date(2024, 1, 1) + timedelta(days=n),
+                notas='x' * 1000,
+            )
+            for n in range(30)
+        )
+
+    def get(self, url, params):
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(url, params)
+        self.assertEqual(respuesta.status_code, 200, respuesta.content)
+        return respuesta.json(), ' '.join(
+            q['sql'] for q in consultas.captured_queries if '"api_movimientofinanciero"' in q['sql']
+        )
+
+    def test_listado_y_detalle_con_fields(self):
+        completo, _ = self.get('/api/movimientos/', {})
+        datos, sql = self.get('/api/movimientos/', {'fields': ','.join(reversed(self.MOVIL))})
+        self.assertNotIn('"notas"', sql)
+        self.assertEqual(datos['count'], 30)
+        self.assertEqual(
+            datos['results'],
+            [{campo: fila[campo] for campo in self.MOVIL} for fila in completo['results']],
+        )
+
+        pk = completo['results'][0]['id']
+        detalle, sql = self.get(f'/api/movimientos/{pk}/', {'fields': 'monto,categoria_display'})
+        self.assertNotIn('"notas"', sql)
+        self.assertNotIn('"descripcion"', sql)
+        self.assertEqual(detalle, {
+            'monto': completo['results'][0]['monto'],
+            'categoria_display': completo['results'][0]['categoria_display'],
+        })
+
+    def test_exclude(self):
+        completo, _ = self.get('/api/movimientos/', {'ordenar_por': 'monto'})
+        datos, sql = self.get('/api/movimientos/', {'ordenar_por': 'monto', 'exclude': 'notas,fecha_actualizacion'})
+        self.assertNotIn('"notas"', sql)
+        for fila, original in zip(datos['results'], completo['results']):
+            del original['notas'], original['fecha_actualizacion']
+            self.assertEqual(fila, original)
+
+    def test_cursor_sin_las_columnas_del_orden(self):
+        # La paginación lee monto e id aunque no estén en la salida
+        params = {'fields': 'descripcion', 'ordenar_por': 'monto', 'paginacion': 'cursor', 'page_size': 10}
+        descripciones = []
+        datos, _ = self.get('/api/movimientos/', params)
+        while True:
+            self.assertTrue(all(list(fila) == ['descripcion'] for fila in datos['results']))
+            descripciones += [fila['descripcion'] for fila in datos['results']]
+            if not datos['next']:
+                break
+            datos, _ = self.get(datos['next'], {})
+        self.assertEqual(descripciones, [f'Movimiento {n}' for n in range(29, -1, -1)])
+
+    def test_parametros_invalidos(self):
+        pk = MovimientoFinanciero.objects.filter(user=self.usuario).first().pk
+        for params in [
+            {'fields': 'monto,saldo'},
+            {'exclude': 'user'},
+            {'fields': 'monto', 'exclude': 'notas'},
+            {'fields': ''},
+            {'exclude': ','.join(filtros.CAMPOS)},
+        ]:
+            for url in ['/api/movimientos/', f'/api/movimientos/{pk}/']:
+                respuesta = self.client.get(url, params)
+                self.assertEqual(respuesta.status_code, 400, (url, params))
+                self.assertIn('error', respuesta.data)
+
+
+class FormatosTests(TestCase):
+    """
+    MessagePack por negociación de contenido y compresión zstd/gzip.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = User.objects.create_user(username='formatos', password='clave-segura')
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+        MovimientoFinanciero.objects.bulk_create(
+            MovimientoFinanciero(
+                user=self.usuario,
+                descripcion=f'Movimiento {n}',
+                monto=Decimal(n + 1) / 4,
+                categoria='gasto' if n % 2 else 'ingreso',
+                fecha=date(2024, 1, 1) + timedelta(days=n),
+                notas=f'Nota {n}',
+            )
+            for n in range(60)
+        )
+        resumenes.reconstruir([self.usuario])
+
+    def descomprimir(self, respuesta):
+        cuerpo = b''.join(respuesta.streaming_content) if respuesta.streaming else respuesta.content
+        codificacion = respuesta.get('Content-Encoding')
+        if codificacion == 'gzip':
+            return gzip.decompress(cuerpo)
+        if codificacion == 'zstd':
+            return zstandard.ZstdDecompressor().decompressobj().decompress(cuerpo)
+        self.assertIsNone(codificacion)
+        return cuerpo
+
+    def test_msgpack_igual_a_json(self):
+        for url, params in [
+            ('/api/movimientos/', {'page_size': 50}),
+            ('/api/movimientos/resumen/', {}),
+            ('/api/movimientos/reporte_periodo/', {'año': 2024}),
+        ]:
+            json_ = self.client.get(url, params)
+            binario = self.client.get(url, params, HTTP_ACCEPT='application/msgpack')
+            self.assertEqual(binario['Content-Type'], 'application/msgpack')
+            self.assertEqual(msgpack.unpackb(binario.content), json.loads(json_.content), url)
+            self.assertNotEqual(binario['ETag'], json_['ETag'])
+            self.assertIn('Accept', binario['Vary'])
+        por_parametro = self.client.get('/api/movimientos/resumen/', {'format': 'msgpack'})
+        self.assertEqual(por_parametro['Content-Type'], 'application/msgpack')
+
+    def test_alta_en_msgpack(self):
+        cuerpo = {'descripcion': 'Café', 'monto': '3.50', 'categoria': 'gasto', 'fecha': '2024-05-01'}
+        respuesta = self.client.post(
+            '/api/movimientos/', msgpack.packb(cuerpo),
+            content_type='application/msgpack', HTTP_ACCEPT='application/msgpack',
+        )
+        self.assertEqual(respuesta.status_code, 201, respuesta.content)
+        self.assertEqual(msgpack.unpackb(respuesta.content)['monto'], '3.50')
+
+        respuesta = self.client.post('/api/movimientos/', b'\xc1', content_type='application/msgpack')
+        self.assertEqual(respuesta.status_code, 400)
+
+    def test_compresion(self):
+        completo = self.client.get('/api/movimientos/', {'page_size': 60}).content
+        for aceptadas, esperada in [
+            ('gzip, deflate, br, zstd', 'zstd'),
+            ('gzip', 'gzip'),
+            ('zstd;q=0, gzip', 'gzip'),
+            ('*', 'zstd'),
+            ('br', None),
+            ('', None),
+        ]:
+            respuesta = self.client.get('/api/movimientos/', {'page_size': 60}, HTTP_ACCEPT_ENCODING=aceptadas)
+            self.assertEqual(respuesta.get('Content-Encoding'), esperada, aceptadas)
+            self.assertIn('Accept-Encoding', respuesta['Vary'])
+            self.assertEqual(self.descomprimir(respuesta), completo)
+        self.assertEqual(compresion.elegir_codificacion('gzip;q=0.5, zstd;q=0'), 'gzip')
+
+        # Las respuestas chicas no se comprimen
+        with self.settings(COMPRESION_MIN_BYTES=len(completo) + 1):
+            respuesta = self.client.get('/api/movimientos/', {'page_size': 60}, HTTP_ACCEPT_ENCODING='zstd')
+        self.assertFalse(respuesta.has_header('Content-Encoding'))
+
+    def test_etag_debil_y_304(self):
+        respuesta = self.client.get('/api/movimientos/', {'page_size': 60}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertTrue(respuesta['ETag'].startswith('W/"'))
+        respuesta = self.client.get(
+            '/api/movimientos/', {'page_size': 60},
+            HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=respuesta['ETag'],
+        )
+        self.assertEqual(respuesta.status_code, 304)
+
+    def test_exportacion_en_streaming(self):
+        completo = b''.join(self.client.get('/api/movimientos/exportar/', {'formato': 'ndjson'}).streaming_content)
+        for codificacion in ['zstd', 'gzip']:
+            respuesta = self.client.get(
+                '/api/movimientos/exportar/', {'formato': 'ndjson'}, HTTP_ACCEPT_ENCODING=codificacion,
+            )
+            self.assertTrue(respuesta.streaming)
+            self.assertEqual(respuesta['Content-Encoding'], codificacion)
+            self.assertEqual(self.descomprimir(respuesta), completo)
+        self.assertEqual(completo.count(b'\n'), 60)
+
+
+class TokenTests(TestCase):
+    """
+    Autenticación por token con caché: revocar, rotar o desactivar al
+    usuario se nota en la petición siguiente.
+    """
+    url = '/api/movimientos/resumen/'
+
+    def setUp(self):
+        cache.clear()
+        autenticacion._local.clear()
+        self.usuario = User.objects.create_user(username='con_token', password='clave-segura')
+        self.token = Token.objects.create(user=self.usuario)
+
+    def get(self, key, url=None):
+        cliente = APIClient()
+        cliente.credentials(HTTP_AUTHORIZATION=f'Token {key}')
+        return cliente.get(url or self.url)
+
+    def test_cache_sin_contraseña(self):
+        self.assertEqual(self.get(self.token.key).status_code, 200)
+        for datos in (cache.get(autenticacion._clave(self.token.key)), autenticacion._local.get(self.token.key)):
+            self.assertEqual(datos, (self.usuario.pk, 'con_token', True))
+
+        # El resto del usuario se carga de la base de datos solo si se usa
+        self.assertEqual(self.get(self.token.key, '/api/estadisticas/cache/').status_code, 403)
+        self.usuario.is_staff = True
+        self.usuario.save()
+        self.assertEqual(self.get(self.token.key, '/api/estadisticas/cache/').status_code, 200)
+
+    def test_token_revocado_o_rotado(self):
+        self.assertEqual(self.get(self.token.key).status_code, 200)
+        self.token.delete()
+        self.assertEqual(self.get(self.token.key).status_code, 401)
+
+        nuevo = Token.objects.create(user=self.usuario)
+        self.assertEqual(self.get(nuevo.key).status_code, 200)
+        nuevo.delete()
+        rotado = Token.objects.create(user=self.usuario)
+        self.assertEqual(self.get(nuevo.key).status_code, 401)
+        self.assertEqual(self.get(rotado.key).status_code, 200)
+
+    def test_usuario_inactivo(self):
+        self.assertEqual(self.get(self.token.key).status_code, 200)
+        self.usuario.is_active = False
+        self.usuario.save()
+        self.assertEqual(self.get(self.token.key).status_code, 401)
+        self.usuario.is_active = True
+        self.usuario.save()
+        self.assertEqual(self.get(self.token.key).status_code, 200)
+
+
+class ResumenesTests(TestCase):
+    """
+    Los acumulados diarios y mensuales se mantienen iguales a los calculados
+    desde los movimientos.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = User.objects.create_user(username='acumulados', password='clave-segura')
+
+    def comprobar(self):
+        self.assertEqual(resumenes.verificar([self.usuario]), [])
+        movimientos = MovimientoFinanciero.objects.filter(user=self.usuario)
+        for modelo in (ResumenDiario, ResumenMensual):
+            for categoria in ('ingreso', 'gasto'):
+                esperado = movimientos.filter(categoria=categoria).aggregate(
+                    total=Sum('monto'), cantidad=Count('id'))
+                obtenido = modelo.objects.filter(user=self.usuario, categoria=categoria).aggregate(
+                    total=Sum('total'), cantidad=Sum('cantidad'))
+                self.assertEqual(obtenido['total'] or 0, esperado['total'] or 0)
+                self.assertEqual(obtenido['cantidad'] or 0, esperado['cantidad'])
+
+    def test_alta_cambio_y_baja_por_la_api(self):
+        cliente = APIClient()
+        cliente.force_authenticate(self.usuario)
+        ids = []
+        for monto, categoria, fecha in (
+            ('10.00', 'gasto', '2024-01-31'),
+            ('25.50', 'ingreso', '2024-01-31'),
+            ('7.25', 'gasto', '2024-02-01'),
+        ):
+            respuesta = cliente.post('/api/movimientos/', {
+                'descripcion': 'Movimiento', 'monto': monto, 'categoria': categoria, 'fecha': fecha,
+            }, format='json')
+            self.assertEqual(respuesta.status_code, 201, respuesta.data)
+            ids.append(respuesta.data['id'])
+        self.comprobar()
+
+        # Cambio de categoría, de fecha (a otro mes) y de monto
+        for cambio in ({'categoria': 'ingreso'}, {'fecha': '2024-03-15'}, {'monto': '99.99'}):
+            respuesta = cliente.patch(f'/api/movimientos/{ids[0]}/', cambio, format='json')
+            self.assertEqual(respuesta.status_code, 200, respuesta.data)
+            self.comprobar()
+        respuesta = cliente.put(f'/api/movimientos/{ids[1]}/', {
+            'descripcion': 'Reemplazo', 'monto': '3.00', 'categoria': 'gasto', 'fecha': '2023-12-31',
+        }, format='json')
+        self.assertEqual(respuesta.status_code, 200, respuesta.data)
+        self.comprobar()
+
+        self.assertEqual(cliente.delete(f'/api/movimientos/{ids[2]}/').status_code, 204)
+        self.comprobar()
+        self.assertFalse(ResumenMensual.objects.filter(
+            user=self.usuario, mes=date(2024, 2, 1), cantidad__gt=0).exists())
+
+        respuesta = cliente.post('/api/movimientos/bulk/', [
+            {'descripcion': 'Lote', 'monto': '1.00', 'categoria': 'gasto', 'fecha': '2024-03-15'},
+            {'descripcion': 'Lote', 'monto': '2.00', 'categoria': 'ingreso', 'fecha': '2024-04-01'},
+        ], format='json')
+        self.assertEqual(respuesta.status_code, 201, respuesta.data)
+        self.comprobar()
+
+    def test_baja_masiva_desde_el_admin(self):
+        admin = User.objects.create_superuser(username='admin_acumulados', password='clave-segura')
+        self.client.force_login(admin)
+        for dia, categoria in ((1, 'gasto'), (1, 'ingreso'), (2, 'gasto'), (40, 'gasto')):
+            respuesta = self.client.post('/admin/api/movimientofinanciero/add/', {
+                'user': self.usuario.pk, 'descripcion': 'Admin', 'monto': '12.34',
+                'categoria': categoria, 'fecha': date(2024, 1, 1) + timedelta(days=dia), 'notas': '',
+            })
+            self.assertEqual(respuesta.status_code, 302)
+        self.comprobar()
+
+        seleccion = MovimientoFinanciero.objects.filter(user=self.usuario, fecha__lt=date(2024, 2, 1))
+        respuesta = self.client.post('/admin/api/movimientofinanciero/', {
+            'action': 'delete_selected', 'post': 'yes',
+            '_selected_action': [str(pk) for pk in seleccion.values_list('pk', flat=True)],
+        })
+        self.assertEqual(respuesta.status_code, 302)
+        self.assertEqual(MovimientoFinanciero.objects.filter(user=self.usuario).count(), 1)
+        self.comprobar()
+
+    def test_muchas_claves_en_varias_sentencias(self):
+        # 2 categorías x 7400 días: más de 65535 parámetros en una sola sentencia
+        inicio = date(2000, 1, 1)
+        movimientos = MovimientoFinanciero.objects.bulk_create(
+            MovimientoFinanciero(
+                user=self.usuario, descripcion='x', monto=Decimal('1.25'),
+                categoria=categoria, fecha=inicio + timedelta(days=dia),
+            )
+            for dia in range(7400)
+            for categoria in ['ingreso', 'gasto']
+        )
+        with transaction.atomic(), CaptureQueriesContext(connection) as consultas:
+            resumenes.registrar_alta(*movimientos)
+        diarios = [c['sql'] for c in consultas.captured_queries
+                   if c['sql'].startswith(f'INSERT INTO "{ResumenDiario._meta.db_table}"')]
+        self.assertEqual(len(diarios), 3)
+        self.assertEqual(ResumenDiario.objects.filter(user=self.usuario).count(), 14800)
+        self.assertEqual(resumenes.verificar([self.usuario]), [])
+
+        with transaction.atomic():
+            queryset = MovimientoFinanciero.objects.filter(user=self.usuario, fecha__gte=date(2001, 1, 1))
+            resumenes.registrar_baja(*queryset)
+            queryset.delete()
+        self.assertEqual(resumenes.verificar([self.usuario]), [])
+
+
+class BulkTests(TestCase):
+    """
+    Alta masiva: todo o nada, con los errores de cada fila.
+    """
+    url = '/api/movimientos/bulk/'
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = User.objects.create_user(username='masivo', password='clave-segura')
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def fila(self, **datos):
+        return {'descripcion': 'Lote', 'monto': '10.00', 'categoria': 'gasto', 'fecha': '2024-01-05', **datos}
+
+    def test_lote_valido(self):
+        respuesta = self.client.post(self.url, [self.fila(), self.fila(categoria='ingreso')], format='json')
+        self.assertEqual(respuesta.status_code, 201, respuesta.data)
+        self.assertEqual(respuesta.data['creados'], 2)
+        self.assertEqual(
+            sorted(MovimientoFinanciero.objects.filter(user=self.usuario).values_list('pk', flat=True)),
+            sorted(respuesta.data['ids']),
+        )
+        self.assertEqual(resumenes.verificar([self.usuario]), [])
+
+    def test_errores_parciales_no_crean_nada(self):
+        respuesta = self.client.post(self.url, [
+            self.fila(),
+            self.fila(monto='-5.00'),
+            self.fila(),
+            self.fila(categoria='otra', fecha='2024-02-30'),
+        ], format='json')
+        self.assertEqual(respuesta.status_code, 400)
+        errores = respuesta.data['errores']
+        self.assertEqual([e['fila'] for e in errores], [1, 3])
+        self.assertEqual(list(errores[0]['errores']), ['monto'])
+        self.assertEqual(sorted(errores[1]['errores']), ['categoria', 'fecha'])
+        self.assertFalse(MovimientoFinanciero.objects.filter(user=self.usuario).exists())
+        self.assertFalse(ResumenDiario.objects.filter(user=self.usuario).exists())
+
+    @override_settings(MOVIMIENTOS_MAX_BULK=2)
+    def test_limites(self):
+        for datos in ({'descripcion': 'no es una lista'}, [self.fila()] * 3):
+            respuesta = self.client.post(self.url, datos, format='json')
+            self.assertEqual(respuesta.status_code, 400)
+            self.assertIn('error', respuesta.data)
+        self.assertFalse(MovimientoFinanciero.objects.filter(user=self.usuario).exists())
+
+
+class ImportacionTests(TestCase):
+    """
+    Importación CSV con COPY: informe de filas rechazadas y acumulados.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = User.objects.create_user(username='importa', password='clave-segura')
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def importar(self, contenido):
+        archivo = SimpleUploadedFile('movimientos.csv', contenido.encode(), content_type='text/csv')
+        return self.client.post('/api/movimientos/importar/', {'archivo': archivo}, format='multipart')
+
+    def test_monto_nan_rechazado(self):
+        respuesta = self.importar(
+            'descripcion,monto,categoria,fecha\n'
+            'a,NaN,gasto,2024-01-05\n'
+            'b, nan ,ingreso,2024-01-05\n'
+            'c,10.00,gasto,2024-01-05\n'
+        )
+        self.assertEqual(respuesta.status_code, 201, respuesta.data)
+        self.assertEqual(respuesta.data['importados'], 1)
+        self.assertEqual([e['motivo'] for e in respuesta.data['errores']], ['Monto inválido'] * 2)
+        self.assertEqual(resumenes.verificar([self.usuario]), [])
+        self.assertEqual(self.client.get('/api/movimientos/resumen/').data['resumen']['total_gastos'], 10.0)
+
+    def test_informe_de_filas_rechazadas(self):
+        futura = (date.today() + timedelta(days=1)).isoformat()
+        respuesta = self.importar(
+            'descripcion,monto,categoria,fecha,notas\n'
+            'ok,10.00,gasto,2024-01-05,\n'
+            ',10.00,gasto,2024-01-05,\n'
+            f'{"x" * 201},10.00,gasto,2024-01-05,\n'
+            'a,diez,gasto,2024-01-05,\n'
+            'a,1.005,gasto,2024-01-05,\n'
+            'a,0,gasto,2024-01-05,\n'
+            'a,10.00,otra,2024-01-05,\n'
+            'a,10.00,gasto,2024-02-30,\n'
+            f'a,10.00,gasto,{futura},\n'
+            'ok,  5.50 ,ingreso,2024-01-06,nota\n'
+        )
+        self.assertEqual(respuesta.status_code, 201, respuesta.data)
+        self.assertEqual(respuesta.data['importados'], 2)
+        self.assertEqual(respuesta.data['rechazados'], 8)
+        self.assertEqual(
+            [(e['fila'], e['motivo']) for e in respuesta.data['errores']],
+            [
+                (2, 'La descripción es obligatoria'),
+                (3, 'La descripción supera 200 caracteres'),
+                (4, 'Monto inválido'),
+                (5, 'El monto admite 2 decimales'),
+                (6, 'El monto debe ser mayor a 0'),
+                (7, 'Categoría inválida'),
+                (8, 'Fecha inválida'),
+                (9, 'La fecha no puede ser futura'),
+            ],
+        )
+        self.assertEqual(respuesta.data['errores'][2]['datos']['monto'], 'diez')
+        self.assertEqual(
+            sorted(MovimientoFinanciero.objects.filter(user=self.usuario).values_list('monto', flat=True)),
+            [Decimal('5.50'), Decimal('10.00')],
+        )
+
+    def test_informe_limitado_y_csv_de_rechazadas(self):
+        contenido = 'descripcion,monto,categoria,fecha\n' + 'a,x,gasto,2024-01-05\n' * 5
+        rechazadas = io.BytesIO()
+        resultado = importacion.importar_csv(
+            io.BytesIO(contenido.encode()), self.usuario, rechazadas=rechazadas, max_errores=2)
+        self.assertEqual((resultado['importados'], resultado['rechazados']), (0, 5))
+        self.assertEqual([e['fila'] for e in resultado['errores']], [1, 2])
+        filas = list(csv.DictReader(io.StringIO(rechazadas.getvalue().decode())))
+        self.assertEqual(len(filas), 5)
+        self.assertEqual({f['motivo'] for f in filas}, {'Monto inválido'})
+
+    def test_csv_mal_formado(self):
+        cabecera = b'descripcion,monto,categoria,fecha\n'
+        for contenido, linea, texto in [
+            (b'a,1.00,gasto,2024-01-05\nb,2.00,gasto\n', 2, 'b,2.00,gasto'),
+            (b'a,1.00,gasto,2024-01-05,extra\n', 1, 'a,1.00,gasto,2024-01-05,extra'),
+            # Las comillas sin cerrar se detectan al final del archivo
+            (b'a,1.00,gasto,2024-01-05\n"b,2.00,gasto,2024-01-05\n', 3, '"b,2.00,gasto,2024-01-05\n'),
+            (b'a,1.00,gasto,2024-01-05\n\xff,2.00,gasto,2024-01-05\n', 2, None),
+        ]:
+            archivo = SimpleUploadedFile('movimientos.csv', cabecera + contenido, content_type='text/csv')
+            respuesta = self.client.post('/api/movimientos/importar/', {'archivo': archivo}, format='multipart')
+            self.assertEqual(respuesta.status_code, 400, contenido)
+            self.assertEqual((respuesta.data['linea'], respuesta.data['contenido']), (linea, texto))
+            self.assertIn(f'línea {linea}', respuesta.data['error'])
+        self.assertFalse(MovimientoFinanciero.objects.filter(user=self.usuario).exists())
+        self.assertFalse(ResumenDiario.objects.filter(user=self.usuario).exists())
+
+    def test_cabecera_invalida(self):
+        for contenido in ('descripcion,monto,fecha\n', 'descripcion,monto,categoria,fecha,color\n'):
+            respuesta = self.importar(contenido + 'a,1.00,gasto,2024-01-05\n')
+            self.assertEqual(respuesta.status_code, 400)
+            self.assertIn('error', respuesta.data)
+        self.assertFalse(MovimientoFinanciero.objects.filter(user=self.usuario).exists())
+
+    def test_acumulados_y_reportes(self):
+        self.client.post('/api/movimientos/', {
+            'descripcion': 'Previo', 'monto': '100.00', 'categoria': 'ingreso', 'fecha': '2024-03-01',
+        }, format='json')
+        # El reporte queda en caché antes de importar
+        marzo = self.client.get('/api/movimientos/reporte_mensual/', {'año': 2024, 'mes': 3}).data['reporte_mensual']
+        self.assertEqual(marzo['total_gastos'], 0)
+        # La invalidación se hace al confirmar la transacción
+        with self.captureOnCommitCallbacks(execute=True):
+            respuesta = self.importar(
+                'descripcion,monto,categoria,fecha\n'
+                'a,30.00,gasto,2024-03-10\n'
+                'b,20.00,ingreso,2024-03-31\n'
+                'c,5.00,gasto,2024-04-01\n'
+                'd,-1,gasto,2024-03-10\n'
+            )
+        self.assertEqual(respuesta.status_code, 201, respuesta.data)
+        self.assertEqual((respuesta.data['importados'], respuesta.data['rechazados']), (3, 1))
+        self.assertEqual(resumenes.verificar([self.usuario]), [])
+        marzo = self.client.get('/api/movimientos/reporte_mensual/', {'año': 2024, 'mes': 3}).data['reporte_mensual']
+        self.assertEqual((marzo['total_ingresos'], marzo['total_gastos']), (120.0, 30.0))
+        self.assertEqual(reportes.reporte_mensual(self.usuario, 2024, 4)['total_gastos'], Decimal('5.00'))
+        resumen = self.client.get('/api/movimientos/resumen/').data['resumen']
+        self.assertEqual((resumen['total_ingresos'], resumen['total_gastos']), (120.0, 35.0))
+
+
+def _recargar_urls():
+    # Las rutas async se eligen al importar api.urls según ASYNC_VIEWS
+    importlib.reload(urls_api)
+    importlib.reload(urls_proyecto)
+    clear_url_caches()
+
+
+class VistasAsyncTests(TestCase):
+    """
+    Vistas de api.vistas_async (ASYNC_VIEWS=True, modo ASGI): misma
+    respuesta que las vistas DRF síncronas de las mismas rutas.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.addClassCleanup(_recargar_urls)
+        cls.enterClassContext(override_settings(ASYNC_VIEWS=True))
+        _recargar_urls()
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user(username='asincrono', password='clave-segura')
+        cls.token = Token.objects.create(user=cls.usuario).key
+        rnd = random.Random(5)
+        MovimientoFinanciero.objects.bulk_create(
+            MovimientoFinanciero(
+                user=cls.usuario,
+                descripcion=rnd.choice(['Supermercado', 'Salario', 'Alquiler']) + f' {n}',
+                monto=Decimal(rnd.randint(1, 100000)) / 100,
+                categoria=rnd.choice(['ingreso', 'gasto']),
+                fecha=date(2024, 1, 1) + timedelta(days=rnd.randint(0, 120)),
+                notas=f'Nota {n}',
+            )
+            for n in range(80)
+        )
+        resumenes.reconstruir([cls.usuario])
+        cls.pk = MovimientoFinanciero.objects.filter(user=cls.usuario).values_list('pk', flat=True).first()
+
+    def setUp(self):
+        cache.clear()
+        self.client = AsyncClient()
+
+    def get(self, ruta, params=None, **headers):
+        # AsyncClient no aplica las cabeceras pasadas al constructor
+        return self.client.get(ruta, params or {}, headers={'Authorization': f'Token {self.token}', **headers})
+
+    def sincrona(self, vista, ruta, params, **kwargs):
+        request = RequestFactory().get(ruta, params, HTTP_AUTHORIZATION=f'Token {self.token}')
+        respuesta = vista(request, **kwargs)
+        respuesta.render()
+        return respuesta
+
+    async def assertIgualASincrona(self, vista, ruta, params=None, **kwargs):
+        params = params or {}
+        asincrona = await self.get(ruta, params)
+        sincrona = await sync_to_async(self.sincrona)(vista, ruta, params, **kwargs)
+        self.assertEqual(asincrona.status_code, sincrona.status_code, (ruta, params))
+        self.assertEqual(json.loads(asincrona.content), json.loads(sincrona.content), (ruta, params))
+        return asincrona
+
+    async def test_rutas_async(self):
+        self.assertIs(resolve('/api/movimientos/').func, vistas_async.movimientos)
+        self.assertIs(resolve('/api/login/').func, vistas_async.login)
+
+    async def test_listado(self):
+        for params in [
+            {},
+            {'page': 2, 'page_size': 20},
+            {'categoria': 'gasto', 'ordenar_por': 'monto', 'orden': 'asc'},
+            {'fecha_desde': '2024-02-01', 'fecha_hasta': '2024-03-15'},
+            {'paginacion': 'cursor', 'ordenar_por': 'fecha_creacion'},
+            {'fields': 'id,monto,categoria_display'},
+            {'fields': 'saldo'},
+        ]:
+            await self.assertIgualASincrona(vistas_async._lista_drf, '/api/movimientos/', params)
+
+    async def test_busqueda(self):
+        # La primera búsqueda del proceso averigua si hay índice de trigramas
+        busqueda.trigramas_disponibles.cache_clear()
+        for params in [{'search': 'supermercado'}, {'search': 'salario', 'ordenar_por': 'monto'}]:
+            respuesta = await self.assertIgualASincrona(vistas_async._lista_drf, '/api/movimientos/', params)
+            self.assertGreater(json.loads(respuesta.content)['count'], 0)
+        await self.assertIgualASincrona(
+            vistas_async._detalle_drf, f'/api/movimientos/{self.pk}/', {'search': 'alquiler'}, pk=self.pk
+        )
+
+    async def test_detalle(self):
+        ruta = f'/api/movimientos/{self.pk}/'
+        await self.assertIgualASincrona(vistas_async._detalle_drf, ruta, pk=self.pk)
+        await self.assertIgualASincrona(vistas_async._detalle_drf, ruta, {'exclude': 'notas'}, pk=self.pk)
+        respuesta = await self.assertIgualASincrona(
+            vistas_async._detalle_drf, '/api/movimientos/999999999/', pk=999999999
+        )
+        self.assertEqual(respuesta.status_code, 404)
+
+    async def test_resumen_y_reporte_mensual(self):
+        await self.assertIgualASincrona(vistas_async._resumen_drf, '/api/movimientos/resumen/')
+        await self.assertIgualASincrona(
+            vistas_async._resumen_drf, '/api/movimientos/resumen/',
+            {'fecha_desde': '2024-01-15', 'fecha_hasta': '2024-03-10'},
+        )
+        for params in [{'año': 2024, 'mes': 2}, {'año': 'dos mil'}]:
+            await self.assertIgualASincrona(
+                vistas_async._reporte_mensual_drf, '/api/movimientos/reporte_mensual/', params
+            )
+
+    async def test_acciones_de_lista(self):
+        # Las acciones detail=False no deben caer en la ruta async del detalle
+        acciones = [
+            nombre for nombre, metodo in inspect.getmembers(MovimientoFinancieroViewSet)
+            if getattr(metodo, 'detail', None) is False
+        ]
+        self.assertEqual(sorted(acciones), [
+            'bulk', 'exportar', 'importar', 'reporte_mensual', 'reporte_periodo', 'resumen', 'saldo', 'serie',
+        ])
+        for accion in acciones:
+            ruta = f'/api/movimientos/{getattr(MovimientoFinancieroViewSet, accion).url_path}/'
+            self.assertNotEqual(resolve(ruta).func, vistas_async.movimiento, ruta)
+
+        cabeceras = {'Authorization': f'Token {self.token}'}
+        for ruta in ['serie', 'saldo', 'reporte_periodo', 'exportar']:
+            respuesta = await self.get(f'/api/movimientos/{ruta}/')
+            self.assertEqual(respuesta.status_code, 200, ruta)
+        respuesta = await self.client.post(
+            '/api/movimientos/bulk/',
+            [{'descripcion': 'Lote', 'monto': '1.00', 'categoria': 'gasto', 'fecha': '2024-01-05'}],
+            content_type='application/json', headers=cabeceras,
+        )
+        self.assertEqual(respuesta.status_code, 201, respuesta.content)
+        archivo = SimpleUploadedFile(
+            'movimientos.csv', b'descripcion,monto,categoria,fecha\na,2.00,gasto,2024-01-05\n', content_type='text/csv'
+        )
+        respuesta = await self.client.post('/api/movimientos/importar/', {'archivo': archivo}, headers=cabeceras)
+        self.assertEqual(respuesta.status_code, 201, respuesta.content)
+
+    async def test_get_condicional(self):
+        respuesta = await self.get('/api/movimientos/')
+        self.assertEqual(respuesta.status_code, 200, respuesta.content)
+        repetida = await self.get('/api/movimientos/', **{'If-None-Match': respuesta['ETag']})
+        self.assertEqual(repetida.status_code, 304)
+        self.assertEqual(repetida.content, b'')
+
+    async def test_sin_token(self):
+        respuesta = await AsyncClient().get('/api/movimientos/')
+        self.assertEqual(respuesta.status_code, 401)
+        self.assertEqual(respuesta['WWW-Authenticate'], 'Token')
+        respuesta = await AsyncClient().get(
+            '/api/movimientos/resumen/', headers={'Authorization': 'Token invalido'}
+        )
+        self.assertEqual(respuesta.status_code, 401)
+
+    @override_settings(PASSWORD_ITERACIONES=1000)
+    async def test_registro_y_login(self):
+        anonimo = AsyncClient()
+        respuesta = await anonimo.post(
+            '/api/registro/', {'username': 'nuevo_async', 'password': 'clave-segura'},
+            content_type='application/json',
+        )
+        self.assertEqual(respuesta.status_code, 201)
+        token = json.loads(respuesta.content)['token']
+        respuesta = await anonimo.post(
+            '/api/login/', {'username': 'nuevo_async', 'password': 'clave-segura'},
+            content_type='application/json',
+        )
+        self.assertEqual(json.loads(respuesta.content), {'token': token})
+        respuesta = await anonimo.post(
+            '/api/login/', {'username': 'nuevo_async', 'password': 'otra'}, content_type='application/json',
+        )
+        self.assertEqual(respuesta.status_code, 400)
+
+
+class ArranqueTests(TestCase):
+
+    def test_sin_migraciones_pendientes(self):
+        # La base de pruebas se crea aplicando todas las migraciones
+        self.assertEqual(arranque.migraciones_pendientes(), [])
+
+
+class ParticionesTests(TestCase):
+    """
+    Convierte la tabla de movimientos en particionada (dentro de la
+    transacción de la prueba) y recorre la API y el mantenimiento.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = User.objects.create_user(username='particiones', password='clave-segura')
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+        for i, fecha in enumerate([date(2024, 1, 15), date(2024, 2, 10), date(2024, 3, 5)]):
+            self.client.post('/api/movimientos/', {
+                'descripcion': f'Movimiento {i}', 'monto': '10.00', 'categoria': 'gasto', 'fecha': fecha,
+            })
+        particiones.convertir('mensual', meses_adelante=1)
+
+    def explicar(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN {sql}', params)
+            return '\n'.join(fila[0] for fila in cursor.fetchall())
+
+    def test_api_sobre_tabla_particionada(self):
+        self.assertTrue(particiones.esta_particionada())
+        self.assertEqual(self.client.get('/api/movimientos/').data['count'], 3)
+
+        respuesta = self.client.post('/api/movimientos/', {
+            'descripcion': 'Nuevo', 'monto': '5.00', 'categoria': 'ingreso', 'fecha': '2024-02-20',
+        })
+        self.assertEqual(respuesta.status_code, 201)
+        pk = respuesta.data['id']
+        # Cambiar la fecha mueve la fila a otra partición
+        self.assertEqual(self.client.patch(f'/api/movimientos/{pk}/', {'fecha': '2024-03-20'}).status_code, 200)
+        self.assertEqual(self.client.get(f'/api/movimientos/{pk}/').data['fecha'], '2024-03-20')
+        self.assertEqual(self.client.delete(f'/api/movimientos/{pk}/').status_code, 204)
+
+        mensual = self.client.get('/api/movimientos/reporte_mensual/', {'año': 2024, 'mes': 2})
+        self.assertEqual(len(mensual.data['reporte_mensual']['top_movimientos']), 1)
+        self.assertEqual(resumenes.verificar([self.usuario]), [])
+
+    def test_poda_de_particiones(self):
+        plan = self.explicar(MovimientoFinanciero.objects.filter(
+            user=self.usuario, fecha__gte=date(2024, 2, 1), fecha__lte=date(2024, 2, 29),
+        ))
+        self.assertIn('api_movimientofinanciero_2024_02', plan)
+        self.assertNotIn('api_movimientofinanciero_2024_01', plan)
+        self.assertNotIn('api_movimientofinanciero_default', plan)
+
+    def test_crear_y_separar(self):
+        # Anterior a la primera partición: cae en la partición por defecto
+        self.client.post('/api/movimientos/', {
+            'descripcion': 'Antiguo', 'monto': '7.00', 'categoria': 'gasto', 'fecha': '2020-06-10',
+        })
+        hasta = date.today() + timedelta(days=400)
+        creadas = particiones.crear_particiones(hasta)
+        self.assertIn('api_movimientofinanciero_2020_06', creadas)
+        self.assertIn(f'api_movimientofinanciero_{hasta:%Y_%m}', creadas)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT count(*) FROM api_movimientofinanciero_default')
+            self.assertEqual(cursor.fetchone()[0], 0)
+            cursor.execute('SELECT count(*) FROM api_movimientofinanciero_2020_06')
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+        separadas = particiones.separar_particiones(date(2024, 3, 1), borrar=True)
+        self.assertEqual(separadas, [
+            'api_movimientofinanciero_2020_06',
+            'api_movimientofinanciero_2024_01',
+            'api_movimientofinanciero_2024_02',
+        ])
+        self.assertEqual(self.client.get('/api/movimientos/').data['count'], 1)
+        self.assertEqual(resumenes.verificar([self.usuario]), [])
@@ -1,7 +1,9 @@
-from django.urls import path, include
+from django.conf import settings
+from django.urls import path, re_path, include
 from rest_framework.routers import DefaultRouter
-from .views import MovimientoFinancieroViewSet, inicio, registro_usuario
-from rest_framework.authtoken.views import obtain_auth_token
+from .views import (
+    MovimientoFinancieroViewSet, inicio, login_usuario, registro_usuario, estadisticas_cache, metricas_prometheus,
+)
 
 router = DefaultRouter()
 router.register(r'movimientos', MovimientoFinancieroViewSet, basename='movimiento')
@@ -9,6 +11,25 @@ router.register(r'movimientos', MovimientoFinancieroViewSet, basename='movimient
 urlpatterns = [
     path('', inicio, name='inicio'),
     path('api/', include(router.urls)),
-    path('api/login/', obtain_auth_token, name='api_token_auth'),
+    path('api/login/', login_usuario, name='api_token_auth'),
     path('api/registro/', registro_usuario, name='registro_usuario'),
-] 
\ No newline at end of file
+    path('api/estadisticas/cache/', estadisticas_cache, name='estadisticas_cache'),
+    path('metrics', metricas_prometheus, name='metricas'),
+]
+
+if settings.ASYNC_VIEWS:
+    from . import vistas_async
+
+    # Van antes que las del router para atender estas rutas en el event loop.
+    # Mismos nombres que las rutas DRF, para reverse() y las métricas.
+    # El pk solo numérico: las acciones de lista (serie/, bulk/...) siguen
+    # en el router.
+    urlpatterns = [
+        path('api/movimientos/', vistas_async.movimientos, name='movimiento-list'),
+        path('api/movimientos/resumen/', vistas_async.resumen, name='movimiento-resumen'),
+        path('api/movimientos/reporte_mensual/', vistas_async.reporte_mensual,
+             name='movimiento-reporte-mensual'),
+        re_path(r'^api/movimientos/(?P<pk>\d+)/$', vistas_async.movimiento, name='movimiento-detail'),
+        path('api/login/', vistas_async.login, name='api_token_auth'),
+        path('api/registro/', vistas_async.registro, name='registro_usuario'),
+    ] + urlpatterns
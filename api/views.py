@@ -1,17 +1,49 @@
 from django.shortcuts import render
 from rest_framework import viewsets, status
 from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import NotFound
+from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
-from django.db.models import Sum, Q
-from datetime import datetime, date
+from rest_framework.parsers import MultiPartParser
+from rest_framework.utils.urls import replace_query_param
 from .models import MovimientoFinanciero
-from .serializers import MovimientoFinancieroSerializer
-from django.http import JsonResponse
+from .serializers import MovimientoFinancieroSerializer, LoginSerializer, columnas_para, representar_filas
+from .pagination import MovimientoPagination
+from .importacion import CSVMalFormado, importar_csv
+from .filtros import (
+    filtrar_movimientos, parse_fecha, parametros_reporte_mensual, parametros_reporte_periodo, parametros_serie,
+    parametros_campos, columnas_listado,
+)
+from .condicional import condicional
+from . import reportes, resumenes, exportacion, cache_reportes, metricas, saldos, cuentas
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.crypto import constant_time_compare
+from prometheus_client import CONTENT_TYPE_LATEST
+from django.db import transaction
+from django.conf import settings
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter, OpenApiExample
 from drf_spectacular.types import OpenApiTypes
-from django.contrib.auth.models import User
-from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework.authtoken.models import Token
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
+from rest_framework.authtoken.views import ObtainAuthToken
+
+# fields= / exclude= del listado y el detalle (ver filtros.parametros_campos)
+PARAMETROS_CAMPOS = [
+    OpenApiParameter(
+        name='fields',
+        type=OpenApiTypes.STR,
+        location=OpenApiParameter.QUERY,
+        description='Devuelve solo estos campos, separados por comas. Solo se leen sus columnas',
+        examples=[OpenApiExample('Lista para móvil', value='id,descripcion,monto,categoria,fecha')]
+    ),
+    OpenApiParameter(
+        name='exclude',
+        type=OpenApiTypes.STR,
+        location=OpenApiParameter.QUERY,
+        description='Devuelve todos los campos menos estos, separados por comas (no se combina con fields)',
+        examples=[OpenApiExample('Sin notas', value='notas')]
+    ),
+]
+
 
 @extend_schema_view(
     list=extend_schema(
@@ -42,6 +74,16 @@ from rest_framework.authtoken.models import Token
                 description='Fecha final para filtrar (YYYY-MM-DD)',
                 examples=[OpenApiExample('Ejemplo', value='2024-01-31')]
             ),
+            OpenApiParameter(
+                name='search',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description=(
+                    'Buscar en descripción y notas (texto completo en español, admite "frase" y -excluir). '
+                    'Sin ordenar_por los resultados van por relevancia'
+                ),
+                examples=[OpenApiExample('Ejemplo', value='supermercado')]
+            ),
             OpenApiParameter(
                 name='ordenar_por',
                 type=OpenApiTypes.STR,
@@ -63,6 +105,7 @@ from rest_framework.authtoken.models import Token
                     OpenApiExample('Descendente', value='desc'),
                 ]
             ),
+            *PARAMETROS_CAMPOS,
         ],
         tags=['movimientos']
     ),
@@ -98,6 +141,7 @@ from rest_framework.authtoken.models import Token
     retrieve=extend_schema(
         summary="Obtener movimiento específico",
         description="Obtiene los detalles de un movimiento financiero por su ID",
+        parameters=PARAMETROS_CAMPOS,
         tags=['movimientos']
     ),
     update=extend_schema(
@@ -130,6 +174,7 @@ class MovimientoFinancieroViewSet(viewsets.ModelViewSet):
     queryset = MovimientoFinanciero.objects.all()
     serializer_class = MovimientoFinancieroSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = MovimientoPagination
 
     def get_queryset(self):
         """
@@ -140,46 +185,52 @@ class MovimientoFinancieroViewSet(viewsets.ModelViewSet):
         - ordenar_por: 'fecha', 'monto', 'fecha_creacion'
         - orden: 'asc' o 'desc'
         """
-        queryset = MovimientoFinanciero.objects.filter(user=self.request.user)
-        
-        # Filtros
-        categoria = self.request.query_params.get('categoria', None)
-        if categoria:
-            queryset = queryset.filter(categoria=categoria)
-        
-        fecha_desde = self.request.query_params.get('fecha_desde', None)
-        if fecha_desde:
-            try:
-                fecha_desde = datetime.strptime(fecha_desde, '%Y-%m-%d').date()
-                queryset = queryset.filter(fecha__gte=fecha_desde)
-            except ValueError:
-                pass
-        
-        fecha_hasta = self.request.query_params.get('fecha_hasta', None)
-        if fecha_hasta:
-            try:
-                fecha_hasta = datetime.strptime(fecha_hasta, '%Y-%m-%d').date()
-                queryset = queryset.filter(fecha__lte=fecha_hasta)
-            except ValueError:
-                pass
-        
-        # Ordenamiento
-        ordenar_por = self.request.query_params.get('ordenar_por', 'fecha')
-        orden = self.request.query_params.get('orden', 'desc')
-        
-        if ordenar_por in ['fecha', 'monto', 'fecha_creacion']:
-            if orden == 'asc':
-                queryset = queryset.order_by(ordenar_por)
-            else:
-                queryset = queryset.order_by(f'-{ordenar_por}')
-        
-        return queryset
+        return filtrar_movimientos(self.request.user, self.request.query_params)
     
+    @condicional
+    def list(self, request, *args, **kwargs):
+        try:
+            campos = parametros_campos(request.query_params)
+        except ValueError as error:
+            return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Filas de .values() en lugar de instancias: misma salida que el
+        # serializer con una fracción del costo por fila. Solo se leen las
+        # columnas de los campos pedidos.
+        queryset = self.filter_queryset(self.get_queryset())
+        queryset = queryset.values(*columnas_listado(queryset, campos))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(representar_filas(page, campos))
+        return Response(representar_filas(queryset, campos))
+
+    @condicional
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            campos = parametros_campos(request.query_params)
+        except ValueError as error:
+            return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = self.get_queryset().only(*columnas_para(campos))
+        instancia = get_object_or_404(queryset, pk=kwargs[self.lookup_field])
+        self.check_object_permissions(request, instancia)
+        return Response(self.get_serializer(instancia, campos=campos).data)
+
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        with transaction.atomic():
+            movimiento = serializer.save(user=self.request.user)
+            resumenes.registrar_alta(movimiento)
 
     def perform_update(self, serializer):
-        serializer.save(user=self.request.user)
+        with transaction.atomic():
+            anterior = resumenes.estado_guardado(serializer.instance)
+            movimiento = serializer.save(user=self.request.user)
+            resumenes.registrar_cambio(anterior, movimiento)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            resumenes.registrar_baja(resumenes.estado_guardado(instance))
+            instance.delete()
 
     @extend_schema(
         summary="Obtener resumen financiero",
@@ -224,6 +275,7 @@ class MovimientoFinancieroViewSet(viewsets.ModelViewSet):
         tags=['reportes']
     )
     @action(detail=False, methods=['get'])
+    @condicional
     def resumen(self, request):
         """
         Obtiene un resumen de ingresos y gastos en un rango de fechas.
@@ -234,53 +286,23 @@ class MovimientoFinancieroViewSet(viewsets.ModelViewSet):
         """
         fecha_desde = request.query_params.get('fecha_desde', None)
         fecha_hasta = request.query_params.get('fecha_hasta', None)
+        filtro_desde = parse_fecha(fecha_desde)
+        filtro_hasta = parse_fecha(fecha_hasta)
         
-        queryset = MovimientoFinanciero.objects.filter(user=request.user)
-        
-        if fecha_desde:
-            try:
-                fecha_desde = datetime.strptime(fecha_desde, '%Y-%m-%d').date()
-                queryset = queryset.filter(fecha__gte=fecha_desde)
-            except ValueError:
-                pass
-        
-        if fecha_hasta:
-            try:
-                fecha_hasta = datetime.strptime(fecha_hasta, '%Y-%m-%d').date()
-                queryset = queryset.filter(fecha__lte=fecha_hasta)
-            except ValueError:
-                pass
-        
-        # Calcular totales
-        total_ingresos = queryset.filter(categoria='ingreso').aggregate(
-            total=Sum('monto')
-        )['total'] or 0
-        
-        total_gastos = queryset.filter(categoria='gasto').aggregate(
-            total=Sum('monto')
-        )['total'] or 0
-        
-        balance = total_ingresos - total_gastos
-        
-        # Estadísticas adicionales
-        total_movimientos = queryset.count()
-        movimientos_ingresos = queryset.filter(categoria='ingreso').count()
-        movimientos_gastos = queryset.filter(categoria='gasto').count()
+        # Totales y conteos desde la caché o en una sola consulta
+        totales, acierto = cache_reportes.obtener(
+            request.user.pk,
+            'resumen',
+            {'fecha_desde': filtro_desde, 'fecha_hasta': filtro_hasta},
+            lambda: reportes.resumen(request.user, filtro_desde, filtro_hasta),
+        )
         
-        return Response({
-            'resumen': {
-                'total_ingresos': float(total_ingresos),
-                'total_gastos': float(total_gastos),
-                'balance': float(balance),
-                'total_movimientos': total_movimientos,
-                'movimientos_ingresos': movimientos_ingresos,
-                'movimientos_gastos': movimientos_gastos,
-            },
-            'rango_fechas': {
-                'fecha_desde': fecha_desde,
-                'fecha_hasta': fecha_hasta,
-            }
-        })
+        # Las fechas inválidas se devuelven tal como llegaron
+        response = Response(reportes.datos_resumen(
+            totales, filtro_desde or fecha_desde, filtro_hasta or fecha_hasta
+        ))
+        response['X-Cache'] = 'HIT' if acierto else 'MISS'
+        return response
     
     @extend_schema(
         summary="Generar reporte mensual",
@@ -328,6 +350,7 @@ class MovimientoFinancieroViewSet(viewsets.ModelViewSet):
         tags=['reportes']
     )
     @action(detail=False, methods=['get'])
+    @condicional
     def reporte_mensual(self, request):
         """
         Genera un reporte mensual de movimientos.
@@ -336,45 +359,20 @@ class MovimientoFinancieroViewSet(viewsets.ModelViewSet):
         - año: año del reporte (YYYY)
         - mes: mes del reporte (1-12)
         """
-        año = request.query_params.get('año', date.today().year)
-        mes = request.query_params.get('mes', date.today().month)
-        
         try:
-            año = int(año)
-            mes = int(mes)
+            año, mes = parametros_reporte_mensual(request.query_params)
             
-            # Filtrar por año y mes
-            queryset = MovimientoFinanciero.objects.filter(
-                user=request.user,
-                fecha__year=año,
-                fecha__month=mes
+            # Totales del mes (1 consulta) y top 5 por monto (1 consulta), o desde la caché
+            reporte, acierto = cache_reportes.obtener(
+                request.user.pk,
+                'reporte_mensual',
+                {'año': año, 'mes': mes},
+                lambda: reportes.reporte_mensual(request.user, año, mes),
             )
             
-            # Calcular totales
-            total_ingresos = queryset.filter(categoria='ingreso').aggregate(
-                total=Sum('monto')
-            )['total'] or 0
-            
-            total_gastos = queryset.filter(categoria='gasto').aggregate(
-                total=Sum('monto')
-            )['total'] or 0
-            
-            balance = total_ingresos - total_gastos
-            
-            # Top 5 movimientos por monto
-            top_movimientos = queryset.order_by('-monto')[:5]
-            
-            return Response({
-                'reporte_mensual': {
-                    'año': año,
-                    'mes': mes,
-                    'total_ingresos': float(total_ingresos),
-                    'total_gastos': float(total_gastos),
-                    'balance': float(balance),
-                    'total_movimientos': queryset.count(),
-                    'top_movimientos': MovimientoFinancieroSerializer(top_movimientos, many=True).data
-                }
-            })
+            response = Response(reportes.datos_reporte_mensual(año, mes, reporte))
+            response['X-Cache'] = 'HIT' if acierto else 'MISS'
+            return response
             
         except ValueError:
             return Response(
@@ -382,6 +380,489 @@ class MovimientoFinancieroViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+    @extend_schema(
+        summary="Reporte de varios meses",
+        description=(
+            "reporte_mensual de cada mes de un año o de un rango de meses en una sola "
+            "llamada: totales, balance, cantidad y los movimientos de mayor monto de cada "
+            "mes, y los totales del periodo. Incluye los meses sin movimientos."
+        ),
+        parameters=[
+            OpenApiParameter(
+                name='año',
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description='Año del reporte (por defecto el actual)',
+                examples=[OpenApiExample('Ejemplo', value=2024)]
+            ),
+            OpenApiParameter(
+                name='mes_desde',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Primer mes (YYYY-MM), junto con mes_hasta en lugar de año',
+                examples=[OpenApiExample('Ejemplo', value='2024-01')]
+            ),
+            OpenApiParameter(
+                name='mes_hasta',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Último mes (YYYY-MM), incluido',
+                examples=[OpenApiExample('Ejemplo', value='2024-06')]
+            ),
+            OpenApiParameter(
+                name='top',
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description='Movimientos de mayor monto por mes (0 a 50, por defecto 5)',
+                examples=[OpenApiExample('Ejemplo', value=5)]
+            ),
+        ],
+        responses={
+            200: {
+                'description': 'Reporte del periodo',
+                'examples': [
+                    {
+                        'reporte_periodo': {
+                            'mes_desde': '2024-01',
+                            'mes_hasta': '2024-02',
+                            'total_ingresos': 5000.0,
+                            'total_gastos': 2500.0,
+                            'balance': 2500.0,
+                            'total_movimientos': 10,
+                            'meses': [
+                                {
+                                    'año': 2024,
+                                    'mes': 1,
+                                    'total_ingresos': 5000.0,
+                                    'total_gastos': 2500.0,
+                                    'balance': 2500.0,
+                                    'total_movimientos': 10,
+                                    'top_movimientos': []
+                                },
+                                {
+                                    'año': 2024,
+                                    'mes': 2,
+                                    'total_ingresos': 0.0,
+                                    'total_gastos': 0.0,
+                                    'balance': 0.0,
+                                    'total_movimientos': 0,
+                                    'top_movimientos': []
+                                }
+                            ]
+                        }
+                    }
+                ]
+            },
+            400: {
+                'description': 'Parámetros inválidos',
+                'examples': [
+                    {'error': 'mes_desde debe tener el formato YYYY-MM'}
+                ]
+            }
+        },
+        tags=['reportes']
+    )
+    @action(detail=False, methods=['get'])
+    @condicional
+    def reporte_periodo(self, request):
+        """
+        reporte_mensual de todos los meses de un periodo en 2 consultas.
+        
+        Parámetros:
+        - año: año del reporte (YYYY)
+        - mes_desde / mes_hasta: rango de meses (YYYY-MM), en lugar de año
+        - top: movimientos de mayor monto por mes
+        """
+        try:
+            desde, hasta, top = parametros_reporte_periodo(request.query_params)
+        except ValueError as error:
+            return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        reporte, acierto = cache_reportes.obtener(
+            request.user.pk,
+            'reporte_periodo',
+            {'desde': desde, 'hasta': hasta, 'top': top},
+            lambda: reportes.reporte_periodo(request.user, desde, hasta, top),
+        )
+        
+        response = Response(reportes.datos_reporte_periodo(desde, hasta, reporte))
+        response['X-Cache'] = 'HIT' if acierto else 'MISS'
+        return response
+
+    @extend_schema(
+        summary="Serie temporal de ingresos y gastos",
+        description=(
+            "Totales y cantidad de ingresos y gastos por día, semana (desde el lunes), mes o año "
+            "en un rango de fechas, incluidos los periodos sin movimientos. Reemplaza pedir "
+            "reporte_mensual mes por mes."
+        ),
+        parameters=[
+            OpenApiParameter(
+                name='agrupar_por',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Periodo de cada punto: dia, semana, mes (por defecto) o año',
+                examples=[
+                    OpenApiExample('Por mes', value='mes'),
+                    OpenApiExample('Por semana', value='semana'),
+                ]
+            ),
+            OpenApiParameter(
+                name='fecha_desde',
+                type=OpenApiTypes.DATE,
+                location=OpenApiParameter.QUERY,
+                description='Fecha inicial (YYYY-MM-DD); por defecto los últimos 12 meses, 12 semanas, 31 días o 5 años',
+                examples=[OpenApiExample('Ejemplo', value='2023-01-01')]
+            ),
+            OpenApiParameter(
+                name='fecha_hasta',
+                type=OpenApiTypes.DATE,
+                location=OpenApiParameter.QUERY,
+                description='Fecha final (YYYY-MM-DD); por defecto hoy en la zona horaria',
+                examples=[OpenApiExample('Ejemplo', value='2024-12-31')]
+            ),
+            OpenApiParameter(
+                name='zona',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Zona horaria IANA que define el día de hoy; por defecto la del servidor',
+                examples=[OpenApiExample('Ejemplo', value='America/Bogota')]
+            ),
+        ],
+        responses={
+            200: {
+                'description': 'Serie temporal',
+                'examples': [
+                    {
+                        'serie': {
+                            'agrupar_por': 'mes',
+                            'fecha_desde': '2024-01-01',
+                            'fecha_hasta': '2024-02-29',
+                            'zona': 'UTC',
+                            'periodos': [
+                                {
+                                    'periodo': '2024-01-01',
+                                    'total_ingresos': 5000.0,
+                                    'total_gastos': 2500.0,
+                                    'balance': 2500.0,
+                                    'movimientos_ingresos': 5,
+                                    'movimientos_gastos': 5
+                                },
+                                {
+                                    'periodo': '2024-02-01',
+                                    'total_ingresos': 0.0,
+                                    'total_gastos': 0.0,
+                                    'balance': 0.0,
+                                    'movimientos_ingresos': 0,
+                                    'movimientos_gastos': 0
+                                }
+                            ]
+                        }
+                    }
+                ]
+            },
+            400: {
+                'description': 'Parámetros inválidos',
+                'examples': [
+                    {'error': 'agrupar_por debe ser dia, semana, mes o año'}
+                ]
+            }
+        },
+        tags=['reportes']
+    )
+    @action(detail=False, methods=['get'])
+    @condicional
+    def serie(self, request):
+        """
+        Serie temporal de ingresos y gastos en una sola consulta.
+        
+        Parámetros:
+        - agrupar_por: dia, semana, mes o año
+        - fecha_desde: fecha inicial (YYYY-MM-DD)
+        - fecha_hasta: fecha final (YYYY-MM-DD)
+        - zona: zona horaria para el día de hoy
+        """
+        try:
+            agrupar_por, fecha_desde, fecha_hasta, zona = parametros_serie(request.query_params)
+        except ValueError as error:
+            return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        filas, acierto = cache_reportes.obtener(
+            request.user.pk,
+            'serie',
+            {'agrupar_por': agrupar_por, 'fecha_desde': fecha_desde, 'fecha_hasta': fecha_hasta},
+            lambda: reportes.serie(request.user, agrupar_por, fecha_desde, fecha_hasta),
+        )
+        
+        response = Response(reportes.datos_serie(agrupar_por, fecha_desde, fecha_hasta, zona, filas))
+        response['X-Cache'] = 'HIT' if acierto else 'MISS'
+        return response
+
+    @extend_schema(
+        summary="Saldo acumulado",
+        description=(
+            "Movimientos en orden cronológico (fecha, fecha de creación, id) con el saldo "
+            "acumulado después de cada uno. El saldo parte del saldo anterior a fecha_desde. "
+            "Se pagina por cursor hacia adelante con `next`."
+        ),
+        parameters=[
+            OpenApiParameter(
+                name='fecha_desde',
+                type=OpenApiTypes.DATE,
+                location=OpenApiParameter.QUERY,
+                description='Fecha inicial (YYYY-MM-DD)',
+                examples=[OpenApiExample('Ejemplo', value='2024-01-01')]
+            ),
+            OpenApiParameter(
+                name='fecha_hasta',
+                type=OpenApiTypes.DATE,
+                location=OpenApiParameter.QUERY,
+                description='Fecha final (YYYY-MM-DD)',
+                examples=[OpenApiExample('Ejemplo', value='2024-12-31')]
+            ),
+            OpenApiParameter(name='page_size', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY),
+            OpenApiParameter(
+                name='cursor',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Cursor devuelto en `next`'
+            ),
+        ],
+        responses={
+            200: {
+                'description': 'Página de movimientos con saldo',
+                'examples': [
+                    {
+                        'saldo_inicial': '2500.00',
+                        'next': 'http://localhost:8000/api/movimientos/saldo/?cursor=...',
+                        'results': [
+                            {
+                                'id': 101,
+                                'descripcion': 'Supermercado',
+                                'monto': '150.50',
+                                'categoria': 'gasto',
+                                'categoria_display': 'Gasto',
+                                'fecha': '2024-01-16',
+                                'notas': None,
+                                'fecha_creacion': '2024-01-16T10:00:00Z',
+                                'fecha_actualizacion': '2024-01-16T10:00:00Z',
+                                'saldo': '2349.50'
+                            }
+                        ]
+                    }
+                ]
+            }
+        },
+        tags=['reportes']
+    )
+    @action(detail=False, methods=['get'])
+    @condicional
+    def saldo(self, request):
+        """
+        Saldo acumulado movimiento a movimiento, calculado con una función de
+        ventana en la base de datos (ver api.saldos).
+        
+        Parámetros:
+        - fecha_desde: fecha inicial (YYYY-MM-DD)
+        - fecha_hasta: fecha final (YYYY-MM-DD)
+        - page_size: movimientos por página
+        - cursor: continuación devuelta en `next`
+        """
+        cursor = request.query_params.get('cursor')
+        if cursor:
+            try:
+                cursor = saldos.decodificar_cursor(cursor)
+            except ValueError:
+                raise NotFound(self.paginator.invalid_cursor_message)
+        filas, inicial, siguiente = saldos.pagina(
+            request.user,
+            parse_fecha(request.query_params.get('fecha_desde')),
+            parse_fecha(request.query_params.get('fecha_hasta')),
+            cursor or None,
+            self.paginator.get_page_size(request),
+        )
+        return Response({
+            'saldo_inicial': str(inicial),
+            'next': siguiente and replace_query_param(
+                request.build_absolute_uri(), 'cursor', siguiente
+            ),
+            'results': saldos.representar(filas),
+        })
+
+    @extend_schema(
+        summary="Crear movimientos en lote",
+        description=(
+            "Crea varios movimientos en una sola petición. Cada fila se valida con las mismas "
+            "reglas que la creación individual; si alguna es inválida no se crea ninguna."
+        ),
+        request=MovimientoFinancieroSerializer(many=True),
+        responses={
+            201: {
+                'description': 'Movimientos creados',
+                'examples': [
+                    {'creados': 2, 'ids': [101, 102]}
+                ]
+            },
+            400: {
+                'description': 'Filas inválidas',
+                'examples': [
+                    {'errores': [{'fila': 1, 'errores': {'monto': ['El monto debe ser mayor a 0']}}]}
+                ]
+            }
+        },
+        tags=['movimientos']
+    )
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk(self, request):
+        """
+        Crea una lista de movimientos con bulk_create dentro de una transacción.
+        
+        Máximo MOVIMIENTOS_MAX_BULK filas por petición.
+        """
+        if not isinstance(request.data, list):
+            return Response(
+                {'error': 'Se esperaba una lista de movimientos.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(request.data) > settings.MOVIMIENTOS_MAX_BULK:
+            return Response(
+                {'error': f'Máximo {settings.MOVIMIENTOS_MAX_BULK} movimientos por petición.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        serializer = self.get_serializer(data=request.data, many=True)
+        if not serializer.is_valid():
+            errores = [
+                {'fila': fila, 'errores': error}
+                for fila, error in enumerate(serializer.errors)
+                if error
+            ]
+            return Response({'errores': errores}, status=status.HTTP_400_BAD_REQUEST)
+        
+        movimientos = [
+            MovimientoFinanciero(user=request.user, **datos)
+            for datos in serializer.validated_data
+        ]
+        with transaction.atomic():
+            MovimientoFinanciero.objects.bulk_create(movimientos, batch_size=500)
+            resumenes.registrar_alta(*movimientos)
+        
+        return Response(
+            {'creados': len(movimientos), 'ids': [m.pk for m in movimientos]},
+            status=status.HTTP_201_CREATED
+        )
+
+    @extend_schema(
+        summary="Exportar movimientos",
+        description=(
+            "Descarga todos los movimientos que cumplen los filtros del listado, sin paginar, "
+            "en CSV o NDJSON. La respuesta se envía por partes a medida que se lee de la base de datos."
+        ),
+        parameters=[
+            OpenApiParameter(
+                name='formato',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Formato de salida (csv o ndjson)',
+                examples=[
+                    OpenApiExample('CSV', value='csv'),
+                    OpenApiExample('NDJSON', value='ndjson'),
+                ]
+            ),
+            OpenApiParameter(name='categoria', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY),
+            OpenApiParameter(name='fecha_desde', type=OpenApiTypes.DATE, location=OpenApiParameter.QUERY),
+            OpenApiParameter(name='fecha_hasta', type=OpenApiTypes.DATE, location=OpenApiParameter.QUERY),
+            OpenApiParameter(name='ordenar_por', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY),
+            OpenApiParameter(name='orden', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY),
+            OpenApiParameter(name='search', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY),
+        ],
+        responses={200: OpenApiTypes.BINARY},
+        tags=['movimientos']
+    )
+    @action(detail=False, methods=['get'])
+    def exportar(self, request):
+        """
+        Exporta los movimientos filtrados como CSV o NDJSON.
+        
+        Usa un cursor del lado del servidor, por lo que la memoria no
+        depende de la cantidad de movimientos.
+        """
+        formato = request.query_params.get('formato', 'csv')
+        if formato not in exportacion.FORMATOS:
+            return Response(
+                {'error': 'Formato inválido. Usa csv o ndjson.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        generador, content_type = exportacion.FORMATOS[formato]
+        response = StreamingHttpResponse(generador(self.get_queryset()), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="movimientos.{formato}"'
+        return response
+
+    @extend_schema(
+        summary="Importar movimientos desde CSV",
+        description=(
+            "Carga masiva de un archivo CSV (UTF-8, con cabecera descripcion, monto, categoria, fecha "
+            "y opcionalmente notas) usando COPY de PostgreSQL. Las filas válidas se insertan y las "
+            "inválidas se informan con su motivo."
+        ),
+        request={
+            'multipart/form-data': {
+                'type': 'object',
+                'properties': {
+                    'archivo': {'type': 'string', 'format': 'binary'},
+                },
+                'required': ['archivo']
+            }
+        },
+        responses={
+            201: {
+                'description': 'Importación realizada',
+                'examples': [
+                    {
+                        'importados': 998,
+                        'rechazados': 2,
+                        'errores': [
+                            {'fila': 17, 'motivo': 'El monto debe ser mayor a 0', 'datos': {}}
+                        ]
+                    }
+                ]
+            },
+            400: {
+                'description': 'Archivo faltante, cabecera inválida o línea que COPY no puede leer',
+                'examples': [
+                    {
+                        'error': 'CSV mal formado en la línea 2: missing data for column "fecha"',
+                        'linea': 2,
+                        'contenido': 'Supermercado,25.40,gasto'
+                    }
+                ]
+            }
+        },
+        tags=['movimientos']
+    )
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser])
+    def importar(self, request):
+        """
+        Importa un CSV de movimientos para el usuario autenticado.
+        """
+        archivo = request.FILES.get('archivo')
+        if archivo is None:
+            return Response(
+                {'error': 'Debes enviar el CSV en el campo archivo.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            resultado = importar_csv(archivo, request.user)
+        except CSVMalFormado as error:
+            return Response(
+                {'error': str(error), 'linea': error.linea, 'contenido': error.contenido},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except ValueError as error:
+            return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(resultado, status=status.HTTP_201_CREATED)
+
 @extend_schema(
     summary="Información de la API",
     description="Muestra información general sobre la API de movimientos financieros",
@@ -415,6 +896,9 @@ def inicio(request):
             'movimientos': '/api/movimientos/',
             'resumen': '/api/movimientos/resumen/',
             'reporte_mensual': '/api/movimientos/reporte_mensual/',
+            'reporte_periodo': '/api/movimientos/reporte_periodo/',
+            'serie': '/api/movimientos/serie/',
+            'saldo': '/api/movimientos/saldo/',
             'registro': '/api/registro/',
             'login': '/api/login/',
             'swagger': '/api/docs/',
@@ -423,11 +907,17 @@ def inicio(request):
         'operaciones': {
             'GET /api/movimientos/': 'Listar todos los movimientos',
             'POST /api/movimientos/': 'Crear un nuevo movimiento',
+            'POST /api/movimientos/bulk/': 'Crear varios movimientos en una sola petición',
+            'GET /api/movimientos/exportar/': 'Exportar movimientos en CSV o NDJSON',
+            'POST /api/movimientos/importar/': 'Importar movimientos desde un CSV',
             'GET /api/movimientos/{id}/': 'Obtener un movimiento específico',
             'PUT /api/movimientos/{id}/': 'Actualizar un movimiento',
             'DELETE /api/movimientos/{id}/': 'Eliminar un movimiento',
             'GET /api/movimientos/resumen/': 'Obtener resumen de ingresos y gastos',
             'GET /api/movimientos/reporte_mensual/': 'Generar reporte mensual',
+            'GET /api/movimientos/reporte_periodo/': 'Reporte mensual de cada mes de un año o rango de meses',
+            'GET /api/movimientos/serie/': 'Ingresos y gastos por día, semana, mes o año',
+            'GET /api/movimientos/saldo/': 'Movimientos con saldo acumulado',
             'POST /api/registro/': 'Registrar un nuevo usuario',
             'POST /api/login/': 'Iniciar sesión',
         },
@@ -435,8 +925,11 @@ def inicio(request):
             'categoria': 'ingreso o gasto',
             'fecha_desde': 'YYYY-MM-DD',
             'fecha_hasta': 'YYYY-MM-DD',
+            'search': 'texto a buscar en descripción y notas',
             'ordenar_por': 'fecha, monto, fecha_creacion',
             'orden': 'asc o desc',
+            'page_size': 'cantidad de resultados por página',
+            'paginacion': 'cursor (paginación por cursor usando next/previous)',
         },
         'documentacion': {
             'swagger': 'Interfaz interactiva para probar la API',
@@ -468,6 +961,9 @@ def inicio(request):
         },
         400: {
             'description': 'Datos inválidos',
+        },
+        503: {
+            'description': 'Demasiados registros o logins simultáneos (ver Retry-After)',
         }
     },
     tags=['usuarios']
@@ -480,8 +976,54 @@ def registro_usuario(request):
     email = request.data.get('email', '')
     if not username or not password:
         return Response({'error': 'Username y password son obligatorios.'}, status=400)
-    if User.objects.filter(username=username).exists():
+    token = cuentas.registrar(username, password, email)
+    if token is None:
         return Response({'error': 'El usuario ya existe.'}, status=400)
-    user = User.objects.create_user(username=username, password=password, email=email)
-    token, _ = Token.objects.get_or_create(user=user)
-    return Response({'token': token.key}, status=201)
+    return Response({'token': token}, status=201)
+
+
+@extend_schema_view(
+    post=extend_schema(
+        summary="Login",
+        description="Devuelve el token del usuario. Responde 503 con Retry-After si hay demasiados logins simultáneos.",
+        tags=['usuarios']
+    )
+)
+class LoginView(ObtainAuthToken):
+    """
+    POST /api/login/: obtain_auth_token con el hash de la contraseña en el
+    pool de api.cuentas, fuera del hilo de la petición.
+    """
+    serializer_class = LoginSerializer
+
+
+login_usuario = LoginView.as_view()
+
+@extend_schema(
+    summary="Estadísticas de la caché de reportes",
+    description="Aciertos y fallos acumulados de la caché de resumen y reporte mensual (solo administradores)",
+    responses={
+        200: {
+            'description': 'Estadísticas',
+            'examples': [
+                {'aciertos': 120, 'fallos': 30, 'tasa_aciertos': 0.8}
+            ]
+        }
+    },
+    tags=['reportes']
+)
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def estadisticas_cache(request):
+    return Response(cache_reportes.estadisticas())
+
+
+def metricas_prometheus(request):
+    """
+    GET /metrics: histogramas de latencia, consultas SQL y serialización por
+    vista, en formato de texto de Prometheus.
+    """
+    token = settings.METRICAS_TOKEN
+    if token and not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponse(status=401)
+    return HttpResponse(metricas.exportar(), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,340 @@
+"""
+Vistas async para el modo ASGI (ASYNC_VIEWS=True).
+
+Atienden en el event loop las lecturas más frecuentes (listado, detalle,
+resumen y reporte mensual) con el ORM async de Django, y el login/registro
+con el hash de contraseñas en el pool de api.cuentas. El resto de métodos
+de cada ruta se delega a la vista DRF síncrona, así que el contrato de la
+API no cambia.
+"""
+import asyncio
+import io
+import json
+import weakref
+from functools import wraps
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import close_old_connections, connection
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from rest_framework.authtoken.models import Token
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.request import Request
+from .autenticacion import CachedTokenAuthentication
+from .condicional import condicional_async
+from .filtros import (
+    filtrar_movimientos, parse_fecha, parametros_reporte_mensual, parametros_campos, columnas_listado,
+)
+from .models import MovimientoFinanciero
+from .pagination import MovimientoPagination
+from .parsers import MessagePackParser
+from .renderers import MessagePackRenderer, ORJSONRenderer
+from .serializers import MovimientoFinancieroSerializer, columnas_para, representar_filas
+from .views import MovimientoFinancieroViewSet, login_usuario, registro_usuario
+from . import busqueda, reportes, cache_reportes, cuentas
+
+METODOS_LECTURA = ('GET', 'HEAD')
+
+_renderers = [ORJSONRenderer(), MessagePackRenderer()]
+_negociacion = DefaultContentNegotiation()
+_msgpack = MessagePackParser()
+_autenticacion = CachedTokenAuthentication()
+
+# Vistas DRF de las mismas rutas, para los métodos que no son de lectura
+_lista_drf = MovimientoFinancieroViewSet.as_view(
+    {'get': 'list', 'post': 'create'}, basename='movimiento', detail=False
+)
+_detalle_drf = MovimientoFinancieroViewSet.as_view(
+    {'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'},
+    basename='movimiento', detail=True
+)
+_resumen_drf = MovimientoFinancieroViewSet.as_view(
+    {'get': 'resumen'}, basename='movimiento', detail=False
+)
+_reporte_mensual_drf = MovimientoFinancieroViewSet.as_view(
+    {'get': 'reporte_mensual'}, basename='movimiento', detail=False
+)
+
+
+_semaforos = weakref.WeakKeyDictionary()
+
+
+def _limite_bd():
+    """
+    Semáforo del event loop actual que acota las peticiones con conexión
+    abierta a la base de datos (ASYNC_MAX_CONSULTAS). Cada petición async usa
+    su propia conexión; sin límite, muchas conexiones simultáneas superarían
+    max_connections de PostgreSQL. Las demás esperan su turno en el loop.
+    """
+    loop = asyncio.get_running_loop()
+    semaforo = _semaforos.get(loop)
+    if semaforo is None:
+        semaforo = _semaforos[loop] = asyncio.Semaphore(settings.ASYNC_MAX_CONSULTAS)
+    return semaforo
+
+
+def _liberar_conexion():
+    # Dentro de una transacción ajena (pruebas, benchmark) la conexión no es nuestra
+    if not connection.in_atomic_block:
+        close_old_connections()
+
+
+def con_limite_bd(vista):
+    """
+    Ejecuta la vista async dentro del límite de conexiones y libera la
+    conexión de esta petición antes de ceder el turno.
+    """
+    @wraps(vista)
+    async def inner(request, *args, **kwargs):
+        async with _limite_bd():
+            try:
+                return await vista(request, *args, **kwargs)
+            finally:
+                await sync_to_async(_liberar_conexion)()
+    return inner
+
+
+def _negociar(request):
+    """
+    Renderer de la respuesta según Accept o ?format=, con la negociación de
+    DRF entre los mismos formatos que las vistas síncronas. Se guarda en el
+    request junto con el tipo elegido, del que depende la ETag. Si no se
+    acepta ninguno se responde JSON, como antes de negociar.
+    """
+    if not hasattr(request, 'accepted_renderer'):
+        try:
+            renderer, tipo = _negociacion.select_renderer(Request(request), _renderers)
+        except exceptions.NotAcceptable:
+            renderer, tipo = _renderers[0], _renderers[0].media_type
+        request.accepted_renderer, request.accepted_media_type = renderer, tipo
+    return request.accepted_renderer
+
+
+def _respuesta(request, datos, status=status.HTTP_200_OK):
+    # Mismos bytes que producen las vistas DRF en el formato negociado
+    renderer = _negociar(request)
+    return HttpResponse(renderer.render(datos), content_type=renderer.media_type, status=status)
+
+
+def _error(exc, request):
+    response = _respuesta(request, {'detail': exc.detail}, status=exc.status_code)
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        response.status_code = status.HTTP_401_UNAUTHORIZED
+        response['WWW-Authenticate'] = _autenticacion.authenticate_header(request)
+    if getattr(exc, 'wait', None):
+        response['Retry-After'] = str(int(exc.wait))
+    return response
+
+
+async def _autenticar(request):
+    """
+    Token (CachedTokenAuthentication) o sesión de Django, como en la API síncrona.
+    """
+    resultado = await _autenticacion.aauthenticate(request)
+    if resultado is not None:
+        return resultado[0]
+    user = await request.auser()
+    if not user.is_authenticated:
+        raise exceptions.NotAuthenticated()
+    return user
+
+
+def lectura_async(vista_drf):
+    """
+    Atiende GET/HEAD con la vista async decorada (usuario autenticado
+    obligatorio) y delega los demás métodos a `vista_drf` en un hilo.
+    """
+    def decorador(vista):
+        @csrf_exempt
+        @con_limite_bd
+        @wraps(vista)
+        async def inner(request, *args, **kwargs):
+            if request.method not in METODOS_LECTURA:
+                return await sync_to_async(vista_drf)(request, *args, **kwargs)
+            try:
+                _negociar(request)
+                request.user = await _autenticar(request)
+                return await vista(request, *args, **kwargs)
+            except exceptions.APIException as exc:
+                return _error(exc, request)
+        return inner
+    return decorador
+
+
+@lectura_async(_lista_drf)
+@condicional_async
+async def movimientos(request):
+    """
+    GET /api/movimientos/ con los mismos filtros, orden y paginación que la vista DRF.
+    """
+    try:
+        campos = parametros_campos(request.GET)
+    except ValueError as error:
+        return _respuesta(request, {'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+    # ?search= usa busqueda.buscar(), que necesita saberlo sin consultar desde el loop
+    await busqueda.atrigramas_disponibles()
+    queryset = filtrar_movimientos(request.user, request.GET)
+    queryset = queryset.values(*columnas_listado(queryset, campos))
+    paginacion = MovimientoPagination()
+    pagina = await paginacion.apaginate_queryset(queryset, Request(request))
+    if pagina is None:
+        return _respuesta(request, representar_filas([m async for m in queryset], campos))
+    datos = representar_filas(pagina, campos)
+    return _respuesta(request, paginacion.get_paginated_response(datos).data)
+
+
+@lectura_async(_detalle_drf)
+@condicional_async
+async def movimiento(request, pk):
+    """
+    GET /api/movimientos/{id}/
+    """
+    try:
+        campos = parametros_campos(request.GET)
+    except ValueError as error:
+        return _respuesta(request, {'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+    await busqueda.atrigramas_disponibles()
+    queryset = filtrar_movimientos(request.user, request.GET).only(*columnas_para(campos))
+    try:
+        instancia = await queryset.aget(pk=pk)
+    except MovimientoFinanciero.DoesNotExist:
+        raise exceptions.NotFound('No MovimientoFinanciero matches the given query.')
+    except (ValueError, TypeError, ValidationError):
+        raise exceptions.NotFound()
+    return _respuesta(request, MovimientoFinancieroSerializer(instancia, campos=campos).data)
+
+
+@lectura_async(_resumen_drf)
+@condicional_async
+async def resumen(request):
+    """
+    GET /api/movimientos/resumen/
+    """
+    fecha_desde = request.GET.get('fecha_desde', None)
+    fecha_hasta = request.GET.get('fecha_hasta', None)
+    filtro_desde = parse_fecha(fecha_desde)
+    filtro_hasta = parse_fecha(fecha_hasta)
+
+    totales, acierto = await cache_reportes.aobtener(
+        request.user.pk,
+        'resumen',
+        {'fecha_desde': filtro_desde, 'fecha_hasta': filtro_hasta},
+        lambda: reportes.aresumen(request.user, filtro_desde, filtro_hasta),
+    )
+
+    response = _respuesta(request, reportes.datos_resumen(
+        totales, filtro_desde or fecha_desde, filtro_hasta or fecha_hasta
+    ))
+    response['X-Cache'] = 'HIT' if acierto else 'MISS'
+    return response
+
+
+@lectura_async(_reporte_mensual_drf)
+@condicional_async
+async def reporte_mensual(request):
+    """
+    GET /api/movimientos/reporte_mensual/
+    """
+    try:
+        año, mes = parametros_reporte_mensual(request.GET)
+
+        reporte, acierto = await cache_reportes.aobtener(
+            request.user.pk,
+            'reporte_mensual',
+            {'año': año, 'mes': mes},
+            lambda: reportes.areporte_mensual(request.user, año, mes),
+        )
+    except ValueError:
+        return _respuesta(request, 
+            {'error': 'Año y mes deben ser números válidos'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    response = _respuesta(request, reportes.datos_reporte_mensual(año, mes, reporte))
+    response['X-Cache'] = 'HIT' if acierto else 'MISS'
+    return response
+
+
+def _leer_datos(request):
+    """
+    Cuerpo JSON, MessagePack o de formulario, como los parsers por defecto de DRF.
+    """
+    if request.content_type == 'application/json':
+        try:
+            datos = json.loads(request.body or b'{}')
+        except ValueError:
+            raise exceptions.ParseError()
+    elif request.content_type == _msgpack.media_type:
+        datos = _msgpack.parse(io.BytesIO(request.body)) if request.body else {}
+    else:
+        return request.POST
+    if not isinstance(datos, dict):
+        raise exceptions.ParseError()
+    return datos
+
+
+@csrf_exempt
+@con_limite_bd
+async def login(request):
+    """
+    POST /api/login/ con la misma respuesta que obtain_auth_token. La
+    verificación de la contraseña (PBKDF2) corre en el pool de api.cuentas.
+    """
+    if request.method != 'POST':
+        return await sync_to_async(login_usuario)(request)
+    try:
+        datos = _leer_datos(request)
+    except exceptions.APIException as exc:
+        return _error(exc, request)
+
+    username = datos.get('username')
+    password = datos.get('password')
+    errores = {}
+    if not username:
+        errores['username'] = ['This field is required.']
+    if not password:
+        errores['password'] = ['This field is required.']
+    if errores:
+        return _respuesta(request, errores, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        user = await cuentas.aautenticar(username, password)
+    except exceptions.APIException as exc:
+        return _error(exc, request)
+    if user is None:
+        return _respuesta(request, 
+            {'non_field_errors': ['Unable to log in with provided credentials.']},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    token, _ = await Token.objects.aget_or_create(user=user)
+    return _respuesta(request, {'token': token.key})
+
+
+@csrf_exempt
+@con_limite_bd
+async def registro(request):
+    """
+    POST /api/registro/ como registro_usuario, con el hash de la contraseña en el pool de api.cuentas.
+    """
+    if request.method != 'POST':
+        return await sync_to_async(registro_usuario)(request)
+    try:
+        datos = _leer_datos(request)
+    except exceptions.APIException as exc:
+        return _error(exc, request)
+
+    username = datos.get('username')
+    password = datos.get('password')
+    email = datos.get('email', '')
+    if not username or not password:
+        return _respuesta(request, {'error': 'Username y password son obligatorios.'}, status=400)
+    try:
+        token = await cuentas.aregistrar(username, password, email)
+    except exceptions.APIException as exc:
+        return _error(exc, request)
+    if token is None:
+        return _respuesta(request, {'error': 'El usuario ya existe.'}, status=400)
+    return _respuesta(request, {'token': token}, status=201)
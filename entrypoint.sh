@@ -2,14 +2,36 @@
 
 set -e
 
-echo "Running Server"
+# Para medir el tiempo hasta estar listo (ver gunicorn.conf.py)
+export INICIO_CONTENEDOR="${INICIO_CONTENEDOR:-$(date +%s.%N)}"
 
-echo "Migrating Database"
-python manage.py makemigrations
-python manage.py migrate
+# ./entrypoint.sh migrate: solo aplica las migraciones, como tarea de una vez
+# antes de desplegar (ver el servicio migrate de docker-compose.yml)
+if [ "$1" = "migrate" ]; then
+    echo "Migrating Database"
+    exec python manage.py migrate --fake-initial
+fi
 
-echo "Database setup completed"
+echo "Running Server"
 
-gunicorn Movimientos_financieros.wsgi:application --bind 0.0.0.0:8000 --workers 2
+# MIGRATE_ON_START:
+#   auto  (por defecto) el master de gunicorn migra solo si hay migraciones pendientes
+#   true  ejecuta migrate antes de arrancar, como antes
+#   false no revisa nada; las migraciones las aplica ./entrypoint.sh migrate
+if [ "${MIGRATE_ON_START:-auto}" = "true" ]; then
+    echo "Migrating Database"
+    python manage.py migrate --fake-initial
+fi
 
+# Cada worker escribe sus métricas aquí y /metrics las combina
+export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/tmp/metricas}"
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
 
+# SERVER_MODE=asgi: workers uvicorn con las vistas async (muchas conexiones por worker)
+if [ "${SERVER_MODE:-wsgi}" = "asgi" ]; then
+    exec gunicorn Movimientos_financieros.asgi:application --bind 0.0.0.0:8000 --workers 2 \
+        --worker-class uvicorn.workers.UvicornWorker
+else
+    exec gunicorn Movimientos_financieros.wsgi:application --bind 0.0.0.0:8000 --workers 2
+fi
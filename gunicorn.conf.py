@@ -0,0 +1,68 @@
+"""
+Configuración de gunicorn, que la carga sola desde el directorio de trabajo.
+
+Con la aplicación precargada (GUNICORN_PRELOAD, por defecto activado) el
+master importa Django una vez y los workers arrancan ya cargados con fork.
+Los tiempos hasta estar listo quedan en el log.
+"""
+import os
+import time
+
+# Momento en que gunicorn lee esta configuración
+_INICIO = time.time()
+
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True').lower() == 'true'
+
+# Hilos por worker WSGI (con más de uno gunicorn usa workers gthread): un
+# login esperando su hash en api.cuentas no bloquea al worker entero. Los
+# workers de uvicorn (SERVER_MODE=asgi) no usan esta opción.
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+
+
+def _desde(momento):
+    return time.time() - momento
+
+
+def on_starting(server):
+    if preload_app:
+        from api import arranque
+
+        arranque.precargar()
+        server.log.info('Aplicación precargada en %.2f s', _desde(_INICIO))
+    if os.getenv('MIGRATE_ON_START', 'auto') != 'auto':
+        return
+    # Sin preload_app se carga Django en el master solo para esta revisión
+    import django
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Movimientos_financieros.settings')
+    django.setup()
+    from api import arranque
+
+    inicio = time.time()
+    pendientes = arranque.migrar_si_hace_falta()
+    server.log.info('Migraciones pendientes: %d (revisadas en %.2f s)', pendientes, _desde(inicio))
+
+
+def when_ready(server):
+    mensaje = 'Servidor listo en %.2f s desde que arrancó gunicorn'
+    argumentos = [_desde(_INICIO)]
+    # entrypoint.sh exporta cuándo arrancó el contenedor
+    if 'INICIO_CONTENEDOR' in os.environ:
+        mensaje += ' (%.2f s desde el inicio del contenedor)'
+        argumentos.append(_desde(float(os.environ['INICIO_CONTENEDOR'])))
+    server.log.info(mensaje, *argumentos)
+
+
+def pre_fork(server, worker):
+    worker.inicio_arranque = time.time()
+
+
+def post_worker_init(worker):
+    worker.log.info('Worker %s listo en %.3f s', worker.pid, _desde(worker.inicio_arranque))
+
+
+def child_exit(server, worker):
+    # Las métricas en vivo del worker (pool de conexiones) dejan de sumarse
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)